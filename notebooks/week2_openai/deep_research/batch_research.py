@@ -0,0 +1,361 @@
+"""
+Headless batch mode for the Deep Research Agent
+
+Queries are queued in SQLite (output/research_jobs.db), optionally loaded from
+a JSONL file with one {"query": ..., "id": ...} object per line, and run by a
+pool of concurrent ResearchManager pipelines. Every stage is checkpointed, so
+an interrupted batch resumes without redoing finished plans, searches or
+reports. Reports and per-job timing/cost metrics are written to output/batch/.
+
+Usage:
+    python batch_research.py queries.jsonl --workers 4
+    python batch_research.py --workers 4        # run whatever is already queued
+    python batch_research.py --status
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import argparse
+from pathlib import Path
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from research_manager import ResearchManager, format_final_report
+from planner_agent import WebSearchPlan, WebSearchItem
+from writer_agent import ReportData
+from search_cache import SearchCache, normalize_query, OUTPUT_DIR, COST_PER_SEARCH
+
+load_dotenv(override=True)
+
+JOBS_PATH = os.getenv("RESEARCH_JOBS_PATH", str(OUTPUT_DIR / "research_jobs.db"))
+BATCH_DIR = OUTPUT_DIR / "batch"
+MAX_ATTEMPTS = int(os.getenv("RESEARCH_JOB_MAX_ATTEMPTS", "2"))
+# A running job whose worker has not checked in for this long is treated as abandoned
+LEASE_SECONDS = float(os.getenv("RESEARCH_JOB_LEASE_SECONDS", "300"))
+HEARTBEAT_SECONDS = LEASE_SECONDS / 3
+# Shared by all workers: agent type -> "requests per minute:max concurrent"
+RATE_LIMITS = os.getenv("RESEARCH_RATE_LIMITS", "planner=30:4,search=60:8,summarizer=30:4,writer=10:2")
+# gpt-4o-mini, USD per million tokens
+INPUT_PRICE_PER_M = 0.15
+OUTPUT_PRICE_PER_M = 0.60
+
+
+class RateLimiter:
+    """Spaces calls evenly to at most per_minute, with at most `concurrency` in flight"""
+
+    def __init__(self, per_minute: float, concurrency: int):
+        self.interval = 60.0 / per_minute
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._semaphore:
+            async with self._lock:
+                now = asyncio.get_running_loop().time()
+                wait = self._next_slot - now
+                self._next_slot = max(now, self._next_slot) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield
+
+
+def parse_rate_limits(spec: str = RATE_LIMITS) -> dict[str, RateLimiter]:
+    limiters = {}
+    for entry in spec.split(","):
+        agent, _, limit = entry.strip().partition("=")
+        per_minute, _, concurrency = limit.partition(":")
+        limiters[agent] = RateLimiter(float(per_minute), int(concurrency or 1))
+    return limiters
+
+
+class JobStore:
+    """SQLite-backed research queue with per-stage checkpoints"""
+
+    def __init__(self, path: str = JOBS_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    query TEXT,
+                    status TEXT DEFAULT 'pending',
+                    attempts INTEGER DEFAULT 0,
+                    created_at REAL,
+                    finished_at REAL,
+                    error TEXT,
+                    report_path TEXT,
+                    metrics TEXT,
+                    claimed_at REAL
+                )
+            ''')
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "claimed_at" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN claimed_at REAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    job_id TEXT,
+                    stage TEXT,
+                    key TEXT,
+                    data TEXT,
+                    PRIMARY KEY (job_id, stage, key)
+                )
+            ''')
+
+    def enqueue(self, query: str, job_id: str | None = None) -> bool:
+        """Queue a query, returning False if a job with that id already exists"""
+        job_id = job_id or hashlib.sha1(query.strip().encode()).hexdigest()[:12]
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, query, created_at) VALUES (?, ?, ?)",
+                (job_id, query.strip(), time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def load_jsonl(self, path: str) -> int:
+        """Queue every query in a JSONL file, returning how many were new"""
+        added = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    job = json.loads(line)
+                    added += self.enqueue(job["query"], job.get("id"))
+        return added
+
+    def requeue_interrupted(self, lease_seconds: float = LEASE_SECONDS) -> int:
+        """
+        Jobs left running by a crashed or interrupted batch go back to pending.
+
+        Only jobs whose lease has expired are requeued, so jobs that another
+        live batch process is still working on (and heartbeating) are left alone.
+        """
+        with self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'pending' WHERE status = 'running' AND "
+                "(claimed_at IS NULL OR claimed_at < ?)",
+                (time.time() - lease_seconds,),
+            ).rowcount
+
+    def claim(self) -> tuple[str, str] | None:
+        """Take the oldest pending job, marking it running, after requeueing any whose lease expired"""
+        self.requeue_interrupted()
+        while True:
+            row = self._conn.execute(
+                "SELECT id, query FROM jobs WHERE status = 'pending' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                # Only succeeds if no other batch process claimed it in the meantime
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, claimed_at = ? "
+                    "WHERE id = ? AND status = 'pending'",
+                    (time.time(), row[0]),
+                ).rowcount
+            if claimed:
+                return row
+
+    def heartbeat(self, job_id: str) -> None:
+        """Renew a running job's lease"""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET claimed_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, report_path: str, metrics: dict) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, report_path = ?, metrics = ?, error = NULL WHERE id = ?",
+                (time.time(), report_path, json.dumps(metrics), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        """Record a failure; the job is retried until it has used MAX_ATTEMPTS"""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, error = ? WHERE id = ?",
+                (MAX_ATTEMPTS, error, job_id),
+            )
+
+    def get_checkpoint(self, job_id: str, stage: str, key: str = "") -> str | None:
+        row = self._conn.execute(
+            "SELECT data FROM checkpoints WHERE job_id = ? AND stage = ? AND key = ?", (job_id, stage, key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save_checkpoint(self, job_id: str, stage: str, data: str, key: str = "") -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, stage, key, data) VALUES (?, ?, ?, ?)",
+                (job_id, stage, key, data),
+            )
+
+    def counts(self) -> dict[str, int]:
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class BatchResearchManager(ResearchManager):
+    """
+    ResearchManager for one queued job: agent calls go through the shared rate
+    limiters, and the plan, each search and the report are checkpointed.
+    No email is sent; the report is written to output/batch instead.
+    """
+
+    def __init__(self, job_id: str, store: JobStore, limiters: dict[str, RateLimiter], cache: SearchCache):
+        super().__init__(cache=cache)
+        self.job_id = job_id
+        self.store = store
+        self.limiters = limiters
+        self.resumed_searches = 0
+
+    @asynccontextmanager
+    async def limit(self, agent: str):
+        if agent in self.limiters:
+            async with self.limiters[agent].slot():
+                yield
+        else:
+            yield
+
+    def summarizer_limit(self):
+        return self.limit("summarizer")
+
+    async def plan_searches(self, query: str) -> WebSearchPlan:
+        saved = self.store.get_checkpoint(self.job_id, "plan")
+        if saved is not None:
+            print(f"[{self.job_id}] Resuming from saved plan")
+            return WebSearchPlan(searches=[WebSearchItem(**item) for item in json.loads(saved)])
+        async with self.limit("planner"):
+            plan = await super().plan_searches(query)
+        self.store.save_checkpoint(self.job_id, "plan", json.dumps([item.model_dump() for item in plan.searches]))
+        return plan
+
+    async def cached_search(self, item: WebSearchItem) -> tuple[WebSearchItem, str | None]:
+        key = normalize_query(item.query)
+        saved = self.store.get_checkpoint(self.job_id, "search", key)
+        if saved is not None:
+            self.resumed_searches += 1
+            return item, saved
+        item, result = await super().cached_search(item)
+        if result is not None:
+            self.store.save_checkpoint(self.job_id, "search", result, key)
+        return item, result
+
+    async def search(self, item: WebSearchItem) -> str | None:
+        async with self.limit("search"):
+            return await super().search(item)
+
+    async def write_report(self, query: str, search_results: list[str]) -> ReportData:
+        saved = self.store.get_checkpoint(self.job_id, "report")
+        if saved is not None:
+            return ReportData(**json.loads(saved))
+        async with self.limit("writer"):
+            report = await super().write_report(query, search_results)
+        self.store.save_checkpoint(self.job_id, "report", report.model_dump_json())
+        return report
+
+    def cost_usd(self) -> float:
+        """Web search fees plus token cost of this job's agent runs"""
+        tokens = (
+            self.usage["input_tokens"] * INPUT_PRICE_PER_M + self.usage["output_tokens"] * OUTPUT_PRICE_PER_M
+        ) / 1_000_000
+        # "searched" counts every search started, including any cancelled before finishing
+        paid_searches = self.search_stats.get("searched", 0) - self.resumed_searches
+        return paid_searches * COST_PER_SEARCH + tokens
+
+
+async def run_job(job_id: str, query: str, store: JobStore, limiters: dict, cache: SearchCache) -> dict:
+    """Run one job through plan, search and write, returning its metrics"""
+    manager = BatchResearchManager(job_id, store, limiters, cache)
+    timings = {}
+
+    started = time.perf_counter()
+    plan = await manager.plan_searches(query)
+    timings["plan_seconds"] = time.perf_counter() - started
+
+    # Batch jobs have no time budget, so every planned search is waited for
+    stage_started = time.perf_counter()
+    results = await manager.perform_searches(plan)
+    timings["search_seconds"] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    report = await manager.write_report(query, results)
+    timings["write_seconds"] = time.perf_counter() - stage_started
+
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = BATCH_DIR / f"{job_id}.md"
+    report_path.write_text(format_final_report(query, report), encoding="utf-8")
+
+    metrics = {
+        "job_id": job_id,
+        "query": query,
+        **{name: round(seconds, 2) for name, seconds in timings.items()},
+        "total_seconds": round(time.perf_counter() - started, 2),
+        **manager.search_stats,
+        "resumed_searches": manager.resumed_searches,
+        **manager.usage,
+        "cost_usd": round(manager.cost_usd(), 4),
+    }
+    store.finish(job_id, str(report_path), metrics)
+    with open(BATCH_DIR / "metrics.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(metrics) + "\n")
+    return metrics
+
+
+async def keep_alive(store: JobStore, job_id: str) -> None:
+    """Renew a job's lease until cancelled, so other batch processes don't requeue it"""
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        store.heartbeat(job_id)
+
+
+async def worker(name: str, store: JobStore, limiters: dict, cache: SearchCache) -> None:
+    while (job := store.claim()) is not None:
+        job_id, query = job
+        print(f"[{name}] 🚀 {job_id}: {query}")
+        heartbeat = asyncio.create_task(keep_alive(store, job_id))
+        try:
+            metrics = await run_job(job_id, query, store, limiters, cache)
+            print(f"[{name}] ✅ {job_id} in {metrics['total_seconds']}s, ${metrics['cost_usd']:.4f}")
+        except Exception as e:
+            print(f"[{name}] ❌ {job_id} failed: {e}")
+            store.fail(job_id, str(e))
+        finally:
+            heartbeat.cancel()
+
+
+async def run_batch(workers: int = 4, store: JobStore | None = None) -> dict[str, int]:
+    """Run queued jobs on a pool of workers until the queue is empty, returning job counts by status"""
+    store = store or JobStore()
+    interrupted = store.requeue_interrupted()
+    if interrupted:
+        print(f"♻️ Resuming {interrupted} interrupted jobs")
+    limiters = parse_rate_limits()
+    cache = SearchCache()
+    await asyncio.gather(*[worker(f"worker-{i + 1}", store, limiters, cache) for i in range(workers)])
+    return store.counts()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run deep research queries in batch")
+    parser.add_argument("jobs", nargs="?", help="JSONL file of {\"query\": ..., \"id\": ...} to queue first")
+    parser.add_argument("--workers", type=int, default=4, help="Research pipelines to run concurrently")
+    parser.add_argument("--status", action="store_true", help="Show queue counts and exit")
+    args = parser.parse_args()
+
+    store = JobStore()
+    if args.jobs:
+        print(f"📥 Queued {store.load_jsonl(args.jobs)} new jobs from {args.jobs}")
+    if args.status:
+        print(store.counts())
+        return
+    counts = asyncio.run(run_batch(args.workers, store))
+    print(f"📊 Batch finished: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import os
+import re
+import asyncio
+from contextlib import nullcontext
+from dataclasses import dataclass
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from agents import Runner
+from summarizer_agent import summarizer_agent
+from search_cache import query_tokens, token_set_similarity
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # Not installed, or the encoding could not be downloaded: fall back to an estimate
+    _encoding = None
+
+# Token budget for the research passed to the writer
+WRITER_TOKEN_BUDGET = int(os.getenv("RESEARCH_WRITER_TOKEN_BUDGET", "6000"))
+# Sentences overlapping an earlier one at least this much are dropped as repeated facts
+FACT_DUPLICATE_THRESHOLD = float(os.getenv("RESEARCH_FACT_DUPLICATE_THRESHOLD", "0.7"))
+MAX_REDUCE_ROUNDS = 3
+
+LINK = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+SOURCES_HEADER = re.compile(r"\**\s*sources?\s*\**\s*:", re.IGNORECASE)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+# Query parameters dropped when normalizing URLs: utm_* by prefix, the rest by exact name
+TRACKING_PREFIX = "utm_"
+TRACKING_PARAMS = {"ref", "fbclid", "gclid"}
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate at four characters per token"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return max(1, len(text) // 4)
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith(TRACKING_PREFIX) or name in TRACKING_PARAMS
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL, so the same page cited by several searches gets one number"""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not _is_tracking_param(k)]
+    host = parts.netloc.lower().removeprefix("www.")
+    return urlunsplit(("https", host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+@dataclass
+class CompactedResearch:
+    """Deduplicated findings citing a numbered source list, ready for the writer prompt"""
+    findings: list[str]
+    sources: list[tuple[str, str]]
+    input_tokens: int
+    reduce_rounds: int = 0
+
+    def to_prompt(self) -> str:
+        findings = "\n".join(f"- {finding}" for finding in self.findings)
+        sources = "\n".join(f"[{n}] {title}: {url}" for n, (title, url) in enumerate(self.sources, 1))
+        return f"Findings (with numbered citations):\n{findings}\n\nSources:\n{sources}"
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.to_prompt())
+
+
+def compact(search_results: list[str]) -> CompactedResearch:
+    """
+    Merge search summaries into deduplicated findings with numbered citations.
+
+    Links anywhere in a summary become numbered sources, shared across
+    summaries by normalized URL. Sentences that repeat a fact already kept
+    (token-set similarity) are dropped. Each summary's remaining text becomes
+    one finding ending with the citation numbers of its sources.
+    """
+    numbers: dict[str, int] = {}
+    sources: list[tuple[str, str]] = []
+    kept: list[str] = []
+    findings: list[str] = []
+
+    for summary in search_results:
+        citations = []
+        for title, url in LINK.findall(summary):
+            key = normalize_url(url)
+            if key not in numbers:
+                sources.append((title.strip(), url.strip()))
+                numbers[key] = len(sources)
+            if numbers[key] not in citations:
+                citations.append(numbers[key])
+
+        body = SOURCES_HEADER.split(summary)[0]
+        body = LINK.sub(lambda match: match.group(1), body)
+        # Lines are hard-wrapped mid-sentence; only blank lines and bullets separate facts
+        body = re.sub(r"\n\s*[-*•]\s+", "\n\n", body)
+        body = re.sub(r"(?<!\n)\n(?!\n)", " ", body)
+        body = re.sub(r"[ \t]+", " ", body)
+        sentences = []
+        for sentence in SENTENCE_END.split(body):
+            sentence = sentence.strip(" -*\t")
+            if not sentence:
+                continue
+            # Very short fragments are kept: too few tokens to judge overlap
+            if len(query_tokens(sentence)) >= 4 and any(
+                token_set_similarity(sentence, earlier) >= FACT_DUPLICATE_THRESHOLD for earlier in kept
+            ):
+                continue
+            kept.append(sentence)
+            sentences.append(sentence)
+        if sentences:
+            markers = "".join(f"[{n}]" for n in citations)
+            findings.append(" ".join(sentences) + (f" {markers}" if markers else ""))
+
+    return CompactedResearch(findings, sources, count_tokens("\n".join(search_results)))
+
+
+def _batches(findings: list[str], batch_tokens: int) -> list[list[str]]:
+    batches, current, size = [], [], 0
+    for finding in findings:
+        tokens = count_tokens(finding)
+        if current and size + tokens > batch_tokens:
+            batches.append(current)
+            current, size = [], 0
+        current.append(finding)
+        size += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _summarize(findings: list[str], target_words: int, record_usage=None, limit=None) -> list[str]:
+    input_text = f"Condense to at most {target_words} words.\n\n" + "\n".join(f"- {f}" for f in findings)
+    async with limit() if limit is not None else nullcontext():
+        result = await Runner.run(summarizer_agent, input_text)
+    if record_usage is not None:
+        record_usage(result)
+    lines = [line.strip().removeprefix("- ").strip() for line in str(result.final_output).splitlines()]
+    return [line for line in lines if line]
+
+
+async def compact_for_writer(
+    search_results: list[str], budget: int = WRITER_TOKEN_BUDGET, record_usage=None, limit=None
+) -> CompactedResearch:
+    """
+    Compact search results to fit the writer's token budget.
+
+    Deduplication is free and always applied. If the result is still over
+    budget, findings are summarized in parallel batches (map) and the
+    condensed findings are summarized again (reduce) until they fit or
+    MAX_REDUCE_ROUNDS is reached. Citation markers are carried through.
+    record_usage, if given, is called with each summarizer run's result.
+    limit, if given, returns an async context manager held around each
+    summarizer run, e.g. a rate limiter slot.
+    """
+    research = compact(search_results)
+    sources_tokens = count_tokens("\n".join(f"{title}: {url}" for title, url in research.sources))
+    findings_budget = max(budget - sources_tokens, budget // 4)
+
+    while research.tokens > budget and research.reduce_rounds < MAX_REDUCE_ROUNDS:
+        batches = _batches(research.findings, findings_budget)
+        # Roughly 0.75 words per token, shared between the batches
+        target_words = max(50, int(findings_budget * 0.75 / len(batches)))
+        print(f"🗜️ Condensing {len(research.findings)} findings in {len(batches)} batches")
+        condensed = await asyncio.gather(*[_summarize(batch, target_words, record_usage, limit) for batch in batches])
+        research.findings = [finding for batch in condensed for finding in batch]
+        research.reduce_rounds += 1
+
+    return research
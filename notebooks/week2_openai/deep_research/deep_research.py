@@ -8,7 +8,7 @@ import sys
 def force_reload_modules():
     """Force reload of all our custom modules to pick up latest changes"""
     modules_to_reload = [
-        'research_manager', 'email_agent', 'search_agent', 
+        'search_cache', 'summarizer_agent', 'compaction', 'research_manager', 'email_agent', 'search_agent', 
         'planner_agent', 'writer_agent'
     ]
     
@@ -24,6 +24,7 @@ force_reload_modules()
 
 # Now import after reload
 from research_manager import ResearchManager
+from search_cache import SearchCache
 
 load_dotenv(override=True)
 
@@ -31,6 +32,10 @@ load_dotenv(override=True)
 class MockResearchManager(ResearchManager):
     """Test version that uses mock searches instead of real web searches"""
     
+    def __init__(self):
+        # Mock summaries must never be served to real searches, so keep them in memory
+        super().__init__(cache=SearchCache(":memory:"))
+    
     async def search(self, item):
         """Mock search that returns simulated results instead of real web searches"""
         print(f"🔍 MOCK SEARCH: {item.query}")
@@ -82,126 +87,78 @@ class MockResearchManager(ResearchManager):
             return mock_results["default"]
 
 
-async def run_research_async(query: str, use_test_mode: bool = False):
-    """Async version for Jupyter notebooks - SIMPLIFIED"""
+# Overall limit for one research run, matching the old synchronous wrapper
+RESEARCH_TIMEOUT_SECONDS = 180
+
+
+def _make_manager(use_test_mode: bool):
+    # Import fresh versions after reload
+    from research_manager import ResearchManager
+    
+    # Choose manager based on test mode
+    if use_test_mode:
+        print("🧪 **TEST MODE ACTIVE - No API costs will be incurred**")
+        return MockResearchManager()
+    print("💰 **REAL MODE ACTIVE - OpenAI API costs will apply (2.5¢ per search)**")
+    return ResearchManager()
+
+
+async def stream_research(query: str, use_test_mode: bool = False):
+    """Stream (progress, report) markdown pairs as searches finish and the report is written"""
     if not query or query.strip() == "":
-        return "❌ Please enter a research query", ""
+        yield "❌ Please enter a research query", ""
+        return
     
     # 🔄 Force reload modules to pick up latest changes
     print("🔄 Reloading modules for latest changes...")
     force_reload_modules()
     
+    progress = []
+    report = ""
+    events = _make_manager(use_test_mode).run_events(query)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + RESEARCH_TIMEOUT_SECONDS
     try:
-        # Import fresh versions after reload
-        from research_manager import ResearchManager
-        
-        # Choose manager based on test mode
-        if use_test_mode:
-            manager = MockResearchManager()
-            print("🧪 **TEST MODE ACTIVE - No API costs will be incurred**")
-        else:
-            manager = ResearchManager()
-            print("💰 **REAL MODE ACTIVE - OpenAI API costs will apply (2.5¢ per search)**")
-        
-        # Collect all chunks
-        all_chunks = []
-        async for chunk in manager.run(query):
-            all_chunks.append(str(chunk))
-            print(f"🔄 Progress: {len(all_chunks)} updates received")
-        
-        if not all_chunks:
-            return "❌ No results received", ""
-        
-        # Find the final report (usually the longest chunk)
-        final_report = ""
-        progress_chunks = []
-        
-        for chunk in all_chunks:
-            if len(chunk) > 500 and ("##" in chunk or "#" in chunk):
-                final_report = chunk
+        while True:
+            try:
+                event = await asyncio.wait_for(anext(events), deadline - loop.time())
+            except StopAsyncIteration:
+                break
+            if event.kind == "report_delta" and report == "":
+                progress.append("✍️ Writing report...")
+            if event.kind in ("report_delta", "report"):
+                # Each event carries the whole report so far, so it simply replaces the panel
+                report = event.text
             else:
-                progress_chunks.append(chunk)
-        
-        # If no long report found, use the last chunk
-        if not final_report and all_chunks:
-            final_report = all_chunks[-1]
-            progress_chunks = all_chunks[:-1]
-        
-        progress_text = "\n".join(progress_chunks) + "\n\n✅ **Research Complete!**"
-        
-        return progress_text, final_report
-                
+                progress.append(event.text)
+            yield "\n\n".join(progress), report
+        yield "\n\n".join(progress) + "\n\n✅ **Research Complete!**", report
+    except asyncio.TimeoutError:
+        yield "\n\n".join(progress) + f"\n\n❌ Research timed out after {RESEARCH_TIMEOUT_SECONDS // 60} minutes", report
     except Exception as e:
-        error_msg = f"❌ Error during research: {str(e)}"
         print(f"DEBUG: Exception occurred: {e}")
-        return error_msg, ""
+        yield "\n\n".join(progress) + f"\n\n❌ Error during research: {str(e)}", report
+
+
+async def run_research_async(query: str, use_test_mode: bool = False):
+    """Async version for Jupyter notebooks: returns the final (progress, report) pair"""
+    progress_text, final_report = "❌ No results received", ""
+    async for progress_text, final_report in stream_research(query, use_test_mode):
+        pass
+    return progress_text, final_report
 
 
 def run_research_sync(query: str, use_test_mode: bool = False):
-    """Synchronous wrapper - ULTRA SIMPLIFIED for maximum reliability"""
-    if not query or query.strip() == "":
-        return "❌ Please enter a research query", ""
+    """Synchronous wrapper for scripts: runs the research on a fresh event loop in a worker thread"""
+    import concurrent.futures
     
-    # 🔄 Force reload modules to pick up latest changes
-    print("🔄 Reloading modules for latest changes...")
-    force_reload_modules()
+    def run_async_in_thread():
+        """Run async code in completely isolated thread"""
+        return asyncio.run(run_research_async(query, use_test_mode))
     
     try:
-        import concurrent.futures
-        import asyncio
-        
-        def run_async_in_thread():
-            """Run async code in completely isolated thread"""
-            # Create completely new event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            try:
-                # Simple direct execution
-                async def simple_research():
-                    # Import fresh versions after reload
-                    from research_manager import ResearchManager
-                    
-                    if use_test_mode:
-                        manager = MockResearchManager()
-                        print("🧪 TEST MODE: Using mock searches")
-                    else:
-                        manager = ResearchManager()
-                        print("💰 REAL MODE: Using live searches")
-                    
-                    # Just collect everything
-                    chunks = []
-                    async for chunk in manager.run(query):
-                        chunks.append(str(chunk))
-                        print(f"📥 Collected chunk {len(chunks)}")
-                    
-                    if not chunks:
-                        return "❌ No data collected", ""
-                    
-                    # Simple separation: longest chunk = report, rest = progress
-                    longest_chunk = max(chunks, key=len) if chunks else ""
-                    other_chunks = [c for c in chunks if c != longest_chunk]
-                    
-                    progress = "\n".join(other_chunks) + "\n\n✅ Complete!"
-                    return progress, longest_chunk
-                
-                # Run it
-                return loop.run_until_complete(simple_research())
-                
-            except Exception as e:
-                print(f"🔧 Thread error: {e}")
-                return f"❌ Error: {e}", ""
-            finally:
-                loop.close()
-        
-        # Execute in thread with timeout
         with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(run_async_in_thread)
-            result = future.result(timeout=180)  # 3 minute timeout
-            return result
-            
-    except concurrent.futures.TimeoutError:
-        return "❌ Research timed out after 3 minutes", ""
+            return executor.submit(run_async_in_thread).result()
     except Exception as e:
         print(f"🔧 Sync wrapper error: {e}")
         return f"❌ Error: {e}", ""
@@ -306,12 +263,12 @@ def create_interface():
         
         # Connect the buttons to functions
         run_button.click(
-            fn=run_research_sync, 
+            fn=stream_research, 
             inputs=[query_textbox, test_mode_toggle], 
             outputs=[progress_area, report_area]
         )
         query_textbox.submit(
-            fn=run_research_sync, 
+            fn=stream_research, 
             inputs=[query_textbox, test_mode_toggle], 
             outputs=[progress_area, report_area]
         )
@@ -1,7 +1,9 @@
+import os
 from pydantic import BaseModel, Field
 from agents import Agent
 
-HOW_MANY_SEARCHES = 5
+# The writer's input is compacted to a token budget, so this can be raised well beyond 5
+HOW_MANY_SEARCHES = int(os.getenv("RESEARCH_HOW_MANY_SEARCHES", "5"))
 
 INSTRUCTIONS = f"""You are a helpful research assistant. Given a query, come up with a set of web searches 
 to perform to best answer the query comprehensively. Output {HOW_MANY_SEARCHES} diverse search terms that will 
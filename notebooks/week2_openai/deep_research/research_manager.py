@@ -1,33 +1,102 @@
 from agents import Runner, trace, gen_trace_id
+from openai.types.responses import ResponseTextDeltaEvent
 from search_agent import search_agent
 from planner_agent import planner_agent, WebSearchItem, WebSearchPlan
 from writer_agent import writer_agent, ReportData
 from email_agent import email_agent
+from compaction import compact_for_writer, CompactedResearch
+from search_cache import SearchCache, token_set_similarity, DUPLICATE_THRESHOLD, COST_PER_SEARCH
+from dataclasses import dataclass
+from contextlib import nullcontext
 import asyncio
+import json
+import math
+import os
+import re
 
-class ResearchManager:
+# End-to-end budget for a report in the UI pipeline (run_events). Searches still
+# running when the writer's share starts are abandoned, and a writer or email
+# still running when the budget is spent is cut off
+RESEARCH_BUDGET_SECONDS = float(os.getenv("RESEARCH_BUDGET_SECONDS", "150"))
+WRITER_RESERVE_SECONDS = float(os.getenv("RESEARCH_WRITER_RESERVE_SECONDS", "60"))
+SEARCH_CONCURRENCY = int(os.getenv("RESEARCH_SEARCH_CONCURRENCY", "3"))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("RESEARCH_SEARCH_TIMEOUT_SECONDS", "45"))
+# In a budgeted run, the writer starts once planning is done and this share of the searches succeeded
+SEARCH_QUORUM = float(os.getenv("RESEARCH_SEARCH_QUORUM", "0.8"))
 
-    async def run(self, query: str):
-        """Run the deep research process, yielding status updates and the final report"""
-        trace_id = gen_trace_id()
-        with trace("Research trace", trace_id=trace_id):
-            yield f"🔍 View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}"
-            yield "🚀 Starting research..."
-            search_plan = await self.plan_searches(query)
-            yield "📋 Searches planned, starting to search..."     
-            search_results = await self.perform_searches(search_plan)
-            yield "✅ Searches complete, writing report..."
-            report = await self.write_report(query, search_results)
-            yield "📝 Report written, sending email..."
-            await self.send_email(report)
-            yield "📧 Email sent successfully!"
-            
-            # Format the final report for better display in Gradio
-            print(f"DEBUG: Preparing final report for query: {query}")
-            print(f"DEBUG: Report summary length: {len(report.short_summary)}")
-            print(f"DEBUG: Report content length: {len(report.markdown_report)}")
-            
-            final_report = f"""## Final Research Report
+
+@dataclass
+class ResearchEvent:
+    """One update from ResearchManager.run_events"""
+    kind: str          # "status", "search", "report_delta" or "report"
+    text: str          # message, or the report markdown written so far / the final report
+    completed: int = 0
+    total: int = 0
+
+
+def partial_json_string(text: str, field: str) -> str | None:
+    """Decode the (possibly unfinished) string value of a field from partially streamed JSON"""
+    match = re.search(rf'"{field}"\s*:\s*"', text)
+    if not match:
+        return None
+    raw = []
+    i = match.end()
+    while i < len(text):
+        char = text[i]
+        if char == "\\":
+            # Stop before an escape sequence that has not fully arrived yet
+            size = 6 if text[i + 1:i + 2] == "u" else 2
+            if i + size > len(text):
+                break
+            raw.append(text[i:i + size])
+            i += size
+            continue
+        if char == '"':
+            break
+        raw.append(char)
+        i += 1
+    try:
+        return json.loads('"' + "".join(raw) + '"', strict=False)
+    except json.JSONDecodeError:
+        return None
+
+
+def partial_json_objects(text: str, field: str) -> list[dict]:
+    """Decode the complete objects of an array field from partially streamed JSON"""
+    match = re.search(rf'"{field}"\s*:\s*\[', text)
+    if not match:
+        return []
+    objects = []
+    depth = 0
+    start = None
+    in_string = False
+    i = match.end()
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if char == "\\":
+                i += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                objects.append(json.loads(text[start:i + 1], strict=False))
+        elif char == "]" and depth == 0:
+            break
+        i += 1
+    return objects
+
+
+def format_final_report(query: str, report: ReportData) -> str:
+    """Format the final report for display in Gradio"""
+    final_report = f"""## Final Research Report
 
 **Query:** {query}
 
@@ -41,15 +110,116 @@ class ResearchManager:
 
 ### 🔍 Recommended Follow-up Research Topics:
 """
-            
-            for i, question in enumerate(report.follow_up_questions, 1):
-                final_report += f"{i}. {question}\n"
-            
-            print(f"DEBUG: Final report prepared, length: {len(final_report)}")
-            print(f"DEBUG: Final report starts with: {final_report[:100]}...")
-            
-            yield final_report
-        
+    for i, question in enumerate(report.follow_up_questions, 1):
+        final_report += f"{i}. {question}\n"
+    return final_report
+
+
+async def _until(events, deadline: float):
+    """Re-yield an async generator's items, raising asyncio.TimeoutError once the deadline (event loop time) passes"""
+    loop = asyncio.get_running_loop()
+    iterator = events.__aiter__()
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await iterator.aclose()
+
+
+async def _aiter(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class ResearchManager:
+
+    def __init__(self, cache: SearchCache | None = None, budget_seconds: float = RESEARCH_BUDGET_SECONDS):
+        self.cache = cache if cache is not None else SearchCache()
+        self.budget_seconds = budget_seconds
+        self.search_stats = {}
+        self.usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0}
+
+    def record_usage(self, result) -> None:
+        """Add a finished agent run's token usage to self.usage"""
+        usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+        if usage is None:
+            return
+        self.usage["requests"] += usage.requests
+        self.usage["input_tokens"] += usage.input_tokens
+        self.usage["output_tokens"] += usage.output_tokens
+
+    def summarizer_limit(self):
+        """Context manager held around each summarizer run while compacting; no limit by default"""
+        return nullcontext()
+
+    async def run(self, query: str):
+        """Run the deep research process, yielding status updates and the final report"""
+        async for event in self.run_events(query):
+            if event.kind != "report_delta":
+                yield event.text
+
+    async def run_events(self, query: str):
+        """
+        Run the deep research process as a stream of ResearchEvents.
+
+        The stages are pipelined: each search starts as soon as the planner
+        streams its WebSearchItem, and the writer starts once a quorum of
+        searches succeeded or the search share of the budget is spent. Each
+        search is reported as soon as it completes, and the report is
+        streamed as the writer produces it. The writer and the email must
+        finish within the rest of the budget: a report cut off by it is
+        returned as far as it was written, and the email is then skipped.
+        """
+        trace_id = gen_trace_id()
+        with trace("Research trace", trace_id=trace_id):
+            yield ResearchEvent("status", f"🔍 View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}")
+            yield ResearchEvent("status", "🚀 Starting research...")
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.budget_seconds
+            search_deadline = deadline - WRITER_RESERVE_SECONDS
+            yield ResearchEvent("status", "📋 Planning searches, each one starts as soon as it is planned...")
+            search_results = []
+            async for item, result, completed, total in self.iter_searches(self.stream_plan(query), search_deadline):
+                if result is not None:
+                    search_results.append(result)
+                outcome = "done" if result is not None else "failed"
+                yield ResearchEvent("search", f"🔎 {completed}/{total} {outcome}: {item.query}", completed, total)
+            yield ResearchEvent("status", self.format_search_stats())
+            yield ResearchEvent("status", "✅ Searches complete, writing report...")
+            report = None
+            written = ""
+            try:
+                async for event in _until(self.stream_report(query, search_results), deadline):
+                    if isinstance(event, ResearchEvent):
+                        if event.kind == "report_delta":
+                            written = event.text
+                        yield event
+                    else:
+                        report = event
+            except asyncio.TimeoutError:
+                print(f"Writer cut off by the {self.budget_seconds:.0f}s budget")
+                report = ReportData(
+                    short_summary="The time budget ran out while the report was being written; this is the part written so far.",
+                    markdown_report=written or "_No report text was written within the time budget._",
+                    follow_up_questions=[],
+                )
+                yield ResearchEvent("status", "⏱️ Time budget spent, keeping the report written so far")
+            else:
+                yield ResearchEvent("status", "📝 Report written, sending email...")
+                try:
+                    await asyncio.wait_for(self.send_email(report), max(deadline - loop.time(), 0))
+                    yield ResearchEvent("status", "📧 Email sent successfully!")
+                except asyncio.TimeoutError:
+                    yield ResearchEvent("status", "⏱️ Time budget spent, email not sent")
+            yield ResearchEvent("report", format_final_report(query, report))
 
     async def plan_searches(self, query: str) -> WebSearchPlan:
         """Plan the searches to perform for the query"""
@@ -58,24 +228,164 @@ class ResearchManager:
             planner_agent,
             f"Query: {query}",
         )
+        self.record_usage(result)
         print(f"Will perform {len(result.final_output.searches)} searches")
         return result.final_output_as(WebSearchPlan)
 
+    async def stream_plan(self, query: str):
+        """Yield each WebSearchItem as soon as the planner has streamed it"""
+        print("Planning searches...")
+        result = Runner.run_streamed(
+            planner_agent,
+            f"Query: {query}",
+        )
+        streamed = ""
+        emitted = 0
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                streamed += event.data.delta
+                for fields in partial_json_objects(streamed, "searches")[emitted:]:
+                    emitted += 1
+                    yield WebSearchItem(**fields)
+        # Anything the partial parse missed is in the validated final plan
+        self.record_usage(result)
+        searches = result.final_output_as(WebSearchPlan).searches
+        print(f"Planned {len(searches)} searches")
+        for item in searches[emitted:]:
+            yield item
+
     async def perform_searches(self, search_plan: WebSearchPlan) -> list[str]:
-        """Perform the searches for the query"""
-        print("Searching...")
-        num_completed = 0
-        tasks = [asyncio.create_task(self.search(item)) for item in search_plan.searches]
+        """Perform the searches for the query, skipping near-duplicates and cached queries; waits for every search"""
         results = []
-        for task in asyncio.as_completed(tasks):
-            result = await task
+        async for _, result, _, _ in self.iter_searches(search_plan.searches):
             if result is not None:
                 results.append(result)
-            num_completed += 1
-            print(f"Searching... {num_completed}/{len(tasks)} completed")
-        print("Finished searching")
         return results
 
+    async def iter_searches(self, items, deadline: float | None = None):
+        """
+        Yield (item, result, completed, total) for each search as it finishes.
+
+        items can be a list or an async iterator (such as stream_plan), and
+        searches start as items arrive, at most SEARCH_CONCURRENCY at a time and
+        each limited to SEARCH_TIMEOUT_SECONDS. Near-duplicates are skipped and
+        cache hits are yielded immediately. Iteration stops once planning is
+        done and every search finished. With a deadline (event loop time) it
+        also stops early once a quorum succeeded, or when the deadline passes;
+        searches still running then are cancelled. Without one, every search
+        is waited for.
+        """
+        print("Searching...")
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+        finished = asyncio.Queue()
+        tasks = []
+        started = []
+        planner_errors = []
+        stats = self.search_stats = {"planned": 0, "duplicates": 0, "cache_hits": 0, "searched": 0, "abandoned": 0}
+
+        async def run_search(item: WebSearchItem):
+            async with semaphore:
+                try:
+                    _, result = await asyncio.wait_for(self.cached_search(item), SEARCH_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    print(f"Search timed out after {SEARCH_TIMEOUT_SECONDS:.0f}s: {item.query}")
+                    result = None
+            await finished.put((item, result))
+
+        async def start_searches():
+            try:
+                async for item in _aiter(items):
+                    stats["planned"] += 1
+                    original = next((q for q in started if token_set_similarity(q, item.query) >= DUPLICATE_THRESHOLD), None)
+                    if original is not None:
+                        print(f"Skipping near-duplicate search '{item.query}' (same as '{original}')")
+                        stats["duplicates"] += 1
+                        continue
+                    started.append(item.query)
+                    cached = self.cache.get(item.query)
+                    if cached is not None:
+                        print(f"Cache hit: {item.query}")
+                        stats["cache_hits"] += 1
+                        await finished.put((item, cached))
+                    else:
+                        stats["searched"] += 1
+                        tasks.append(asyncio.create_task(run_search(item)))
+            except Exception as e:
+                print(f"DEBUG: Planning failed: {e}")
+                planner_errors.append(e)
+            finally:
+                # Marks the end of planning, even if the planner failed
+                await finished.put(None)
+
+        planner = asyncio.create_task(start_searches())
+        num_completed = 0
+        succeeded = 0
+        planning_done = False
+        try:
+            while True:
+                if planning_done and (
+                    num_completed == len(started)
+                    or (deadline is not None and succeeded >= math.ceil(SEARCH_QUORUM * len(started)))
+                ):
+                    break
+                timeout = None if deadline is None else deadline - loop.time()
+                if timeout is not None and timeout <= 0:
+                    print("Search budget spent, writing with the results so far")
+                    break
+                try:
+                    entry = await asyncio.wait_for(finished.get(), timeout)
+                except asyncio.TimeoutError:
+                    continue
+                if entry is None:
+                    planning_done = True
+                    if planner_errors and not started:
+                        raise planner_errors[0]
+                    continue
+                item, result = entry
+                num_completed += 1
+                succeeded += result is not None
+                print(f"Searching... {num_completed}/{len(started)} completed")
+                yield item, result, num_completed, len(started)
+        finally:
+            # Stragglers and the planner are not waited for
+            planner.cancel()
+            stats["abandoned"] = sum(not task.done() for task in tasks)
+            for task in tasks:
+                task.cancel()
+        print("Finished searching")
+
+    async def cached_search(self, item: WebSearchItem) -> tuple[WebSearchItem, str | None]:
+        """Search and cache the summary; failed searches are not cached"""
+        result = await self.search(item)
+        if result is not None:
+            self.cache.put(item.query, result)
+        return item, result
+
+    def format_search_stats(self) -> str:
+        """One progress line describing how many searches the cache and deduplication saved"""
+        stats = self.search_stats
+        saved = stats["cache_hits"] + stats["duplicates"]
+        cache = self.cache.stats()
+        message = (
+            f"💾 {stats['searched']}/{stats['planned']} searches run: {stats['cache_hits']} cached, "
+            f"{stats['duplicates']} near-duplicates skipped (saved ~{saved * COST_PER_SEARCH * 100:.1f}¢). "
+            f"Cache: {cache['hit_rate']:.0%} hit rate, {cache['entries']} entries"
+        )
+        if stats.get("abandoned"):
+            message += f". {stats['abandoned']} slow searches left out to stay within the time budget"
+        return message
+
+    def format_compaction(self, research: CompactedResearch) -> str:
+        """One progress line describing how much the writer's input was compacted"""
+        message = (
+            f"🗜️ Writer input: {research.input_tokens} → {research.tokens} tokens, "
+            f"{len(research.findings)} findings citing {len(research.sources)} unique sources"
+        )
+        if research.reduce_rounds:
+            message += f" ({research.reduce_rounds} summarization rounds)"
+        return message
+
     async def search(self, item: WebSearchItem) -> str | None:
         """Perform a single search for the given search item"""
         input_text = f"Search term: {item.query}\nReason for searching: {item.reason}"
@@ -84,6 +394,7 @@ class ResearchManager:
                 search_agent,
                 input_text,
             )
+            self.record_usage(result)
             return str(result.final_output)
         except Exception as e:
             print(f"DEBUG: Search failed for {item.query}: {e}")
@@ -92,14 +403,45 @@ class ResearchManager:
     async def write_report(self, query: str, search_results: list[str]) -> ReportData:
         """Write the comprehensive report based on search results"""
         print("📝 Thinking about report...")
-        input_text = f"Original query: {query}\nSummarized search results: {search_results}"
+        research = await compact_for_writer(
+            search_results, record_usage=self.record_usage, limit=self.summarizer_limit
+        )
+        input_text = f"Original query: {query}\n\n{research.to_prompt()}"
         result = await Runner.run(
             writer_agent,
             input_text,
         )
 
+        self.record_usage(result)
         print("✅ Finished writing report")
         return result.final_output_as(ReportData)
+
+    async def stream_report(self, query: str, search_results: list[str]):
+        """Stream the report, yielding report_delta events with the markdown so far, then the ReportData"""
+        print("📝 Thinking about report...")
+        research = await compact_for_writer(
+            search_results, record_usage=self.record_usage, limit=self.summarizer_limit
+        )
+        yield ResearchEvent("status", self.format_compaction(research))
+        input_text = f"Original query: {query}\n\n{research.to_prompt()}"
+        result = Runner.run_streamed(
+            writer_agent,
+            input_text,
+        )
+        # The writer returns ReportData as JSON, so render the markdown_report field as it fills in
+        streamed = ""
+        rendered = ""
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                streamed += event.data.delta
+                markdown = partial_json_string(streamed, "markdown_report")
+                if markdown and markdown != rendered:
+                    rendered = markdown
+                    yield ResearchEvent("report_delta", markdown)
+
+        self.record_usage(result)
+        print("✅ Finished writing report")
+        yield result.final_output_as(ReportData)
     
     async def send_email(self, report: ReportData) -> None:
         """Send the report via email"""
@@ -0,0 +1,111 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+OUTPUT_DIR = Path(__file__).parent / "output"
+CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", str(OUTPUT_DIR / "search_cache.db"))
+# Web results go stale, so cached summaries expire after a day by default
+CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Planned searches whose token sets overlap at least this much are treated as duplicates
+DUPLICATE_THRESHOLD = float(os.getenv("SEARCH_DUPLICATE_THRESHOLD", "0.8"))
+COST_PER_SEARCH = 0.025
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "for", "to", "with", "about",
+    "what", "is", "are", "how", "vs", "versus", "by", "at", "from", "its",
+}
+
+
+def query_tokens(query: str) -> set[str]:
+    """Lowercase word tokens of a query, without punctuation or stopwords"""
+    tokens = set(re.findall(r"[a-z0-9]+", query.lower()))
+    return (tokens - STOPWORDS) or tokens
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: its sorted token set, so case, punctuation and word order don't matter"""
+    return " ".join(sorted(query_tokens(query)))
+
+
+def token_set_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of two queries' token sets, from 0.0 to 1.0"""
+    tokens_a, tokens_b = query_tokens(a), query_tokens(b)
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def find_duplicates(queries: list[str], threshold: float = DUPLICATE_THRESHOLD) -> dict[int, int]:
+    """Map the index of each near-duplicate query to the index of the earlier query it repeats"""
+    duplicates = {}
+    kept = []
+    for index, query in enumerate(queries):
+        original = next((k for k in kept if token_set_similarity(queries[k], query) >= threshold), None)
+        if original is None:
+            kept.append(index)
+        else:
+            duplicates[index] = original
+    return duplicates
+
+
+class SearchCache:
+    """
+    Search summaries cached in SQLite under deep_research/output, keyed on the
+    normalized query, so repeated research topics skip paid web searches.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS searches (key TEXT PRIMARY KEY, query TEXT, result TEXT, created_at REAL)"
+            )
+
+    def get(self, query: str) -> str | None:
+        """Return the cached summary for a query, or None if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM searches WHERE key = ? AND created_at > ?",
+                (normalize_query(query), time.time() - self.ttl_seconds),
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, result: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (key, query, result, created_at) VALUES (?, ?, ?, ?)",
+                (normalize_query(query), query, result, time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM searches WHERE created_at <= ?", (time.time() - self.ttl_seconds,)
+            )
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
@@ -0,0 +1,16 @@
+from agents import Agent
+
+INSTRUCTIONS = (
+    "You are a research editor. You are given a numbered list of findings from web searches, "
+    "each ending with citation markers like [1] or [2][5] that refer to a numbered source list. "
+    "Merge them into a shorter list of findings that keeps every distinct fact, figure and date, "
+    "removes repetition and fluff, and stays within the requested length. "
+    "IMPORTANT: Keep the citation markers exactly as given, attached to the facts they support. "
+    "Never invent, renumber or drop citation numbers. Output one finding per line, starting with '- '."
+)
+
+summarizer_agent = Agent(
+    name="SummarizerAgent",
+    instructions=INSTRUCTIONS,
+    model="gpt-4o-mini",
+)
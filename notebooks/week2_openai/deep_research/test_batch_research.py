@@ -0,0 +1,103 @@
+"""
+Unit tests for the batch research job queue
+
+Run from deep_research with `python -m pytest test_batch_research.py`
+"""
+import time
+import sqlite3
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("agents")
+
+import batch_research
+from batch_research import JobStore, parse_rate_limits
+
+
+@pytest.fixture
+def jobs_path(tmp_path):
+    return str(tmp_path / "research_jobs.db")
+
+
+@pytest.fixture
+def store(jobs_path):
+    return JobStore(jobs_path)
+
+
+def _status(store: JobStore, job_id: str) -> tuple[str, int]:
+    return store._conn.execute("SELECT status, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def test_enqueue_ignores_repeated_ids(store):
+    assert store.enqueue("AI chips 2025", "chips")
+    assert not store.enqueue("Something else", "chips")
+    assert store.enqueue("  AI chips 2025  ")
+    assert not store.enqueue("AI chips 2025")
+    assert store.counts() == {"pending": 2}
+
+
+def test_claim_takes_the_oldest_pending_job_once(store, jobs_path):
+    store.enqueue("first", "a")
+    store.enqueue("second", "b")
+    other_process = JobStore(jobs_path)
+
+    assert store.claim() == ("a", "first")
+    assert other_process.claim() == ("b", "second")
+    assert store.claim() is None
+    assert _status(store, "a") == ("running", 1)
+
+
+def test_failed_jobs_are_retried_until_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(batch_research, "MAX_ATTEMPTS", 2)
+    store.enqueue("flaky", "f")
+    for attempt in (1, 2):
+        assert store.claim() == ("f", "flaky")
+        store.fail("f", f"error {attempt}")
+    assert _status(store, "f") == ("failed", 2)
+    assert store.claim() is None
+
+
+def test_finish_records_the_report(store):
+    store.enqueue("done soon", "d")
+    store.claim()
+    store.finish("d", "output/batch/d.md", {"cost_usd": 0.1})
+    assert store.counts() == {"done": 1}
+
+
+def test_only_jobs_with_an_expired_lease_are_requeued(store, jobs_path, monkeypatch):
+    store.enqueue("abandoned", "old")
+    store.enqueue("in progress", "live")
+    store.claim()
+    store.claim()
+
+    # Much later, only the live job's worker has renewed its lease
+    later = time.time() + batch_research.LEASE_SECONDS + 1
+    monkeypatch.setattr(batch_research.time, "time", lambda: later)
+    store.heartbeat("live")
+
+    assert JobStore(jobs_path).requeue_interrupted() == 1
+    assert _status(store, "old") == ("pending", 1)
+    assert _status(store, "live") == ("running", 1)
+    # A running batch picks the abandoned job up on its next claim
+    assert store.claim() == ("old", "abandoned")
+
+
+def test_older_queues_gain_the_lease_column(jobs_path):
+    conn = sqlite3.connect(jobs_path)
+    with conn:
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, query TEXT, status TEXT DEFAULT 'pending', "
+            "attempts INTEGER DEFAULT 0, created_at REAL, finished_at REAL, error TEXT, "
+            "report_path TEXT, metrics TEXT)"
+        )
+        conn.execute("INSERT INTO jobs (id, query, status, created_at) VALUES ('x', 'legacy', 'running', 0)")
+    conn.close()
+
+    store = JobStore(jobs_path)
+    # Claimed before leases existed, so it counts as abandoned
+    assert store.requeue_interrupted() == 1
+    assert store.claim() == ("x", "legacy")
+
+
+def test_default_rate_limits_cover_every_agent():
+    assert set(parse_rate_limits()) == {"planner", "search", "summarizer", "writer"}
@@ -0,0 +1,103 @@
+"""
+Unit tests for compacting search results before the writer
+
+Run from deep_research with `python -m pytest test_compaction.py`
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("agents")
+
+import compaction
+from compaction import normalize_url, compact, compact_for_writer, _batches
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Count one token per word, so budgets don't depend on whether tiktoken is installed"""
+    monkeypatch.setattr(compaction, "count_tokens", lambda text: len(text.split()))
+
+
+@pytest.mark.parametrize("url, normalized", [
+    ("http://www.Example.com/page/", "https://example.com/page"),
+    ("https://example.com/page?utm_source=x&UTM_Medium=y&id=7", "https://example.com/page?id=7"),
+    ("https://example.com/page?ref=home&fbclid=a&gclid=b#section", "https://example.com/page"),
+    # Parameters that only start like a tracking name are real content
+    ("https://example.com/page?reference=12&ref_id=3", "https://example.com/page?reference=12&ref_id=3"),
+])
+def test_normalize_url(url, normalized):
+    assert normalize_url(url) == normalized
+
+
+def test_compact_numbers_sources_once_and_drops_repeated_facts():
+    results = [
+        "Battery pack prices fell fourteen percent in 2023 across markets. "
+        "See [BNEF](https://www.bnef.com/report?utm_source=news).\n\n"
+        "Sources: [BNEF](https://www.bnef.com/report?utm_source=news)",
+        "Across markets, battery pack prices fell fourteen percent in 2023. "
+        "Demand grew fastest in China. [BNEF](https://bnef.com/report/) [IEA](https://iea.org/ev)",
+    ]
+    research = compact(results)
+    assert research.sources == [("BNEF", "https://www.bnef.com/report?utm_source=news"), ("IEA", "https://iea.org/ev")]
+    assert research.findings == [
+        "Battery pack prices fell fourteen percent in 2023 across markets. See BNEF. [1]",
+        "Demand grew fastest in China. BNEF IEA [1][2]",
+    ]
+    assert "[1] BNEF: https://www.bnef.com/report?utm_source=news" in research.to_prompt()
+
+
+def test_batches_split_on_the_token_budget(word_tokens):
+    findings = ["one two", "three four", "five six seven eight nine", "ten"]
+    assert _batches(findings, 4) == [["one two", "three four"], ["five six seven eight nine"], ["ten"]]
+    assert _batches([], 4) == []
+
+
+def test_compact_for_writer_skips_the_summarizer_under_budget(word_tokens, monkeypatch):
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("summarizer called under budget")
+
+    monkeypatch.setattr(compaction.Runner, "run", unexpected)
+    research = asyncio.run(compact_for_writer(["A short finding. [Site](https://site.com)"], budget=100))
+    assert research.reduce_rounds == 0
+
+
+def test_compact_for_writer_condenses_until_it_fits(word_tokens, monkeypatch):
+    calls = []
+
+    async def run(agent, input_text):
+        calls.append(input_text)
+        return SimpleNamespace(final_output="- Condensed fact [1]")
+
+    monkeypatch.setattr(compaction.Runner, "run", run)
+    results = [f"Distinct finding number {i} about topic {i * 7} here. [Site](https://site.com)" for i in range(20)]
+    usage = []
+    research = asyncio.run(compact_for_writer(results, budget=60, record_usage=usage.append))
+
+    assert research.reduce_rounds >= 1
+    assert research.tokens <= 60
+    assert len(usage) == len(calls)
+    assert all(finding == "Condensed fact [1]" for finding in research.findings)
+
+
+def test_compact_for_writer_holds_the_limit_around_each_summarizer_run(word_tokens, monkeypatch):
+    slots = []
+    calls = []
+
+    class Slot:
+        async def __aenter__(self):
+            slots.append("held")
+
+        async def __aexit__(self, *exc):
+            slots[-1] = "released"
+
+    async def run(agent, input_text):
+        calls.append(slots.count("held"))
+        return SimpleNamespace(final_output="- Condensed fact [1]")
+
+    monkeypatch.setattr(compaction.Runner, "run", run)
+    results = [f"Distinct finding number {i} about topic {i * 7} here. [Site](https://site.com)" for i in range(20)]
+    asyncio.run(compact_for_writer(results, budget=60, limit=Slot))
+
+    assert calls and all(held >= 1 for held in calls)
+    assert slots == ["released"] * len(calls)
@@ -0,0 +1,69 @@
+"""
+Unit tests for query normalization, duplicate detection and the search cache
+
+Run from deep_research with `python -m pytest test_search_cache.py`
+"""
+import time
+import pytest
+
+import search_cache
+from search_cache import SearchCache, normalize_query, token_set_similarity, find_duplicates
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(path=str(tmp_path / "search_cache.db"), ttl_seconds=60)
+
+
+def test_normalize_query_ignores_case_punctuation_order_and_stopwords():
+    assert normalize_query("What is the GDP of France?") == "france gdp"
+    assert normalize_query("france, gdp") == "france gdp"
+    # A query made only of stopwords keeps them rather than becoming empty
+    assert normalize_query("What is it about?") != ""
+
+
+@pytest.mark.parametrize("a, b, similarity", [
+    ("EV battery prices 2024", "2024 battery prices for EVs", 0.6),
+    ("EV battery prices 2024", "battery prices 2024 EV", 1.0),
+    ("solar subsidies", "wind farms", 0.0),
+    ("", "wind farms", 0.0),
+])
+def test_token_set_similarity(a, b, similarity):
+    assert token_set_similarity(a, b) == pytest.approx(similarity)
+
+
+def test_find_duplicates_maps_repeats_to_the_first_query():
+    queries = [
+        "EV battery prices 2024",
+        "solar panel efficiency",
+        "battery prices for EV in 2024",
+        "2024 EV battery prices",
+    ]
+    assert find_duplicates(queries) == {2: 0, 3: 0}
+    assert find_duplicates(queries, threshold=1.01) == {}
+
+
+def test_cache_hits_on_equivalent_queries(cache):
+    assert cache.get("GDP of France") is None
+    cache.put("GDP of France", "summary")
+    assert cache.get("france gdp?") == "summary"
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "search_cache.db")
+    SearchCache(path=path).put("GDP of France", "summary")
+    assert SearchCache(path=path).get("GDP of France") == "summary"
+
+
+def test_expired_entries_miss_and_are_purged(cache, monkeypatch):
+    cache.put("old news", "stale")
+    cache.put("fresh news", "recent")
+    later = time.time() + 61
+    monkeypatch.setattr(search_cache.time, "time", lambda: later)
+    cache.put("fresh news", "recent")
+
+    assert cache.get("old news") is None
+    assert cache.get("fresh news") == "recent"
+    assert cache.purge_expired() == 1
+    assert cache.stats()["entries"] == 1
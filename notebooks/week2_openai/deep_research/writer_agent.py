@@ -3,15 +3,16 @@ from agents import Agent
 
 INSTRUCTIONS = (
     "You are a senior researcher tasked with writing a cohesive report for a research query. "
-    "You will be provided with the original query, and some initial research done by a research assistant.\n"
+    "You will be provided with the original query, and some initial research done by a research assistant: "
+    "a list of findings that cite a numbered list of sources with markers like [1] or [2][5].\n"
     "You should first come up with an outline for the report that describes the structure and "
     "flow of the report. Then, generate the report and return that as your final output.\n"
     "The final output should be in markdown format, and it should be lengthy and detailed. Aim "
     "for 5-10 pages of content, at least 1000 words.\n"
     "IMPORTANT: Include a 'References' section at the end with all the source URLs from the research. "
-    "Maintain the clickable markdown format for all links. Group sources by topic if relevant. "
-    "Cite sources within the text using superscript numbers like [1], [2], etc. and match them "
-    "to numbered references at the end."
+    "Maintain the clickable markdown format for all links. "
+    "Cite sources within the text using the same numbers as the provided source list, like [1], [2], etc., "
+    "and list those numbered sources as the references at the end."
 )
 
 
@@ -2,14 +2,15 @@ from pydantic import BaseModel
 import json
 from dotenv import load_dotenv
 from datetime import datetime
-from market import get_share_price
-from database import write_account, read_account, write_log, _canon
+from market import get_share_prices
+from database import write_account, read_account, write_log, write_portfolio_snapshot, ConcurrentUpdateError, _canon
 
 load_dotenv(override=True)
 
 INITIAL_BALANCE = 10_000.0
 SPREAD = 0.002
-
+# Optimistic retries before an update gives up on a contended account
+MAX_UPDATE_ATTEMPTS = 5
 
 class Transaction(BaseModel):
     symbol: str
@@ -32,6 +33,7 @@ class Account(BaseModel):
     holdings: dict[str, int]
     transactions: list[Transaction]
     portfolio_value_time_series: list[tuple[str, float]]
+    version: int = 0
 
     @classmethod
     def get(cls, name: str):
@@ -46,92 +48,152 @@ class Account(BaseModel):
                 "transactions": [],
                 "portfolio_value_time_series": []
             }
-            write_account(name, fields)
+            fields["version"] = write_account(name, fields)
         return cls(**fields)
     
     
-    def save(self):
-        write_account(self.name.lower(), self.model_dump())
+    def save(self, transaction: Transaction | None = None, snapshot: tuple[str, float] | None = None,
+             clear_history: bool = False):
+        """ Persist balance, strategy and holdings, appending a new transaction or snapshot if given.
+
+        The write only succeeds if the account is still at the version it was loaded at;
+        otherwise ConcurrentUpdateError is raised and nothing is written.
+        """
+        self.version = write_account(
+            self.name.lower(),
+            self.model_dump(exclude={"transactions", "portfolio_value_time_series", "version"}),
+            transaction_dict=transaction.model_dump() if transaction else None,
+            snapshot=snapshot,
+            clear_history=clear_history,
+            expected_version=self.version
+        )
+
+    def refresh(self):
+        """ Reload this account's latest saved state. """
+        latest = Account.get(self.name)
+        for field in Account.model_fields:
+            setattr(self, field, getattr(latest, field))
+
+    def update(self, change, prices: dict[str, float] | None = None, clear_history: bool = False):
+        """ Apply change() to this account and save it as one atomic write.
+
+        change() validates and mutates the account in memory, returning the new
+        Transaction (or None). If anyone else saved the account in the meantime,
+        the account is reloaded and change() runs again on the latest state. When
+        prices are given, the new portfolio value is recorded in the same write.
+
+        The version check in save() is the only guard against concurrent writers,
+        whether they are other threads, other tasks on the event loop, or other
+        MCP server processes; there is no lock.
+        """
+        for attempt in range(1, MAX_UPDATE_ATTEMPTS + 1):
+            transaction = change()
+            snapshot = None
+            if prices is not None:
+                snapshot = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), self.calculate_portfolio_value(prices))
+                self.portfolio_value_time_series.append(snapshot)
+            try:
+                self.save(transaction=transaction, snapshot=snapshot, clear_history=clear_history)
+                return transaction
+            except ConcurrentUpdateError:
+                print(f"Account {self.name} was updated concurrently, retrying ({attempt}/{MAX_UPDATE_ATTEMPTS})")
+                self.refresh()
+        raise ConcurrentUpdateError(f"Could not update account {self.name} after {MAX_UPDATE_ATTEMPTS} attempts")
 
     def reset(self, strategy: str):
-        self.balance = INITIAL_BALANCE
-        self.strategy = strategy
-        self.holdings = {}
-        self.transactions = []
-        self.portfolio_value_time_series = []
-        self.save()
+        def change():
+            self.balance = INITIAL_BALANCE
+            self.strategy = strategy
+            self.holdings = {}
+            self.transactions = []
+            self.portfolio_value_time_series = []
+        self.update(change, clear_history=True)
 
     def deposit(self, amount: float):
         """ Deposit funds into the account. """
         if amount <= 0:
             raise ValueError("Deposit amount must be positive.")
-        self.balance += amount
+        def change():
+            self.balance += amount
+        self.update(change)
         print(f"Deposited ${amount}. New balance: ${self.balance}")
-        self.save()
 
     def withdraw(self, amount: float):
         """ Withdraw funds from the account, ensuring it doesn't go negative. """
-        if amount > self.balance:
-            raise ValueError("Insufficient funds for withdrawal.")
-        self.balance -= amount
+        def change():
+            if amount > self.balance:
+                raise ValueError("Insufficient funds for withdrawal.")
+            self.balance -= amount
+        self.update(change)
         print(f"Withdrew ${amount}. New balance: ${self.balance}")
-        self.save()
 
     def buy_shares(self, symbol: str, quantity: int, rationale: str) -> str:
         """ Buy shares of a stock if sufficient funds are available. """
-        price = get_share_price(symbol)
+        # Price everything up front, so the atomic write never waits on the network
+        prices = get_share_prices([symbol, *self.holdings])
+        price = prices[symbol]
         buy_price = price * (1 + SPREAD)
         total_cost = buy_price * quantity
         
-        if total_cost > self.balance:
-            raise ValueError("Insufficient funds to buy shares.")
-        elif price==0:
-            raise ValueError(f"Unrecognized symbol {symbol}")
-        
-        # Update holdings
-        self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # Record transaction
-        transaction = Transaction(symbol=symbol, quantity=quantity, price=buy_price, timestamp=timestamp, rationale=rationale)
-        self.transactions.append(transaction)
-        
-        # Update balance
-        self.balance -= total_cost
-        self.save()
+        def change():
+            if total_cost > self.balance:
+                raise ValueError("Insufficient funds to buy shares.")
+            elif price==0:
+                raise ValueError(f"Unrecognized symbol {symbol}")
+            
+            # Update holdings
+            self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Record transaction
+            transaction = Transaction(symbol=symbol, quantity=quantity, price=buy_price, timestamp=timestamp, rationale=rationale)
+            self.transactions.append(transaction)
+            
+            # Update balance
+            self.balance -= total_cost
+            return transaction
+        self.update(change, prices)
         write_log(self.name, "account", f"Bought {quantity} of {symbol}")
-        return "Completed. Latest details:\n" + self.report()
+        return "Completed. Latest details:\n" + self.details(self.portfolio_value_time_series[-1][1])
 
     def sell_shares(self, symbol: str, quantity: int, rationale: str) -> str:
         """ Sell shares of a stock if the user has enough shares. """
-        if self.holdings.get(symbol, 0) < quantity:
-            raise ValueError(f"Cannot sell {quantity} shares of {symbol}. Not enough shares held.")
-        
-        price = get_share_price(symbol)
+        # Price everything up front, so the atomic write never waits on the network
+        prices = get_share_prices([symbol, *self.holdings])
+        price = prices[symbol]
         sell_price = price * (1 - SPREAD)
         total_proceeds = sell_price * quantity
         
-        # Update holdings
-        self.holdings[symbol] -= quantity
-        
-        # If shares are completely sold, remove from holdings
-        if self.holdings[symbol] == 0:
-            del self.holdings[symbol]
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # Record transaction
-        transaction = Transaction(symbol=symbol, quantity=-quantity, price=sell_price, timestamp=timestamp, rationale=rationale)  # negative quantity for sell
-        self.transactions.append(transaction)
-
-        # Update balance
-        self.balance += total_proceeds
-        self.save()
+        def change():
+            if self.holdings.get(symbol, 0) < quantity:
+                raise ValueError(f"Cannot sell {quantity} shares of {symbol}. Not enough shares held.")
+            
+            # Update holdings
+            self.holdings[symbol] -= quantity
+            
+            # If shares are completely sold, remove from holdings
+            if self.holdings[symbol] == 0:
+                del self.holdings[symbol]
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Record transaction
+            transaction = Transaction(symbol=symbol, quantity=-quantity, price=sell_price, timestamp=timestamp, rationale=rationale)  # negative quantity for sell
+            self.transactions.append(transaction)
+
+            # Update balance
+            self.balance += total_proceeds
+            return transaction
+        self.update(change, prices)
         write_log(self.name, "account", f"Sold {quantity} of {symbol}")
-        return "Completed. Latest details:\n" + self.report()
+        return "Completed. Latest details:\n" + self.details(self.portfolio_value_time_series[-1][1])
 
-    def calculate_portfolio_value(self):
-        """ Calculate the total value of the user's portfolio. """
+    def calculate_portfolio_value(self, prices: dict[str, float] | None = None):
+        """ Calculate the total value of the user's portfolio, using prices when given. """
+        prices = dict(prices or {})
+        missing = [symbol for symbol in self.holdings if symbol not in prices]
+        if missing:
+            prices.update(get_share_prices(missing))
         total_value = self.balance
         for symbol, quantity in self.holdings.items():
-            total_value += get_share_price(symbol) * quantity
+            total_value += prices[symbol] * quantity
         return total_value
 
     def calculate_profit_loss(self, portfolio_value: float):
@@ -154,10 +216,16 @@ class Account(BaseModel):
     def report(self) -> str:
         """ Return a json string representing the account.  """
         portfolio_value = self.calculate_portfolio_value()
-        self.portfolio_value_time_series.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value))
-        self.save()
+        snapshot = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value)
+        self.portfolio_value_time_series.append(snapshot)
+        # Append-only, so a concurrent trade on this account is never overwritten
+        write_portfolio_snapshot(self.name, *snapshot)
+        return self.details(portfolio_value)
+
+    def details(self, portfolio_value: float) -> str:
+        """ Return a json string representing the account at the given portfolio value, without saving anything. """
         pnl = self.calculate_profit_loss(portfolio_value)
-        data = self.model_dump()
+        data = self.model_dump(exclude={"version"})
         data["total_portfolio_value"] = portfolio_value
         data["total_profit_loss"] = pnl
         write_log(self.name, "account", f"Retrieved account details")
@@ -170,8 +238,9 @@ class Account(BaseModel):
     
     def change_strategy(self, strategy: str) -> str:
         """ At your discretion, if you choose to, call this to change your investment strategy for the future """
-        self.strategy = strategy
-        self.save()
+        def change():
+            self.strategy = strategy
+        self.update(change)
         write_log(self.name, "account", f"Changed strategy")
         return "Changed strategy"
 
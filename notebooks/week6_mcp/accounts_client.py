@@ -1,3 +1,7 @@
+import os
+import asyncio
+import anyio
+from datetime import timedelta
 import mcp
 from mcp.client.stdio import stdio_client
 from mcp import StdioServerParameters
@@ -8,34 +12,149 @@ import json
 # params = StdioServerParameters(command="uv", args=["run", "accounts_server.py"], env=None)
 params = StdioServerParameters(command="python", args=["accounts_server.py"], env=None)
 
+# Warm accounts_server.py processes kept by the session pool
+POOL_SIZE = int(os.getenv("ACCOUNTS_POOL_SIZE", "2"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("ACCOUNTS_REQUEST_TIMEOUT", "60"))
+
+
+# Errors meaning the server's stdio transport broke, not that the request itself failed
+TRANSPORT_ERRORS = (ConnectionError, EOFError, anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)
+
+
+class PooledServer:
+    """
+    One accounts_server.py subprocess with an initialized MCP session.
+
+    The stdio and session context managers must be entered and exited in the
+    same task, so a background task owns them for the server's lifetime.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.in_flight = 0
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = None
+        self._error = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self._error:
+            raise self._error
+
+    async def _run(self):
+        try:
+            async with stdio_client(params) as streams:
+                async with mcp.ClientSession(
+                    *streams, read_timeout_seconds=timedelta(seconds=REQUEST_TIMEOUT_SECONDS)
+                ) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self._error = e
+            print(f"Accounts server stopped: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def settle(self, timeout: float = 0.5) -> bool:
+        """Give a failing server's task a moment to finish, then report whether it is still alive"""
+        if self._task is not None and not self._task.done():
+            await asyncio.wait({self._task}, timeout=timeout)
+        return self.alive
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class AccountsSessionPool:
+    """
+    Long-lived pool of warm accounts_server.py sessions.
+
+    Requests go to the least busy server; MCP sessions multiplex concurrent
+    requests by id, so many calls can share one process. Crashed servers are
+    replaced on the next request, and list_tools results are cached.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self._servers: list[PooledServer] = []
+        self._loop = None
+        self._lock = None
+        self._tools = None
+
+    async def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions belong to the loop that created them (e.g. one per asyncio.run)
+            self._servers, self._loop, self._lock, self._tools = [], loop, asyncio.Lock(), None
+        async with self._lock:
+            self._servers = [server for server in self._servers if server.alive]
+            while len(self._servers) < self.size:
+                server = PooledServer()
+                await server.start()
+                self._servers.append(server)
+
+    async def request(self, operation, retry_on_crash: bool = True):
+        """
+        Run operation(session) on the least busy server.
+
+        If the server crashed during the call, the request is retried once on a
+        fresh server when retry_on_crash is set (only for idempotent calls).
+        """
+        for attempt in range(2):
+            await self._ensure_started()
+            server = min(self._servers, key=lambda s: s.in_flight)
+            server.in_flight += 1
+            try:
+                return await operation(server.session)
+            except Exception as e:
+                # Tool and validation errors from a healthy server are raised
+                # straight away; only a broken transport is worth settling on
+                crashed = not server.alive or isinstance(e, TRANSPORT_ERRORS)
+                if attempt or not retry_on_crash or not crashed or await server.settle():
+                    raise
+                print("Accounts server crashed, retrying on a fresh server")
+            finally:
+                server.in_flight -= 1
+
+    async def list_tools(self):
+        if self._tools is None or self._loop is not asyncio.get_running_loop():
+            result = await self.request(lambda session: session.list_tools())
+            self._tools = result.tools
+        return self._tools
+
+    async def close(self):
+        servers, self._servers = self._servers, []
+        await asyncio.gather(*[server.stop() for server in servers])
+
+
+pool = AccountsSessionPool()
+
 
 async def list_accounts_tools():
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            tools_result = await session.list_tools()
-            return tools_result.tools
-        
+    return await pool.list_tools()
+
 async def call_accounts_tool(tool_name, tool_args):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.call_tool(tool_name, tool_args)
-            return result
-            
+    # Tools like buy_shares are not idempotent, so a crash is not retried
+    return await pool.request(lambda session: session.call_tool(tool_name, tool_args), retry_on_crash=False)
+
 async def read_accounts_resource(name):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://accounts_server/{name}")
-            return result.contents[0].text
-        
+    result = await pool.request(lambda session: session.read_resource(f"accounts://accounts_server/{name}"))
+    return result.contents[0].text
+
 async def read_strategy_resource(name):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://strategy/{name}")
-            return result.contents[0].text
+    result = await pool.request(lambda session: session.read_resource(f"accounts://strategy/{name}"))
+    return result.contents[0].text
 
 async def get_accounts_tools_openai():
     openai_tools = []
@@ -46,7 +165,7 @@ async def get_accounts_tools_openai():
             description=tool.description,
             params_json_schema=schema,
             on_invoke_tool=lambda ctx, args, toolname=tool.name: call_accounts_tool(toolname, json.loads(args))
-                
+
         )
         openai_tools.append(openai_tool)
-    return openai_tools
\ No newline at end of file
+    return openai_tools
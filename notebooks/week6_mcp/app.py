@@ -3,8 +3,7 @@ from util import css, js, Color
 import pandas as pd
 from trading_floor import names, lastnames, short_model_names
 import plotly.express as px
-from accounts import Account
-from database import read_log
+from dashboard_data import dashboard_data
 
 mapper = {
     "trace": Color.WHITE,
@@ -22,10 +21,20 @@ class Trader:
         self.dbname = name.lower()        # <- clave canónica para BD
         self.lastname = lastname
         self.model_name = model_name
-        self.account = Account.get(name)
+        # Shared with every open tab; rendered outputs are cached per data revision
+        self.feed = dashboard_data.feed(self.dbname)
+        self._rendered = {}
 
-    def reload(self):
-        self.account = Account.get(self.dbname)
+    @property
+    def account(self):
+        return self.feed.view().account
+
+    def _cached(self, key: str, revision: int, build):
+        cached = self._rendered.get(key)
+        if cached is None or cached[0] != revision:
+            cached = (revision, build())
+            self._rendered[key] = cached
+        return cached[1]
 
     def get_title(self) -> str:
         return f"<div style='text-align: center;font-size:34px;'>{self.name}<span style='color:#ccc;font-size:24px;'> ({self.model_name}) - {self.lastname}</span></div>"
@@ -34,11 +43,15 @@ class Trader:
         return self.account.get_strategy()
 
     def get_portfolio_value_df(self) -> pd.DataFrame:
-        df = pd.DataFrame(self.account.portfolio_value_time_series, columns=["datetime", "value"])
+        # Downsampled, so long-running traders still chart quickly
+        df = pd.DataFrame(self.feed.view().chart_points, columns=["datetime", "value"])
         df["datetime"] = pd.to_datetime(df["datetime"])
         return df
 
     def get_portfolio_value_chart(self):
+        return self._cached("chart", self.feed.view().revision, self._build_portfolio_value_chart)
+
+    def _build_portfolio_value_chart(self):
         df = self.get_portfolio_value_df()
         fig = px.line(df, x="datetime", y="value")
         margin = dict(l=40, r=20, t=20, b=40)
@@ -56,6 +69,9 @@ class Trader:
 
     def get_holdings_df(self) -> pd.DataFrame:
         """Convert holdings to DataFrame for display"""
+        return self._cached("holdings", self.feed.view().revision, self._build_holdings_df)
+
+    def _build_holdings_df(self) -> pd.DataFrame:
         holdings = self.account.get_holdings()
         if not holdings:
             return pd.DataFrame(columns=["Symbol", "Quantity"])
@@ -67,6 +83,9 @@ class Trader:
 
     def get_transactions_df(self) -> pd.DataFrame:
         """Convert transactions to DataFrame for display"""
+        return self._cached("transactions", self.feed.view().revision, self._build_transactions_df)
+
+    def _build_transactions_df(self) -> pd.DataFrame:
         transactions = self.account.list_transactions()
         if not transactions:
             return pd.DataFrame(columns=["Timestamp", "Symbol", "Quantity", "Price", "Rationale"])
@@ -74,24 +93,27 @@ class Trader:
         return pd.DataFrame(transactions)
 
     def get_portfolio_value(self) -> str:
-        """Calculate total portfolio value based on current prices"""
-        portfolio_value = self.account.calculate_portfolio_value() or 0.0
-        pnl = self.account.calculate_profit_loss(portfolio_value) or 0.0
+        """Show total portfolio value, re-priced by the feed when the account changes"""
+        view = self.feed.view()
+        portfolio_value, pnl = view.portfolio_value, view.profit_loss
         color = "green" if pnl >= 0 else "red"
         emoji = "⬆" if pnl >= 0 else "⬇"
         return f"<div style='text-align: center;background-color:{color};'><span style='font-size:32px'>${portfolio_value:,.0f}</span><span style='font-size:24px'>&nbsp;&nbsp;&nbsp;{emoji}&nbsp;${pnl:,.0f}</span></div>"
 
     def get_logs(self, previous=None) -> str:
-        logs = read_log(self.dbname, last_n=13)  
+        revision, logs = self.feed.logs()
+        response = self._cached("logs", revision, lambda: self._render_logs(logs))
+        if response != previous:
+            return response
+        return gr.update()
+
+    def _render_logs(self, logs) -> str:
         response = ""
         for log in logs:
             timestamp, type, message = log
             color = mapper.get(type, Color.WHITE).value
             response += f"<span style='color:{color}'>{timestamp} : [{type}] {message}</span><br/>"
-        response = f"<div style='height:250px; overflow-y:auto;'>{response}</div>"
-        if response != previous:
-            return response
-        return gr.update()
+        return f"<div style='height:250px; overflow-y:auto;'>{response}</div>"
 
 
 class TraderView:
@@ -134,6 +156,7 @@ class TraderView:
                     elem_classes=["dataframe-fix"],
                 )
 
+        # Cheap: answered from the shared feed, which only reloads changed accounts
         timer = gr.Timer(value=120)
         timer.tick(
             fn=self.refresh,
@@ -157,7 +180,6 @@ class TraderView:
         )
 
     def refresh(self):
-        self.trader.reload()
         return (
             self.trader.get_portfolio_value(),
             self.trader.get_portfolio_value_chart(),
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark for database.py write throughput.
+
+Compares the previous access pattern (a new connection per call, rollback
+journal, fsync on every commit) with the pooled WAL connection layer, and
+with write_log queueing rows on the batched background log writer.
+Runs against a temporary database, so accounts.db is never touched.
+
+Usage: python benchmark_database.py [writes] [threads]
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import threading
+
+_tmpdir = tempfile.mkdtemp(prefix="db_bench_")
+os.environ["ACCOUNTS_DB_PATH"] = os.path.join(_tmpdir, "pooled.db")
+
+import database
+
+LEGACY_DB = os.path.join(_tmpdir, "legacy.db")
+
+def legacy_write_log(name: str, type: str, message: str):
+    """write_log as it was before the connection layer"""
+    with sqlite3.connect(LEGACY_DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO logs (name, datetime, type, message)
+            VALUES (?, datetime('now'), ?, ?)
+        ''', (name.lower(), type, message))
+        conn.commit()
+
+def setup_legacy():
+    with sqlite3.connect(LEGACY_DB) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                datetime DATETIME,
+                type TEXT,
+                message TEXT
+            )
+        ''')
+
+def pooled_write_log(name: str, type: str, message: str):
+    """One transaction per row on the pooled connection"""
+    database.insert_logs([(name, time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()), type, message)])
+
+def run(write, writes: int, threads: int, finish=None) -> float:
+    """Run `writes` log writes split over `threads` threads and return writes/sec"""
+    per_thread = writes // threads
+
+    def worker(index: int):
+        for i in range(per_thread):
+            write(f"trader{index}", "trace", f"span {i}")
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    if finish:
+        finish()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+if __name__ == "__main__":
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    setup_legacy()
+    before = run(legacy_write_log, writes, threads)
+    pooled = run(pooled_write_log, writes, threads)
+    # Apply backpressure instead of dropping, so every row is written
+    database.log_writer.block_timeout = 5.0
+    batched = run(database.write_log, writes, threads, finish=database.log_writer.flush)
+
+    print(f"Writes: {writes} across {threads} threads (db in {_tmpdir})")
+    print(f"Before (connect per call):  {before:10.0f} writes/sec")
+    print(f"Pooled WAL, row per commit: {pooled:10.0f} writes/sec")
+    print(f"Batched log writer:         {batched:10.0f} writes/sec")
+    print(f"Speedup: {batched / before:.1f}x")
+    print(f"Log writer stats: {database.log_writer.stats()}")
@@ -0,0 +1,10 @@
+"""
+Shared pytest setup for the week6_mcp tests.
+
+Points database.py at a throwaway file before any test imports it, so tests
+never touch accounts.db.
+"""
+import os
+import tempfile
+
+os.environ["ACCOUNTS_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "test_accounts.db")
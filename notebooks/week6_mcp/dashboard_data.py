@@ -0,0 +1,172 @@
+import os
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from accounts import Account
+from database import read_log_after, read_account_change, _canon
+
+# How often the shared feed may hit the database, however many tabs are polling
+LOG_POLL_SECONDS = float(os.getenv("DASHBOARD_LOG_POLL_SECONDS", "0.5"))
+ACCOUNT_POLL_SECONDS = float(os.getenv("DASHBOARD_ACCOUNT_POLL_SECONDS", "5"))
+# Holdings are re-priced this often even when the account has not changed
+REPRICE_SECONDS = float(os.getenv("DASHBOARD_REPRICE_SECONDS", "120"))
+LOG_LINES = 13
+CHART_MAX_POINTS = int(os.getenv("DASHBOARD_CHART_MAX_POINTS", "300"))
+
+
+def downsample(points: list, max_points: int = CHART_MAX_POINTS) -> list:
+    """
+    Reduce a (timestamp, value) series to at most max_points for charting.
+
+    The series is split into equal buckets and each bucket keeps its lowest
+    and highest value in time order, so peaks and drawdowns survive. The
+    first and last points are always kept.
+
+    Args:
+        points: (timestamp, value) pairs in time order
+        max_points: Maximum number of points to return
+
+    Returns:
+        list: The sampled points, in time order
+    """
+    if len(points) <= max_points or max_points < 4:
+        return list(points)
+    middle = points[1:-1]
+    buckets = (max_points - 2) // 2
+    size = len(middle) / buckets
+    sampled = [points[0]]
+    for bucket_index in range(buckets):
+        bucket = middle[int(bucket_index * size):int((bucket_index + 1) * size)]
+        if not bucket:
+            continue
+        low = min(range(len(bucket)), key=lambda i: bucket[i][1])
+        high = max(range(len(bucket)), key=lambda i: bucket[i][1])
+        sampled.extend(bucket[i] for i in sorted({low, high}))
+    sampled.append(points[-1])
+    return sampled
+
+
+@dataclass
+class AccountView:
+    """Everything a trader panel shows about an account, computed once for all tabs"""
+    revision: int
+    account: Account
+    portfolio_value: float
+    profit_loss: float
+    chart_points: list
+    priced_at: float
+
+
+class TraderFeed:
+    """
+    Cached, incrementally refreshed dashboard data for one trader.
+
+    Logs are tailed by the last seen row id, so each poll only reads new rows.
+    The account view is rebuilt only when the account's change marker (its
+    version and latest portfolio snapshot) moves, or when holdings are due
+    for re-pricing. Polls within the poll interval are answered from memory,
+    so every open tab shares the same few queries.
+    """
+
+    def __init__(self, name: str):
+        self.name = _canon(name)
+        self.log_revision = 0
+        self.queries = 0
+        self.account_loads = 0
+        self._logs = deque(maxlen=LOG_LINES)
+        self._last_log_id = 0
+        self._logs_checked = 0.0
+        self._log_lock = threading.Lock()
+        self._view = None
+        self._change = None
+        self._change_checked = 0.0
+        self._view_lock = threading.Lock()
+        self._builds = 0
+        self._built = 0
+
+    def logs(self) -> tuple[int, list]:
+        """
+        Return the recent log entries, reading only rows added since the last poll.
+
+        Returns:
+            tuple: (revision, [(datetime, type, message), ...]); the revision
+            changes only when new rows arrive
+        """
+        with self._log_lock:
+            now = time.monotonic()
+            if now - self._logs_checked >= LOG_POLL_SECONDS:
+                self._logs_checked = now
+                self.queries += 1
+                rows = read_log_after(self.name, self._last_log_id, LOG_LINES)
+                if rows:
+                    self._logs.extend(row[1:] for row in rows)
+                    self._last_log_id = rows[-1][0]
+                    self.log_revision += 1
+            return self.log_revision, list(self._logs)
+
+    def view(self) -> AccountView:
+        """Return the cached account view, rebuilding it only if the account changed or prices are due"""
+        with self._view_lock:
+            now = time.monotonic()
+            if self._view is not None and now - self._change_checked < ACCOUNT_POLL_SECONDS:
+                return self._view
+            self._change_checked = now
+            self.queries += 1
+            change = read_account_change(self.name)
+            if self._view is None or change != self._change:
+                self._change = change
+                account = Account.get(self.name)
+                self.account_loads += 1
+            elif time.time() - self._view.priced_at >= REPRICE_SECONDS:
+                account = self._view.account
+            else:
+                return self._view
+            self._builds += 1
+            build = self._builds
+
+        # Pricing looks up share prices, so other tabs keep the current view meanwhile
+        view = self._build(account)
+
+        with self._view_lock:
+            # A build started later may have finished first; never replace it with older data
+            if build > self._built:
+                self._built = build
+                view.revision = (self._view.revision + 1) if self._view else 1
+                self._view = view
+            return self._view
+
+    def _build(self, account: Account) -> AccountView:
+        portfolio_value = account.calculate_portfolio_value() or 0.0
+        return AccountView(
+            revision=0,
+            account=account,
+            portfolio_value=portfolio_value,
+            profit_loss=account.calculate_profit_loss(portfolio_value) or 0.0,
+            chart_points=downsample(account.portfolio_value_time_series),
+            priced_at=time.time(),
+        )
+
+
+class DashboardData:
+    """One shared feed per trader, used by every dashboard session"""
+
+    def __init__(self):
+        self._feeds: dict[str, TraderFeed] = {}
+        self._lock = threading.Lock()
+
+    def feed(self, name: str) -> TraderFeed:
+        with self._lock:
+            if _canon(name) not in self._feeds:
+                self._feeds[_canon(name)] = TraderFeed(name)
+            return self._feeds[_canon(name)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {"queries": feed.queries, "account_loads": feed.account_loads}
+                for name, feed in self._feeds.items()
+            }
+
+
+dashboard_data = DashboardData()
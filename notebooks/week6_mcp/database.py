@@ -1,20 +1,180 @@
+import os
+import time
+import atexit
 import sqlite3
 import json
-from datetime import datetime
+import threading
+from collections import deque
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
-DB = "accounts.db"
+DB = os.getenv("ACCOUNTS_DB_PATH", "accounts.db")
+
+# Connection tuning. WAL lets the dashboard read while traders write, and
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit.
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+STATEMENT_CACHE_SIZE = 128
+
+# Background log writer: rows are buffered in memory and inserted in batches
+LOG_BUFFER_CAPACITY = int(os.getenv("LOG_BUFFER_CAPACITY", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+# Seconds write() may wait for space in a full buffer before dropping the oldest row
+LOG_BLOCK_TIMEOUT = float(os.getenv("LOG_BLOCK_TIMEOUT", "0"))
+
+# Statements are module constants so each connection's statement cache
+# reuses the compiled (prepared) statement instead of re-parsing the SQL
+UPSERT_ACCOUNT_SQL = '''
+    INSERT INTO accounts (name, account)
+    VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET account=excluded.account, version=accounts.version + 1
+'''
+# Compare-and-swap: only matches if nobody saved the account since it was read
+UPDATE_ACCOUNT_SQL = '''
+    UPDATE accounts SET account = ?, version = version + 1
+    WHERE name = ? AND version = ?
+'''
+SELECT_ACCOUNT_SQL = 'SELECT account, version FROM accounts WHERE name = ?'
+SELECT_VERSION_SQL = 'SELECT version FROM accounts WHERE name = ?'
+INSERT_LOG_SQL = '''
+    INSERT INTO logs (name, datetime, type, message)
+    VALUES (?, ?, ?, ?)
+'''
+SELECT_LOGS_SQL = '''
+    SELECT datetime, type, message FROM logs
+    WHERE name = ?
+    ORDER BY datetime DESC
+    LIMIT ?
+'''
+# Logs newer than a row id, newest first, so dashboards only fetch what they have not seen
+SELECT_LOGS_AFTER_SQL = '''
+    SELECT id, datetime, type, message FROM logs
+    WHERE name = ? AND id > ?
+    ORDER BY id DESC
+    LIMIT ?
+'''
+# Changes whenever a trade or save bumps the version or report() appends a snapshot
+SELECT_ACCOUNT_CHANGE_SQL = '''
+    SELECT version, (SELECT MAX(id) FROM portfolio_snapshots WHERE name = ?)
+    FROM accounts WHERE name = ?
+'''
+UPSERT_MARKET_SQL = '''
+    INSERT INTO market (date, data)
+    VALUES (?, ?)
+    ON CONFLICT(date) DO UPDATE SET data=excluded.data
+'''
+SELECT_MARKET_SQL = 'SELECT data FROM market WHERE date = ?'
+INSERT_TRANSACTION_SQL = '''
+    INSERT INTO transactions (name, symbol, quantity, price, timestamp, rationale)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+SELECT_TRANSACTIONS_SQL = '''
+    SELECT symbol, quantity, price, timestamp, rationale FROM transactions
+    WHERE name = ?
+    ORDER BY id
+'''
+INSERT_SNAPSHOT_SQL = 'INSERT INTO portfolio_snapshots (name, timestamp, value) VALUES (?, ?, ?)'
+SELECT_SNAPSHOTS_SQL = 'SELECT timestamp, value FROM portfolio_snapshots WHERE name = ? ORDER BY id'
+UPSERT_PRICE_SQL = '''
+    INSERT INTO prices (symbol, price, fetched_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(symbol) DO UPDATE SET price=excluded.price, fetched_at=excluded.fetched_at
+'''
+
+# Account fields kept in their own append-only tables rather than the accounts blob
+HISTORY_FIELDS = ("transactions", "portfolio_value_time_series")
+
+_local = threading.local()
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when an account was saved by someone else since it was read"""
 
 def _canon(name: str) -> str:
     return (name or "").strip().lower()
 
+def connect(path: str = None) -> sqlite3.Connection:
+    """
+    Open a new tuned connection (WAL, busy timeout, statement cache).
+
+    Args:
+        path (str): Database file, defaults to DB
+
+    Returns:
+        sqlite3.Connection: The configured connection
+    """
+    conn = sqlite3.connect(
+        path or DB,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={SYNCHRONOUS}')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return this thread's connection, opening it on first use.
+
+    Connections are kept per thread (sqlite3 connections must not be shared
+    across threads) and per process, so forked MCP servers open their own.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+def close_connection() -> None:
+    """Close this thread's connection, if any"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+@contextmanager
+def transaction(mode: str = "IMMEDIATE"):
+    """
+    Run a block of statements as one transaction on this thread's connection.
 
-with sqlite3.connect(DB) as conn:
-    cursor = conn.cursor()
-    cursor.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT)')
-    cursor.execute('''
+    The default BEGIN IMMEDIATE takes the write lock up front, so concurrent
+    writers wait on the busy timeout instead of failing when upgrading a read
+    lock. Readers pass mode="DEFERRED" to see one consistent snapshot across
+    several SELECTs without taking the write lock. Commits on success and
+    rolls back on any exception, including a failed commit. Nested calls join
+    the enclosing transaction, so helpers like write_account can run inside one.
+    """
+    conn = get_connection()
+    if getattr(_local, "depth", 0):
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    conn.execute(f'BEGIN {mode}')
+    _local.depth = 1
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        # Also reached when the commit itself fails (e.g. SQLITE_BUSY), so the
+        # connection is never left inside an open transaction
+        conn.rollback()
+        raise
+    finally:
+        _local.depth = 0
+
+
+with transaction() as conn:
+    conn.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT, version INTEGER NOT NULL DEFAULT 0)')
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT,
@@ -23,85 +183,345 @@ with sqlite3.connect(DB) as conn:
             message TEXT
         )
     ''')
-    cursor.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
-    conn.commit()
-
-def write_account(name, account_dict):
-    json_data = json.dumps(account_dict)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO accounts (name, account)
-            VALUES (?, ?)
-            ON CONFLICT(name) DO UPDATE SET account=excluded.account
-        ''', (name.lower(), json_data))
-        conn.commit()
+    conn.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            symbol TEXT,
+            quantity INTEGER,
+            price REAL,
+            timestamp TEXT,
+            rationale TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            timestamp TEXT,
+            value REAL
+        )
+    ''')
+    conn.execute('CREATE TABLE IF NOT EXISTS prices (symbol TEXT PRIMARY KEY, price REAL, fetched_at REAL)')
+    # Databases created before optimistic concurrency have no version column
+    if 'version' not in [column[1] for column in conn.execute('PRAGMA table_info(accounts)')]:
+        conn.execute('ALTER TABLE accounts ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_logs_name_datetime ON logs (name, datetime)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_name_timestamp ON transactions (name, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_snapshots_name_timestamp ON portfolio_snapshots (name, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_logs_name_id ON logs (name, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_snapshots_name_id ON portfolio_snapshots (name, id)')
+
+def _transaction_row(name: str, transaction: dict) -> tuple:
+    return (name, transaction["symbol"], transaction["quantity"], transaction["price"],
+            transaction["timestamp"], transaction["rationale"])
+
+def _migrate_account_blobs() -> None:
+    """
+    Move transactions and portfolio history out of legacy whole-account JSON
+    blobs into their own tables. Rewritten blobs no longer carry those fields,
+    so this is a no-op once every account has been migrated.
+    """
+    with transaction() as conn:
+        rows = conn.execute('SELECT name, account FROM accounts').fetchall()
+        for name, blob in rows:
+            data = json.loads(blob)
+            if not any(field in data for field in HISTORY_FIELDS):
+                continue
+            conn.executemany(INSERT_TRANSACTION_SQL,
+                             [_transaction_row(name, t) for t in data.pop("transactions", [])])
+            conn.executemany(INSERT_SNAPSHOT_SQL,
+                             [(name, ts, value) for ts, value in data.pop("portfolio_value_time_series", [])])
+            conn.execute(UPSERT_ACCOUNT_SQL, (name, json.dumps(data)))
+            print(f"Migrated account {name} to the normalized schema")
+
+_migrate_account_blobs()
+
+def write_account(name, account_dict, transaction_dict: dict = None,
+                  snapshot: tuple = None, clear_history: bool = False,
+                  expected_version: int = None) -> int:
+    """
+    Save an account's current state, appending history rows in the same transaction.
+
+    Only the small mutable fields (balance, strategy, holdings...) are
+    rewritten; transactions and portfolio values are appended incrementally.
+    With expected_version, the save only succeeds if the stored version still
+    matches (optimistic concurrency); otherwise nothing is written.
+
+    Args:
+        name (str): The account name
+        account_dict (dict): Account fields; history fields and version are ignored
+        transaction_dict (dict): A new transaction to append
+        snapshot (tuple): A new (timestamp, value) portfolio snapshot to append
+        clear_history (bool): Delete existing transactions and snapshots first
+        expected_version (int): The version the account was read at
+
+    Returns:
+        int: The account's new version
+
+    Raises:
+        ConcurrentUpdateError: If the account changed since expected_version
+    """
+    name = name.lower()
+    core = {key: value for key, value in account_dict.items() if key not in HISTORY_FIELDS and key != "version"}
+    with transaction() as conn:
+        if expected_version is None:
+            conn.execute(UPSERT_ACCOUNT_SQL, (name, json.dumps(core)))
+        elif conn.execute(UPDATE_ACCOUNT_SQL, (json.dumps(core), name, expected_version)).rowcount == 0:
+            raise ConcurrentUpdateError(f"Account {name} changed since version {expected_version}")
+        if clear_history:
+            conn.execute('DELETE FROM transactions WHERE name = ?', (name,))
+            conn.execute('DELETE FROM portfolio_snapshots WHERE name = ?', (name,))
+        if transaction_dict is not None:
+            conn.execute(INSERT_TRANSACTION_SQL, _transaction_row(name, transaction_dict))
+        if snapshot is not None:
+            conn.execute(INSERT_SNAPSHOT_SQL, (name, *snapshot))
+        return conn.execute(SELECT_VERSION_SQL, (name,)).fetchone()[0]
+
+def write_portfolio_snapshot(name, timestamp: str, value: float) -> None:
+    """Append a portfolio value snapshot without touching the rest of the account"""
+    with transaction() as conn:
+        conn.execute(INSERT_SNAPSHOT_SQL, (_canon(name), timestamp, value))
+
+def read_transactions(name) -> list[dict]:
+    name = _canon(name)
+    rows = get_connection().execute(SELECT_TRANSACTIONS_SQL, (name,)).fetchall()
+    return [
+        {"symbol": symbol, "quantity": quantity, "price": price, "timestamp": timestamp, "rationale": rationale}
+        for symbol, quantity, price, timestamp, rationale in rows
+    ]
+
+def read_portfolio_snapshots(name) -> list[tuple[str, float]]:
+    name = _canon(name)
+    return get_connection().execute(SELECT_SNAPSHOTS_SQL, (name,)).fetchall()
 
 def read_account(name):
+    """
+    Read an account with its transactions and portfolio value time series.
+
+    Returns:
+        dict | None: The account fields, or None if the account does not exist
+    """
     name = _canon(name)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT account FROM accounts WHERE name = ?', (name.lower(),))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
-    
+    # One read transaction, so the row and its history come from the same snapshot
+    with transaction("DEFERRED") as conn:
+        row = conn.execute(SELECT_ACCOUNT_SQL, (name,)).fetchone()
+        if not row:
+            return None
+        account = json.loads(row[0])
+        account["version"] = row[1]
+        account["transactions"] = read_transactions(name)
+        account["portfolio_value_time_series"] = read_portfolio_snapshots(name)
+    return account
+
+def insert_logs(rows: list) -> None:
+    """
+    Insert log rows synchronously in a single transaction.
+
+    Args:
+        rows (list): Tuples of (name, datetime, type, message)
+    """
+    with transaction() as conn:
+        conn.executemany(INSERT_LOG_SQL, rows)
+
+class LogWriter:
+    """
+    Background sink that batches log rows into executemany inserts.
+
+    write() only appends to an in-memory ring buffer, so callers on the event
+    loop never wait for a disk commit. A writer thread flushes when
+    batch_size rows are queued or flush_interval seconds have passed.
+    When the buffer is full, write() waits up to block_timeout for space
+    (backpressure) and then drops the oldest row, counting it in `dropped`.
+    block_timeout defaults to LOG_BLOCK_TIMEOUT, which is 0: write() runs on
+    the traders' event loop, so by default a full buffer drops rows rather
+    than stalling the loop. Set LOG_BLOCK_TIMEOUT to trade latency for no loss.
+    """
+
+    def __init__(self, capacity: int = LOG_BUFFER_CAPACITY, batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, block_timeout: float = None):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = LOG_BLOCK_TIMEOUT if block_timeout is None else block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._buffer = deque()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def write(self, name: str, type: str, message: str) -> None:
+        """Queue a log row; the timestamp is taken now, not when the batch is written"""
+        row = (name, time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()), type, message)
+        with self._cond:
+            if self._closed:
+                insert_logs([row])
+                return
+            if len(self._buffer) >= self.capacity and self.block_timeout > 0:
+                self._cond.wait_for(lambda: len(self._buffer) < self.capacity, self.block_timeout)
+            if len(self._buffer) >= self.capacity:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(row)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="log-writer")
+                self._thread.start()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._buffer) < self.batch_size and not (self._flush_requested or self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = list(self._buffer)
+                self._buffer.clear()
+                self._flush_requested = False
+                self._in_flight = len(batch)
+                # Producers blocked on a full buffer can continue
+                self._cond.notify_all()
+
+            written, failed = 0, len(batch)
+            try:
+                if batch:
+                    insert_logs(batch)
+                    written, failed = len(batch), 0
+            except Exception as e:
+                # Any failure only loses this batch; the thread must survive for later rows
+                print(f"Log writer failed to write {len(batch)} rows: {e}")
+            finally:
+                with self._cond:
+                    if batch:
+                        self.written += written
+                        self.failed += failed
+                        self.batches += 1
+                    self._in_flight = 0
+                    self._cond.notify_all()
+                    done = self._closed and not self._buffer
+            if done:
+                return
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write every queued row now; returns False if the timeout expired first"""
+        with self._cond:
+            if self._thread is None:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._buffer and not self._in_flight, timeout)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Drain the buffer and stop the writer thread; later writes go straight to the database"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._buffer) + self._in_flight,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+            }
+
+log_writer = LogWriter()
+atexit.register(log_writer.shutdown)
+
 def write_log(name: str, type: str, message: str):
     """
     Write a log entry to the logs table.
-    
+
+    The row is queued on the background log writer and committed with the
+    next batch; call log_writer.flush() to wait for it.
+
     Args:
         name (str): The name associated with the log
         type (str): The type of log entry
         message (str): The log message
     """
-    name = _canon(name)
-    now = datetime.now().isoformat()
-    
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO logs (name, datetime, type, message)
-            VALUES (?, datetime('now'), ?, ?)
-        ''', (name.lower(), type, message))
-        conn.commit()
+    log_writer.write(_canon(name), type, message)
 
 def read_log(name: str, last_n=10):
     """
     Read the most recent log entries for a given name.
-    
+
     Args:
         name (str): The name to retrieve logs for
         last_n (int): Number of most recent entries to retrieve
-        
+
     Returns:
         list: A list of tuples containing (datetime, type, message)
     """
     name = _canon(name)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT datetime, type, message FROM logs 
-            WHERE name = ? 
-            ORDER BY datetime DESC
-            LIMIT ?
-        ''', (name.lower(), last_n))
-        
-        return reversed(cursor.fetchall())
+    rows = get_connection().execute(SELECT_LOGS_SQL, (name.lower(), last_n)).fetchall()
+    return reversed(rows)
+
+def read_log_after(name: str, after_id: int = 0, last_n=10) -> list:
+    """
+    Read the log entries added since a given row id.
+
+    Args:
+        name (str): The name to retrieve logs for
+        after_id (int): Only return rows with a greater id (0 for all)
+        last_n (int): Maximum number of entries, keeping the most recent
+
+    Returns:
+        list: Tuples of (id, datetime, type, message), oldest first
+    """
+    rows = get_connection().execute(SELECT_LOGS_AFTER_SQL, (_canon(name), after_id, last_n)).fetchall()
+    return rows[::-1]
+
+def read_account_change(name: str) -> tuple | None:
+    """
+    Read a cheap marker that changes whenever the account or its portfolio history does.
+
+    Returns:
+        tuple | None: (version, last snapshot id), or None if the account does not exist
+    """
+    name = _canon(name)
+    return get_connection().execute(SELECT_ACCOUNT_CHANGE_SQL, (name, name)).fetchone()
 
 def write_market(date: str, data: dict) -> None:
     data_json = json.dumps(data)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO market (date, data)
-            VALUES (?, ?)
-            ON CONFLICT(date) DO UPDATE SET data=excluded.data
-        ''', (date, data_json))
-        conn.commit()
+    with transaction() as conn:
+        conn.execute(UPSERT_MARKET_SQL, (date, data_json))
 
 def read_market(date: str) -> dict | None:
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT data FROM market WHERE date = ?', (date,))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
\ No newline at end of file
+    row = get_connection().execute(SELECT_MARKET_SQL, (date,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def write_prices(prices: dict, fetched_at: float) -> None:
+    """Store share prices in the shared price cache table"""
+    with transaction() as conn:
+        conn.executemany(UPSERT_PRICE_SQL, [(symbol, price, fetched_at) for symbol, price in prices.items()])
+
+def read_prices(symbols: list, fresh_after: float) -> dict:
+    """
+    Read cached share prices fetched after a given time.
+
+    Returns:
+        dict: symbol -> (price, fetched_at) for the fresh entries only
+    """
+    if not symbols:
+        return {}
+    placeholders = ",".join("?" * len(symbols))
+    rows = get_connection().execute(
+        f'SELECT symbol, price, fetched_at FROM prices WHERE symbol IN ({placeholders}) AND fetched_at > ?',
+        (*symbols, fresh_after)
+    ).fetchall()
+    return {symbol: (price, fetched_at) for symbol, price, fetched_at in rows}
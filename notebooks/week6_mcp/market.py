@@ -4,6 +4,7 @@ import os
 from datetime import datetime
 import random
 from database import write_market, read_market
+from price_cache import PriceCache
 from functools import lru_cache
 from datetime import timezone
 
@@ -15,16 +16,25 @@ polygon_plan = os.getenv("POLYGON_PLAN")
 is_paid_polygon = polygon_plan == "paid"
 is_realtime_polygon = polygon_plan == "realtime"
 
+market_plan = "realtime" if is_realtime_polygon else "paid" if is_paid_polygon else "eod"
+price_cache = PriceCache.for_plan(market_plan)
+
+
+@lru_cache(maxsize=1)
+def get_polygon_client() -> RESTClient:
+    """One shared client, so its HTTP connection pool is reused across lookups"""
+    return RESTClient(polygon_api_key)
+
 
 def is_market_open() -> bool:
-    client = RESTClient(polygon_api_key)
+    client = get_polygon_client()
     market_status = client.get_market_status()
     return market_status.market == "open"
 
 
 def get_all_share_prices_polygon_eod() -> dict[str, float]:
     """With much thanks to student Reema R. for fixing the timezone issue with this!"""
-    client = RESTClient(polygon_api_key)
+    client = get_polygon_client()
 
     probe = client.get_previous_close_agg("SPY")[0]
     last_close = datetime.fromtimestamp(probe.timestamp / 1000, tz=timezone.utc).date()
@@ -48,12 +58,30 @@ def get_share_price_polygon_eod(symbol) -> float:
     return market_data.get(symbol, 0.0)
 
 
+def get_share_prices_polygon_eod(symbols: list[str]) -> dict[str, float]:
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    market_data = get_market_for_prior_date(today)
+    return {symbol: market_data.get(symbol, 0.0) for symbol in symbols}
+
+
 def get_share_price_polygon_min(symbol) -> float:
-    client = RESTClient(polygon_api_key)
+    client = get_polygon_client()
     result = client.get_snapshot_ticker("stocks", symbol)
     return result.min.close or result.prev_day.close
 
 
+def get_share_prices_polygon_min(symbols: list[str]) -> dict[str, float]:
+    """Resolve many symbols with a single snapshot-all request"""
+    client = get_polygon_client()
+    snapshots = client.get_snapshot_all("stocks", tickers=list(symbols))
+    prices = {}
+    for snapshot in snapshots:
+        minute_close = snapshot.min.close if snapshot.min else None
+        prev_close = snapshot.prev_day.close if snapshot.prev_day else None
+        prices[snapshot.ticker] = minute_close or prev_close or 0.0
+    return {symbol: prices.get(symbol, 0.0) for symbol in symbols}
+
+
 def get_share_price_polygon(symbol) -> float:
     if is_paid_polygon:
         return get_share_price_polygon_min(symbol)
@@ -61,10 +89,30 @@ def get_share_price_polygon(symbol) -> float:
         return get_share_price_polygon_eod(symbol)
 
 
+def get_share_prices_polygon(symbols: list[str]) -> dict[str, float]:
+    if is_paid_polygon:
+        return get_share_prices_polygon_min(symbols)
+    else:
+        return get_share_prices_polygon_eod(symbols)
+
+
 def get_share_price(symbol) -> float:
+    return get_share_prices([symbol])[symbol]
+
+
+def get_share_prices(symbols: list[str]) -> dict[str, float]:
+    """
+    Return prices for many symbols in one round-trip (unique symbols, input order).
+
+    Polygon prices go through the tiered price cache, so fresh prices are
+    served from memory or the shared database without an upstream call.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
     if polygon_api_key:
         try:
-            return get_share_price_polygon(symbol)
+            return price_cache.get_many(symbols, get_share_prices_polygon)
         except Exception as e:
-            print(f"Was not able to use the polygon API due to {e}; using a random number")
-    return float(random.randint(1, 100))
+            print(f"Was not able to use the polygon API due to {e}; using random numbers")
+    return {symbol: float(random.randint(1, 100)) for symbol in symbols}
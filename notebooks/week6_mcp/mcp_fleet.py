@@ -0,0 +1,102 @@
+import os
+import json
+import asyncio
+from agents.mcp import MCPServerStdio
+from mcp_params import trader_mcp_server_params, researcher_mcp_server_params
+
+CLIENT_SESSION_TIMEOUT_SECONDS = 120
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT", "10"))
+
+
+def _key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def _label(params: dict) -> str:
+    return os.path.basename(params["args"][-1]) if params.get("args") else params["command"]
+
+
+class MCPServerFleet:
+    """
+    Long-lived MCP servers shared by every trader and every tick.
+
+    Servers are keyed by their launch params, so identical servers (accounts,
+    push, market, Brave search) are started once and shared, while servers
+    whose params differ per trader (the memory database) are kept warm per
+    trader name. All starts, health checks and restarts happen in the task
+    that owns the fleet, since MCP stdio sessions must be closed in the task
+    that opened them.
+    """
+
+    def __init__(self, trader_names: list[str]):
+        self.trader_names = trader_names
+        self._servers: dict[str, MCPServerStdio] = {}
+        self._params: dict[str, dict] = {}
+        self.restarts = 0
+
+    def _all_params(self) -> list[dict]:
+        params = list(trader_mcp_server_params)
+        for name in self.trader_names:
+            params.extend(researcher_mcp_server_params(name))
+        return params
+
+    async def _start_server(self, params: dict) -> MCPServerStdio:
+        server = MCPServerStdio(
+            params, client_session_timeout_seconds=CLIENT_SESSION_TIMEOUT_SECONDS, cache_tools_list=True
+        )
+        await server.connect()
+        return server
+
+    async def start(self):
+        """Start every server that is not running yet"""
+        for params in self._all_params():
+            key = _key(params)
+            if key in self._servers:
+                continue
+            self._params[key] = params
+            try:
+                self._servers[key] = await self._start_server(params)
+                print(f"Started MCP server {_label(params)}")
+            except Exception as e:
+                print(f"Could not start MCP server {_label(params)}: {e}")
+
+    async def _is_healthy(self, server: MCPServerStdio) -> bool:
+        if server.session is None:
+            return False
+        try:
+            await asyncio.wait_for(server.session.send_ping(), HEALTH_CHECK_TIMEOUT_SECONDS)
+            return True
+        except Exception:
+            return False
+
+    async def health_check(self):
+        """Ping every server, restart the ones that stopped answering, and start any missing"""
+        for key, server in list(self._servers.items()):
+            if await self._is_healthy(server):
+                continue
+            params = self._params[key]
+            print(f"MCP server {_label(params)} is unhealthy, restarting")
+            try:
+                await server.cleanup()
+            except Exception as e:
+                print(f"Error stopping MCP server {_label(params)}: {e}")
+            del self._servers[key]
+            self.restarts += 1
+        await self.start()
+
+    def _lookup(self, params_list: list[dict]) -> list[MCPServerStdio]:
+        return [self._servers[_key(params)] for params in params_list if _key(params) in self._servers]
+
+    def trader_servers(self) -> list[MCPServerStdio]:
+        return self._lookup(trader_mcp_server_params)
+
+    def researcher_servers(self, name: str) -> list[MCPServerStdio]:
+        return self._lookup(researcher_mcp_server_params(name))
+
+    async def close(self):
+        for key, server in list(self._servers.items()):
+            try:
+                await server.cleanup()
+            except Exception as e:
+                print(f"Error stopping MCP server {_label(self._params[key])}: {e}")
+        self._servers.clear()
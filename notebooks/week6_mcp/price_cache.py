@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+from typing import Callable
+from database import read_prices, write_prices
+
+# How long a price stays fresh, per Polygon plan
+PRICE_TTL_SECONDS = {
+    "eod": 3600.0,       # prior close, changes once a day
+    "paid": 60.0,        # 15 minute delayed snapshots
+    "realtime": 5.0,     # live trades
+}
+
+# Maximum wait for another thread's in-flight lookup of the same symbol
+SINGLE_FLIGHT_TIMEOUT = 30.0
+
+
+class PriceCache:
+    """
+    Two-tier share price cache.
+
+    The in-process tier is a dict of symbol -> (price, fetched_at). The shared
+    tier is the `prices` table in the accounts database, so every MCP server
+    process (market_server.py, accounts_server.py) starts warm from prices
+    fetched by the others. Concurrent misses for the same symbol are coalesced
+    into a single upstream call (single-flight).
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._memory: dict[str, tuple[float, float]] = {}
+        self._in_flight: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+        }
+
+    @classmethod
+    def for_plan(cls, plan: str) -> "PriceCache":
+        """Build a cache with the TTL for the plan, unless PRICE_CACHE_TTL_SECONDS overrides it"""
+        ttl = os.getenv("PRICE_CACHE_TTL_SECONDS")
+        return cls(float(ttl) if ttl else PRICE_TTL_SECONDS[plan])
+
+    def _store(self, prices: dict[str, float], fetched_at: float) -> None:
+        with self._lock:
+            for symbol, price in prices.items():
+                self._memory[symbol] = (price, fetched_at)
+
+    def _fetch_and_store(self, symbols: list[str], fetch) -> dict[str, float]:
+        prices = fetch(symbols)
+        fetched_at = time.time()
+        self._store(prices, fetched_at)
+        write_prices(prices, fetched_at)
+        with self._lock:
+            self._stats["upstream_calls"] += 1
+        return prices
+
+    def get_many(self, symbols: list[str], fetch: Callable[[list[str]], dict[str, float]]) -> dict[str, float]:
+        """
+        Return prices for symbols, calling fetch(missing_symbols) once for the misses.
+
+        Args:
+            symbols: Unique symbols to price
+            fetch: Upstream lookup returning a price for every symbol it is given
+
+        Returns:
+            dict: symbol -> price, in the order of symbols
+        """
+        now = time.time()
+        fresh_after = now - self.ttl_seconds
+        prices = {}
+
+        with self._lock:
+            for symbol in symbols:
+                entry = self._memory.get(symbol)
+                if entry and entry[1] > fresh_after:
+                    prices[symbol] = entry[0]
+                    self._stats["memory_hits"] += 1
+
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            shared = read_prices(missing, fresh_after)
+            with self._lock:
+                for symbol, (price, fetched_at) in shared.items():
+                    self._memory[symbol] = (price, fetched_at)
+                    self._stats["shared_hits"] += 1
+            prices.update({symbol: price for symbol, (price, _) in shared.items()})
+            missing = [symbol for symbol in missing if symbol not in prices]
+
+        if missing:
+            prices.update(self._fetch_single_flight(missing, fetch))
+
+        return {symbol: prices[symbol] for symbol in symbols}
+
+    def _fetch_single_flight(self, symbols: list[str], fetch) -> dict[str, float]:
+        with self._lock:
+            waiting = {symbol: self._in_flight[symbol] for symbol in symbols if symbol in self._in_flight}
+            owned = [symbol for symbol in symbols if symbol not in waiting]
+            done = threading.Event()
+            for symbol in owned:
+                self._in_flight[symbol] = done
+            self._stats["misses"] += len(owned)
+            self._stats["coalesced"] += len(waiting)
+
+        prices = {}
+        if owned:
+            try:
+                prices = self._fetch_and_store(owned, fetch)
+            finally:
+                with self._lock:
+                    for symbol in owned:
+                        self._in_flight.pop(symbol, None)
+                done.set()
+
+        retry = []
+        for symbol, event in waiting.items():
+            event.wait(SINGLE_FLIGHT_TIMEOUT)
+            with self._lock:
+                entry = self._memory.get(symbol)
+            if entry and entry[1] > time.time() - self.ttl_seconds:
+                prices[symbol] = entry[0]
+            else:
+                retry.append(symbol)
+        if retry:
+            # The other lookup failed or timed out, and an expired entry must
+            # never be traded on: fetch these ourselves
+            prices.update(self._fetch_and_store(retry, fetch))
+
+        return prices
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the hit rate across both tiers"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["shared_hits"] + stats["coalesced"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
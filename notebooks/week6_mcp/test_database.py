@@ -0,0 +1,182 @@
+"""
+Unit tests for the SQLite layer in database.py
+
+Run from notebooks/week6_mcp with `python -m pytest test_database.py`.
+conftest.py points the tests at a throwaway database, never accounts.db.
+"""
+import os
+import json
+import sqlite3
+import pytest
+
+pytest.importorskip("dotenv")
+
+import database
+from database import transaction, get_connection
+
+
+class FailingCommit:
+    """Wraps this thread's connection so the next commit fails like SQLITE_BUSY would"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def commit(self):
+        raise sqlite3.OperationalError("database is locked")
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@pytest.fixture
+def failing_commit():
+    conn = get_connection()
+    database._local.conn = FailingCommit(conn)
+    yield conn
+    database._local.conn = conn
+
+
+def test_database_path_is_isolated():
+    assert database.DB == os.environ["ACCOUNTS_DB_PATH"]
+
+
+def test_transaction_commits_and_rolls_back():
+    with transaction() as conn:
+        conn.execute(database.UPSERT_MARKET_SQL, ("2024-01-01", "{}"))
+    assert database.read_market("2024-01-01") == {}
+
+    with pytest.raises(RuntimeError):
+        with transaction() as conn:
+            conn.execute(database.UPSERT_MARKET_SQL, ("2024-01-02", "{}"))
+            raise RuntimeError("abort")
+    assert database.read_market("2024-01-02") is None
+
+
+def test_nested_transactions_join_the_outer_one():
+    with pytest.raises(RuntimeError):
+        with transaction():
+            database.write_market("2024-02-01", {"a": 1})
+            raise RuntimeError("abort")
+    assert database.read_market("2024-02-01") is None
+
+
+def test_failed_commit_rolls_back(failing_commit):
+    with pytest.raises(sqlite3.OperationalError):
+        with transaction() as conn:
+            conn.execute(database.UPSERT_MARKET_SQL, ("2024-03-01", "{}"))
+    database._local.conn = failing_commit
+
+    assert not failing_commit.in_transaction
+    # The connection is usable again and the failed write is gone
+    database.write_market("2024-03-02", {})
+    assert database.read_market("2024-03-01") is None
+    assert database.read_market("2024-03-02") == {}
+
+
+def test_read_account_is_one_read_transaction():
+    database.write_account("reader", {"balance": 1.0})
+    assert database.read_account("reader")["balance"] == 1.0
+    assert not get_connection().in_transaction
+    assert database.read_account("nobody") is None
+    assert not get_connection().in_transaction
+
+
+def test_log_writer_survives_a_failing_batch(monkeypatch):
+    real_insert = database.insert_logs
+    calls = []
+
+    def insert_logs(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise TypeError("bad row")
+        real_insert(rows)
+
+    monkeypatch.setattr(database, "insert_logs", insert_logs)
+    writer = database.LogWriter(flush_interval=0.01)
+    writer.write("logger", "trace", "lost")
+    assert writer.flush(timeout=2)
+    writer.write("logger", "trace", "kept")
+    assert writer.flush(timeout=2)
+    writer.shutdown()
+
+    stats = writer.stats()
+    assert stats["failed"] == 1 and stats["written"] == 1 and stats["queued"] == 0
+    assert [message for _, _, message in database.read_log("logger")] == ["kept"]
+
+
+def test_log_writer_drops_oldest_rows_when_full():
+    writer = database.LogWriter(capacity=2, batch_size=100, flush_interval=60)
+    assert writer.block_timeout == database.LOG_BLOCK_TIMEOUT
+    for message in ("one", "two", "three"):
+        writer.write("dropper", "trace", message)
+    writer.shutdown()
+
+    assert writer.stats()["dropped"] == 1
+    assert [message for _, _, message in database.read_log("dropper")] == ["two", "three"]
+
+
+def test_history_is_appended_not_rewritten():
+    transaction_row = {"symbol": "AAPL", "quantity": 2, "price": 10.0, "timestamp": "t1", "rationale": "why"}
+    database.write_account("history", {"balance": 100.0, "holdings": {}}, clear_history=True)
+    database.write_account("history", {"balance": 80.0, "holdings": {"AAPL": 2}},
+                           transaction_dict=transaction_row, snapshot=("t1", 100.0))
+    database.write_portfolio_snapshot("history", "t2", 101.0)
+
+    account = database.read_account("HISTORY")
+    assert account["balance"] == 80.0
+    assert account["transactions"] == [transaction_row]
+    assert account["portfolio_value_time_series"] == [("t1", 100.0), ("t2", 101.0)]
+    blob = get_connection().execute("SELECT account FROM accounts WHERE name = 'history'").fetchone()[0]
+    assert "transactions" not in blob and "portfolio_value_time_series" not in blob
+
+    database.write_account("history", {"balance": 10_000.0, "holdings": {}}, clear_history=True)
+    account = database.read_account("history")
+    assert account["transactions"] == [] and account["portfolio_value_time_series"] == []
+
+
+def test_legacy_blobs_are_migrated():
+    legacy = {
+        "name": "legacy", "balance": 5.0, "holdings": {},
+        "transactions": [{"symbol": "MSFT", "quantity": 1, "price": 5.0, "timestamp": "t0", "rationale": ""}],
+        "portfolio_value_time_series": [["t0", 5.0]],
+    }
+    with transaction() as conn:
+        conn.execute(database.UPSERT_ACCOUNT_SQL, ("legacy", json.dumps(legacy)))
+    database._migrate_account_blobs()
+
+    account = database.read_account("legacy")
+    assert account["balance"] == 5.0
+    assert [t["symbol"] for t in account["transactions"]] == ["MSFT"]
+    assert account["portfolio_value_time_series"] == [("t0", 5.0)]
+    # A second run finds nothing left to migrate
+    database._migrate_account_blobs()
+    assert len(database.read_account("legacy")["transactions"]) == 1
+
+
+def test_write_account_bumps_the_version():
+    first = database.write_account("versioned", {"balance": 1.0}, clear_history=True)
+    second = database.write_account("versioned", {"balance": 2.0})
+    assert second == first + 1
+    assert database.read_account("versioned")["version"] == second
+
+
+def test_stale_expected_version_conflicts_and_writes_nothing():
+    version = database.write_account("contended", {"balance": 1.0}, clear_history=True)
+    # Another writer saves first
+    newer = database.write_account("contended", {"balance": 2.0}, expected_version=version)
+    assert newer == version + 1
+
+    transaction_row = {"symbol": "AAPL", "quantity": 1, "price": 1.0, "timestamp": "t", "rationale": ""}
+    with pytest.raises(database.ConcurrentUpdateError):
+        database.write_account("contended", {"balance": 3.0}, transaction_dict=transaction_row,
+                               snapshot=("t", 3.0), expected_version=version)
+
+    account = database.read_account("contended")
+    assert account["balance"] == 2.0 and account["version"] == newer
+    assert account["transactions"] == [] and account["portfolio_value_time_series"] == []
+
+
+def test_expected_version_for_a_missing_account_conflicts():
+    with pytest.raises(database.ConcurrentUpdateError):
+        database.write_account("ghost", {"balance": 1.0}, expected_version=0)
+    assert database.read_account("ghost") is None
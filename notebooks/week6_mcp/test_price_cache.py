@@ -0,0 +1,100 @@
+"""
+Unit tests for the tiered share price cache
+
+Run from notebooks/week6_mcp with `python -m pytest test_price_cache.py`.
+conftest.py points the shared tier at a throwaway database.
+"""
+import time
+import threading
+import pytest
+
+pytest.importorskip("dotenv")
+
+import price_cache
+from price_cache import PriceCache
+
+
+class Upstream:
+    """Fake Polygon lookup that records every call"""
+
+    def __init__(self, price: float = 100.0, delay: float = 0.0, fail: bool = False):
+        self.price = price
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, symbols: list[str]) -> dict[str, float]:
+        self.calls.append(list(symbols))
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return {symbol: self.price for symbol in symbols}
+
+
+@pytest.fixture
+def symbols(request):
+    """Symbols unique to each test, since the shared tier outlives a test"""
+    return [f"{request.node.name[:20]}_{i}".upper() for i in range(2)]
+
+
+def test_memory_tier_serves_fresh_prices(symbols):
+    cache = PriceCache(ttl_seconds=60)
+    upstream = Upstream()
+    assert cache.get_many(symbols, upstream) == {symbols[0]: 100.0, symbols[1]: 100.0}
+    assert cache.get_many(symbols, upstream) == {symbols[0]: 100.0, symbols[1]: 100.0}
+    assert upstream.calls == [symbols]
+    assert cache.stats()["memory_hits"] == 2
+
+
+def test_shared_tier_warms_other_processes(symbols):
+    PriceCache(ttl_seconds=60).get_many(symbols, Upstream(price=5.0))
+    other = PriceCache(ttl_seconds=60)
+    upstream = Upstream()
+    assert other.get_many(symbols, upstream) == {symbols[0]: 5.0, symbols[1]: 5.0}
+    assert upstream.calls == []
+    assert other.stats()["shared_hits"] == 2
+
+
+def test_expired_prices_are_refetched(symbols, monkeypatch):
+    cache = PriceCache(ttl_seconds=60)
+    cache.get_many(symbols, Upstream(price=1.0))
+    later = time.time() + 61
+    monkeypatch.setattr(price_cache.time, "time", lambda: later)
+    assert cache.get_many(symbols, Upstream(price=2.0)) == {symbols[0]: 2.0, symbols[1]: 2.0}
+
+
+def test_concurrent_misses_share_one_upstream_call(symbols):
+    cache = PriceCache(ttl_seconds=60)
+    upstream = Upstream(delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_many(symbols[:1], upstream)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(upstream.calls) == 1
+    assert results == [{symbols[0]: 100.0}] * 5
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_waiter_never_serves_an_expired_price_when_the_owner_fails(symbols):
+    cache = PriceCache(ttl_seconds=60)
+    # An entry that expired long ago is still in the memory tier
+    cache._store({symbols[0]: 1.0}, time.time() - 3600)
+    failing = Upstream(delay=0.2, fail=True)
+    owner_error = []
+
+    def owner():
+        try:
+            cache.get_many(symbols[:1], failing)
+        except ConnectionError as e:
+            owner_error.append(e)
+
+    thread = threading.Thread(target=owner)
+    thread.start()
+    time.sleep(0.05)
+    assert cache.get_many(symbols[:1], Upstream(price=3.0)) == {symbols[0]: 3.0}
+    thread.join()
+    assert owner_error
@@ -1,3 +1,4 @@
+import asyncio
 from openai import AsyncOpenAI
 from contextlib import AsyncExitStack
 from accounts_client import read_accounts_resource, read_strategy_resource
@@ -70,8 +71,10 @@ class Trader:
 
     async def run_agent(self, trader_mcp_servers, researcher_mcp_servers):
         self.agent = await self.create_agent(trader_mcp_servers, researcher_mcp_servers)
-        account = await self.get_account_report()
-        strategy = await read_strategy_resource(self.name)
+        # Both reads are multiplexed over the warm accounts session pool
+        account, strategy = await asyncio.gather(
+            self.get_account_report(), read_strategy_resource(self.name)
+        )
         message = (
             trade_message(self.name, strategy, account)
             if self.do_trade
@@ -96,23 +99,35 @@ class Trader:
                 ]
                 await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
 
-    async def run_with_trace(self):
+    async def run_with_fleet(self, fleet):
+        """Run on the shared, already running servers of an MCPServerFleet"""
+        await self.run_agent(fleet.trader_servers(), fleet.researcher_servers(self.name))
+
+    async def run_with_trace(self, fleet=None):
         trace_name = f"{self.name}-trading" if self.do_trade else f"{self.name}-rebalancing"
         trace_id = make_trace_id(self.name.lower())
         with trace(trace_name, trace_id=trace_id):
-            await self.run_with_mcp_servers()
+            if fleet is not None:
+                await self.run_with_fleet(fleet)
+            else:
+                await self.run_with_mcp_servers()
 
-    async def run(self):
+    async def run(self, fleet=None) -> bool:
+        """Run one trading or rebalancing turn, returning whether it succeeded"""
         try:
-            await self.run_with_trace()
+            await self.run_with_trace(fleet)
+            return True
         except Exception as e:
             print(f"Error running trader {self.name}: {e}")
-        self.do_trade = not self.do_trade
+            return False
+        finally:
+            # Alternate modes even after a failure or a timeout cancellation
+            self.do_trade = not self.do_trade
 
 
 # ===== CLI runner =====
 if __name__ == "__main__":
-    import asyncio, argparse
+    import argparse
     try:
         from trading_floor import names
     except Exception:
@@ -4,6 +4,7 @@ import asyncio
 from tracers import LogTracer
 from agents import add_trace_processor
 from market import is_market_open
+from mcp_fleet import MCPServerFleet
 from dotenv import load_dotenv
 import os
 
@@ -14,6 +15,10 @@ RUN_EVEN_WHEN_MARKET_IS_CLOSED = (
     os.getenv("RUN_EVEN_WHEN_MARKET_IS_CLOSED", "false").strip().lower() == "true"
 )
 USE_MANY_MODELS = os.getenv("USE_MANY_MODELS", "true").strip().lower() == "true"
+# Traders running at the same time (1 = sequential)
+MAX_PARALLEL_TRADERS = int(os.getenv("MAX_PARALLEL_TRADERS", "4"))
+# Per-trader deadline for one tick; a slower trader is cancelled (0 = no limit)
+TRADER_TIMEOUT_SECONDS = float(os.getenv("TRADER_TIMEOUT_SECONDS", "900"))
 
 names = ["Warren", "George", "Ray", "Cathie"]
 lastnames = ["Patience", "Bold", "Systematic", "Crypto"]
@@ -45,23 +50,44 @@ def create_traders() -> List[Trader]:
     return traders
 
 
+async def run_trader(trader: Trader, fleet: MCPServerFleet, semaphore: asyncio.Semaphore) -> bool:
+    """Run one trader under the parallelism limit and its timeout; never raises"""
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(trader.run(fleet), TRADER_TIMEOUT_SECONDS or None)
+        except asyncio.TimeoutError:
+            print(f"Trader {trader.name} timed out after {TRADER_TIMEOUT_SECONDS}s and was cancelled")
+        except Exception as e:
+            print(f"Trader {trader.name} failed: {e}")
+        return False
+
+
+async def run_traders(traders: List[Trader], fleet: MCPServerFleet) -> int:
+    """Run a tick for every trader, at most MAX_PARALLEL_TRADERS at a time; returns how many succeeded"""
+    semaphore = asyncio.Semaphore(max(1, MAX_PARALLEL_TRADERS))
+    results = await asyncio.gather(*[run_trader(t, fleet, semaphore) for t in traders])
+    return sum(results)
+
+
 async def run_every_n_minutes():
     add_trace_processor(LogTracer())
     traders = create_traders()
 
-    # Toggle here if you want to try concurrent later
-    SEQUENTIAL_TRADERS = True
+    # MCP servers are started once and shared across traders and ticks
+    fleet = MCPServerFleet(names)
+    await fleet.start()
 
-    while True:
-        if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
-            if SEQUENTIAL_TRADERS:
-                for t in traders:
-                    await t.run()
+    try:
+        while True:
+            if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
+                await fleet.health_check()
+                succeeded = await run_traders(traders, fleet)
+                print(f"Tick finished: {succeeded}/{len(traders)} traders succeeded")
             else:
-                await asyncio.gather(*[t.run() for t in traders])
-        else:
-            print("Market is closed, skipping run")
-        await asyncio.sleep(RUN_EVERY_N_MINUTES * 60)
+                print("Market is closed, skipping run")
+            await asyncio.sleep(RUN_EVERY_N_MINUTES * 60)
+    finally:
+        await fleet.close()
 
 
 
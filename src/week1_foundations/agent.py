@@ -1,11 +1,65 @@
 """
 Basic AI Agent Implementation with Tool Support
 """
-from typing import Dict, Any, List, Optional
-from week1_foundations.models import model_manager
-from week1_foundations.tools import get_available_tools, execute_tool
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from week1_foundations.models import (
+    model_manager, gather_with_deadline,
+    DEFAULT_COMPARE_TIMEOUT, DEFAULT_PROVIDER_CONCURRENCY
+)
+from week1_foundations.tools import get_available_tools, execute_tools, aexecute_tools
 import json
 
+# System prompt with tool instructions
+SYSTEM_PROMPT = """You are a helpful AI assistant with access to tools.
+When you need to use a tool, call it appropriately.
+Always provide helpful, accurate responses."""
+
+def _build_messages(user_input: str) -> List[Dict[str, Any]]:
+    """Build the initial conversation for an agent run"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_input}
+    ]
+
+def _parse_tool_calls(tool_calls) -> List[Tuple[str, Dict[str, Any]]]:
+    """Parse tool call arguments into (tool_name, arguments) pairs.
+    
+    Raises:
+        json.JSONDecodeError: If the model produced malformed tool arguments
+    """
+    return [
+        (tool_call.function.name, json.loads(tool_call.function.arguments))
+        for tool_call in tool_calls
+    ]
+
+def _add_tool_messages(messages: List[Dict[str, Any]], tool_calls, tool_results: List[Any]) -> None:
+    """Append one assistant message carrying every tool call, followed by the tool results"""
+    messages.append({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": list(tool_calls)
+    })
+    for tool_call, tool_result in zip(tool_calls, tool_results):
+        messages.append({
+            "role": "tool",
+            "content": json.dumps(tool_result),
+            "tool_call_id": tool_call.id
+        })
+
+def _append_tool_results(messages: List[Dict[str, Any]], tool_calls) -> None:
+    """Execute tool calls concurrently and append the calls and their results to the conversation.
+    
+    Raises:
+        json.JSONDecodeError: If the model produced malformed tool arguments
+    """
+    tool_results = execute_tools(_parse_tool_calls(tool_calls))
+    _add_tool_messages(messages, tool_calls, tool_results)
+
+async def _aappend_tool_results(messages: List[Dict[str, Any]], tool_calls) -> None:
+    """Async version of _append_tool_results"""
+    tool_results = await aexecute_tools(_parse_tool_calls(tool_calls))
+    _add_tool_messages(messages, tool_calls, tool_results)
+
 def run_agent(user_input: str, model_name: str = "gpt-4o-mini", 
               max_iterations: int = 3) -> str:
     """Run AI agent with optional tool usage.
@@ -22,16 +76,7 @@ def run_agent(user_input: str, model_name: str = "gpt-4o-mini",
     if model_name not in model_manager.get_available_models():
         return f"Error: Model {model_name} not available"
     
-    # System prompt with tool instructions
-    system_prompt = """You are a helpful AI assistant with access to tools.
-When you need to use a tool, call it appropriately.
-Always provide helpful, accurate responses."""
-    
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_input}
-    ]
-    
+    messages = _build_messages(user_input)
     tools = get_available_tools()
     iteration_count = 0
     
@@ -39,7 +84,7 @@ Always provide helpful, accurate responses."""
         while iteration_count < max_iterations:
             # Get response from model
             response = model_manager.generate_response(
-                model_name, messages, tools=tools
+                model_name, messages, tools=tools, caller='agent'
             )
             
             if 'error' in response:
@@ -48,31 +93,14 @@ Always provide helpful, accurate responses."""
             # Check if model wants to use tools
             if response['tool_calls']:
                 # Execute tool calls
-                for tool_call in response['tool_calls']:
-                    try:
-                        tool_args = json.loads(tool_call.function.arguments)
-                        tool_result = execute_tool(
-                            tool_call.function.name, 
-                            tool_args
-                        )
-                    except json.JSONDecodeError as e:
-                        return f"Failed to parse tool arguments: {e}"
-                    
-                    # Add tool call and result to conversation
-                    messages.append({
-                        "role": "assistant",
-                        "content": None,
-                        "tool_calls": [tool_call]
-                    })
-                    messages.append({
-                        "role": "tool",
-                        "content": json.dumps(tool_result),
-                        "tool_call_id": tool_call.id
-                    })
+                try:
+                    _append_tool_results(messages, response['tool_calls'])
+                except json.JSONDecodeError as e:
+                    return f"Failed to parse tool arguments: {e}"
                 
                 # Get follow-up response after tool usage
                 follow_up = model_manager.generate_response(
-                    model_name, messages
+                    model_name, messages, caller='agent'
                 )
                 
                 if 'error' in follow_up:
@@ -91,13 +119,140 @@ Always provide helpful, accurate responses."""
     except Exception as e:
         return f"Agent error: {str(e)}"
 
-def run_agent_with_multiple_models(user_input: str, 
-                                  model_names: List[str] = None) -> Dict[str, Dict[str, Any]]:
-    """Run the same query across multiple models for comparison.
+def stream_agent(user_input: str, model_name: str = "gpt-4o-mini",
+                 max_iterations: int = 3) -> Iterator[str]:
+    """Run AI agent and stream the response as it is generated.
+    
+    Content deltas are yielded as soon as the model produces them; tool calls
+    are assembled from the stream, executed, and the follow-up is streamed too.
+    
+    Args:
+        user_input: User's question or request
+        model_name: Model to use for generation
+        max_iterations: Maximum number of tool calling iterations
+        
+    Yields:
+        Text deltas of the final response (error messages are yielded as text)
+    """
+    
+    if model_name not in model_manager.get_available_models():
+        yield f"Error: Model {model_name} not available"
+        return
+    
+    messages = _build_messages(user_input)
+    tools = get_available_tools()
+    iteration_count = 0
+    
+    try:
+        while iteration_count < max_iterations:
+            response = None
+            for event in model_manager.stream_response(model_name, messages, tools=tools, caller='agent'):
+                if event['type'] == 'content':
+                    yield event['delta']
+                elif event['type'] == 'error':
+                    yield f"Model error: {event['error']}"
+                    return
+                else:
+                    response = event
+            
+            if not response['tool_calls']:
+                if not response['content']:
+                    yield "No response generated"
+                return
+            
+            try:
+                _append_tool_results(messages, response['tool_calls'])
+            except json.JSONDecodeError as e:
+                yield f"Failed to parse tool arguments: {e}"
+                return
+            
+            follow_up = None
+            for event in model_manager.stream_response(model_name, messages, caller='agent'):
+                if event['type'] == 'content':
+                    yield event['delta']
+                elif event['type'] == 'error':
+                    yield f"Follow-up error: {event['error']}"
+                    return
+                else:
+                    follow_up = event
+            
+            if follow_up['content']:
+                return
+            
+            iteration_count += 1
+        
+        yield "Maximum iterations reached"
+        
+    except Exception as e:
+        yield f"Agent error: {str(e)}"
+
+async def arun_agent(user_input: str, model_name: str = "gpt-4o-mini",
+                     max_iterations: int = 3, caller: str = 'agent') -> str:
+    """Async version of run_agent using the async provider clients.
+    
+    Args:
+        user_input: User's question or request
+        model_name: Model to use for generation
+        max_iterations: Maximum number of tool calling iterations
+        caller: Label used to aggregate usage metrics
+        
+    Returns:
+        Final response string
+    """
+    
+    if model_name not in model_manager.get_available_models():
+        return f"Error: Model {model_name} not available"
+    
+    messages = _build_messages(user_input)
+    tools = get_available_tools()
+    iteration_count = 0
+    
+    try:
+        while iteration_count < max_iterations:
+            response = await model_manager.agenerate_response(
+                model_name, messages, tools=tools, caller=caller
+            )
+            
+            if 'error' in response:
+                return f"Model error: {response['error']}"
+            
+            if response['tool_calls']:
+                try:
+                    await _aappend_tool_results(messages, response['tool_calls'])
+                except json.JSONDecodeError as e:
+                    return f"Failed to parse tool arguments: {e}"
+                
+                follow_up = await model_manager.agenerate_response(
+                    model_name, messages, caller=caller
+                )
+                
+                if 'error' in follow_up:
+                    return f"Follow-up error: {follow_up['error']}"
+                
+                if follow_up['content']:
+                    return follow_up['content']
+                
+                iteration_count += 1
+            else:
+                return response['content'] or "No response generated"
+        
+        return "Maximum iterations reached"
+        
+    except Exception as e:
+        return f"Agent error: {str(e)}"
+
+async def arun_agent_with_multiple_models(user_input: str,
+                                         model_names: List[str] = None,
+                                         timeout: Optional[float] = DEFAULT_COMPARE_TIMEOUT,
+                                         max_concurrency_per_provider: int = DEFAULT_PROVIDER_CONCURRENCY
+                                         ) -> Dict[str, Dict[str, Any]]:
+    """Run the same query across multiple models concurrently.
     
     Args:
         user_input: User's question or request
         model_names: List of models to test (default: all available)
+        timeout: Global deadline in seconds; models still running are reported as failed
+        max_concurrency_per_provider: Maximum concurrent agent runs per provider
         
     Returns:
         Dict mapping model names to their responses and metadata
@@ -105,28 +260,60 @@ def run_agent_with_multiple_models(user_input: str,
     if model_names is None:
         model_names = model_manager.get_available_models()
     
-    results = {}
+    semaphores = model_manager.provider_semaphores(max_concurrency_per_provider)
+    
+    async def _run(model_name: str) -> str:
+        model_info = model_manager.get_model_info(model_name)
+        semaphore = semaphores.get(model_info.provider) if model_info else None
+        if semaphore is None:
+            return await arun_agent(user_input, model_name, caller='comparison')
+        async with semaphore:
+            return await arun_agent(user_input, model_name, caller='comparison')
     
     for model_name in model_names:
         print(f"Testing with {model_name}...")
+    
+    completed, timed_out = await gather_with_deadline(
+        {name: _run(name) for name in model_names}, timeout
+    )
+    
+    results = {}
+    
+    for model_name in model_names:
+        model_info = model_manager.get_model_info(model_name)
         
-        try:
-            response = run_agent(user_input, model_name)
-            model_info = model_manager.get_model_info(model_name)
-            
-            results[model_name] = {
-                'response': response,
-                'model_display': model_info.name if model_info else model_name,
-                'provider': model_info.provider if model_info else 'unknown',
-                'success': True
-            }
-        except Exception as e:
-            results[model_name] = {
-                'response': f"Error: {str(e)}",
-                'model_display': model_name,
-                'provider': 'unknown',
-                'success': False
-            }
+        if model_name in timed_out:
+            response, success = f"Error: timed out after {timeout}s", False
+        elif isinstance(completed[model_name], Exception):
+            response, success = f"Error: {str(completed[model_name])}", False
+        else:
+            response, success = completed[model_name], True
+        
+        results[model_name] = {
+            'response': response,
+            'model_display': model_info.name if model_info else model_name,
+            'provider': model_info.provider if model_info else 'unknown',
+            'success': success
+        }
     
     return results
 
+def run_agent_with_multiple_models(user_input: str, 
+                                  model_names: List[str] = None,
+                                  timeout: Optional[float] = DEFAULT_COMPARE_TIMEOUT) -> Dict[str, Dict[str, Any]]:
+    """Run the same query across multiple models for comparison.
+    
+    The models run concurrently, so the wall-clock time is close to the
+    slowest model rather than the sum of all of them.
+    
+    Args:
+        user_input: User's question or request
+        model_names: List of models to test (default: all available)
+        timeout: Global deadline in seconds
+        
+    Returns:
+        Dict mapping model names to their responses and metadata
+    """
+    return model_manager.run_sync(
+        arun_agent_with_multiple_models(user_input, model_names, timeout=timeout)
+    )
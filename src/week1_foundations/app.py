@@ -1,9 +1,8 @@
 """
 Command Line Interface for AI Agents System
 """
-from week1_foundations.interface import launch_interface
-from week1_foundations.agent import run_agent, run_agent_with_multiple_models
-from week1_foundations.evaluation import run_agent_with_evaluation, run_comparative_analysis
+from week1_foundations.agent import run_agent, stream_agent, run_agent_with_multiple_models
+from week1_foundations.evaluation import run_agent_with_evaluation, run_comparative_analysis, evaluate_dataset
 from week1_foundations.models import model_manager
 import sys
 
@@ -95,8 +94,10 @@ def interactive_chat():
             if not user_input:
                 continue
             
-            response = run_agent(user_input, current_model)
-            print(f"Agent: {response}")
+            print("Agent: ", end="", flush=True)
+            for delta in stream_agent(user_input, current_model):
+                print(delta, end="", flush=True)
+            print()
             
         except KeyboardInterrupt:
             print("\nGoodbye!")
@@ -104,14 +105,19 @@ def interactive_chat():
         except Exception as e:
             print(f"Error: {e}")
 
+def start_web_interface():
+    """Launch the Gradio web interface (gradio is only imported in this mode)"""
+    from week1_foundations.interface import launch_interface
+    print("Starting web interface...")
+    launch_interface(share=False, port=7860)
+
 def main():
     """Main entry point"""
     if len(sys.argv) > 1:
         mode = sys.argv[1].lower()
         
         if mode in ['web', 'interface', 'gradio']:
-            print("Starting web interface...")
-            launch_interface(share=False, port=7860)
+            start_web_interface()
         
         elif mode in ['chat', 'interactive']:
             interactive_chat()
@@ -119,6 +125,19 @@ def main():
         elif mode in ['demo', 'test']:
             console_demo()
         
+        elif mode in ['eval', 'evaluate']:
+            if len(sys.argv) < 3:
+                print("Usage: python app.py eval <dataset.jsonl> [results.jsonl]")
+                return
+            output_path = sys.argv[3] if len(sys.argv) > 3 else None
+            results = evaluate_dataset(sys.argv[2], output_path=output_path)
+            scores = [result['evaluation']['score'] for result in results]
+            accepted = sum(result['evaluation']['is_acceptable'] for result in results)
+            print(f"Evaluated {len(results)} items")
+            if scores:
+                print(f"Average score: {sum(scores) / len(scores):.2f}/10")
+                print(f"Acceptable: {accepted}/{len(results)}")
+        
         elif mode in ['help', '--help', '-h']:
             print("""
 AI Agents System - Usage:
@@ -129,12 +148,14 @@ Modes:
   web       - Launch web interface (default)
   chat      - Interactive chat mode
   demo      - Run console demonstration
+  eval      - Evaluate a JSONL dataset offline (eval <dataset.jsonl> [results.jsonl])
   help      - Show this help
 
 Examples:
   python app.py web
   python app.py chat
   python app.py demo
+  python app.py eval questions.jsonl results.jsonl
 """)
         else:
             print("Invalid mode")
@@ -142,8 +163,7 @@ Examples:
     
     else:
         # Default to web interface
-        print("Starting web interface...")
-        launch_interface(share=False, port=7860)
+        start_web_interface()
 
 if __name__ == "__main__":
     main()
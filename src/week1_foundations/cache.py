@@ -0,0 +1,190 @@
+"""
+Response Cache - In-memory LRU tier with an optional persistent SQLite tier
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+def _to_jsonable(obj: Any) -> Any:
+    """Fallback serializer for SDK objects (pydantic models) found in messages"""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    if hasattr(obj, '__dict__'):
+        return vars(obj)
+    return str(obj)
+
+def make_cache_key(model_id: str, messages: List[Dict[str, Any]], tools: Optional[List[Dict]] = None,
+                   temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                   response_format: Optional[Dict[str, Any]] = None) -> str:
+    """Build a canonical hash of everything that determines a model response"""
+    payload = json.dumps(
+        {
+            'model_id': model_id,
+            'messages': messages,
+            'tools': tools or [],
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'response_format': response_format,
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=_to_jsonable
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """Two-tier response cache with TTL and size-based eviction.
+
+    The memory tier is an LRU bounded by ``max_entries``. When ``db_path`` is
+    given, entries are also written to SQLite so they survive restarts; the
+    SQLite tier is bounded by ``max_db_entries`` and evicts least recently used
+    rows. Values are stored as JSON, so callers always get a fresh copy.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600,
+                 db_path: Optional[str] = None, max_db_entries: int = 10000,
+                 cache_nondeterministic: bool = False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_db_entries = max_db_entries
+        self.cache_nondeterministic = cache_nondeterministic
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'writes': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    expires_at REAL,
+                    last_access REAL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)')
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional['ResponseCache']:
+        """Build a cache from RESPONSE_CACHE_* environment variables (None when disabled)"""
+        if os.getenv('RESPONSE_CACHE_ENABLED', 'true').strip().lower() != 'true':
+            return None
+        ttl = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600'))
+        return cls(
+            max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '1024')),
+            ttl_seconds=ttl if ttl > 0 else None,
+            db_path=os.getenv('RESPONSE_CACHE_PATH') or None,
+            max_db_entries=int(os.getenv('RESPONSE_CACHE_MAX_DB_ENTRIES', '10000')),
+            cache_nondeterministic=os.getenv('RESPONSE_CACHE_ALL', 'false').strip().lower() == 'true'
+        )
+
+    def should_cache(self, temperature: Optional[float]) -> bool:
+        """Deterministic (temperature 0) calls are cacheable by default"""
+        return self.cache_nondeterministic or temperature == 0
+
+    def _expires_at(self) -> Optional[float]:
+        return time.time() + self.ttl_seconds if self.ttl_seconds else None
+
+    def _store_memory(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._stats['memory_hits'] += 1
+                    return json.loads(value)
+                del self._memory[key]
+                self._stats['expirations'] += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    'SELECT value, expires_at FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row:
+                    value, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+                        self._conn.commit()
+                        self._store_memory(key, value, expires_at)
+                        self._stats['hits'] += 1
+                        self._stats['disk_hits'] += 1
+                        return json.loads(value)
+                    self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self._conn.commit()
+                    self._stats['expirations'] += 1
+
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a JSON-serializable value under key"""
+        serialized = json.dumps(value, default=_to_jsonable)
+        expires_at = self._expires_at()
+        with self._lock:
+            self._store_memory(key, serialized, expires_at)
+            self._stats['writes'] += 1
+
+            if self._conn is not None:
+                now = time.time()
+                self._conn.execute('''
+                    INSERT INTO responses (key, value, expires_at, last_access)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET value=excluded.value,
+                        expires_at=excluded.expires_at, last_access=excluded.last_access
+                ''', (key, serialized, expires_at, now))
+                self._conn.execute('DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+                overflow = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_db_entries
+                if overflow > 0:
+                    self._conn.execute('''
+                        DELETE FROM responses WHERE key IN (
+                            SELECT key FROM responses ORDER BY last_access ASC LIMIT ?
+                        )
+                    ''', (overflow,))
+                    self._stats['evictions'] += overflow
+                self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM responses')
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            if self._conn is not None:
+                stats['disk_entries'] = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -1,12 +1,19 @@
 """
 Response Evaluation System with Pydantic Models
 """
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-from week1_foundations.models import model_manager
-from week1_foundations.agent import run_agent
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from week1_foundations.models import model_manager, gather_with_deadline
+from week1_foundations.agent import run_agent, arun_agent
+import asyncio
 import json
 
+# Maximum concurrent judge calls in batch evaluation
+DEFAULT_EVAL_CONCURRENCY = 8
+
+# Ask OpenAI-compatible providers for a JSON object instead of free text
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
 class Evaluation(BaseModel):
     """Pydantic model for response evaluation"""
     is_acceptable: bool
@@ -26,23 +33,15 @@ class ModelComparison(BaseModel):
 class ResponseEvaluator:
     """Evaluates responses for quality and appropriateness"""
     
-    def __init__(self, evaluator_model: str = "gpt-4o-mini"):
+    def __init__(self, evaluator_model: str = "gpt-4o-mini", temperature: float = 0.0,
+                 max_concurrency: int = DEFAULT_EVAL_CONCURRENCY):
         self.evaluator_model = evaluator_model
+        self.temperature = temperature
+        self.max_concurrency = max_concurrency
     
-    def evaluate_response(self, user_question: str, response: str, 
-                         context: Optional[str] = None) -> Evaluation:
-        """Evaluate a single response for quality and appropriateness.
-        
-        Args:
-            user_question: The original user question
-            response: The response to evaluate
-            context: Optional context about what makes a good response
-            
-        Returns:
-            Evaluation object with detailed feedback
-        """
-        
-        evaluation_prompt = f"""You are an expert evaluator of AI responses. 
+    def _build_evaluation_prompt(self, user_question: str, response: str,
+                                 context: Optional[str] = None) -> str:
+        return f"""You are an expert evaluator of AI responses. 
 Your task is to evaluate the quality of an AI response to a user question.
 
 User Question: {user_question}
@@ -67,60 +66,110 @@ Provide a comprehensive evaluation with:
 - suggestions: specific recommendations for improvement
 
 Respond with valid JSON only."""
-
-        messages = [{"role": "user", "content": evaluation_prompt}]
+    
+    def _parse_evaluation(self, eval_response: Dict[str, Any]) -> Evaluation:
+        """Turn a judge response into an Evaluation.
         
-        try:
-            eval_response = model_manager.generate_response(
-                self.evaluator_model, messages
-            )
-            
-            if 'error' in eval_response:
-                return Evaluation(
-                    is_acceptable=False,
-                    score=1,
-                    feedback=f"Evaluation error: {eval_response['error']}",
-                    strengths=[],
-                    weaknesses=["Could not evaluate due to technical error"],
-                    suggestions=["Try again with a different model"]
-                )
-            
-            # Try to parse JSON response
-            eval_data = json.loads(eval_response['content'])
-            return Evaluation(**eval_data)
-            
-        except json.JSONDecodeError:
-            # If JSON parsing fails, create a basic evaluation
+        Unparseable judge output is reported as a failed evaluation instead of
+        being silently treated as acceptable.
+        """
+        if 'error' in eval_response:
             return Evaluation(
-                is_acceptable=True,  # Default to acceptable if we can't evaluate
-                score=7,
-                feedback="Could not parse evaluation response properly",
-                strengths=["Response was generated successfully"],
-                weaknesses=["Could not perform detailed evaluation"],
-                suggestions=["Consider using a different evaluation model"]
+                is_acceptable=False,
+                score=1,
+                feedback=f"Evaluation error: {eval_response['error']}",
+                strengths=[],
+                weaknesses=["Could not evaluate due to technical error"],
+                suggestions=["Try again with a different model"]
             )
-        except Exception as e:
+        
+        try:
+            return Evaluation.model_validate_json(eval_response['content'] or "")
+        except ValidationError as e:
             return Evaluation(
                 is_acceptable=False,
                 score=1,
-                feedback=f"Evaluation failed: {str(e)}",
+                feedback=f"Could not parse evaluation response: {e.errors()[0]['msg'] if e.errors() else e}",
                 strengths=[],
-                weaknesses=["Evaluation system error"],
-                suggestions=["Try again with different parameters"]
+                weaknesses=["Evaluator returned malformed JSON"],
+                suggestions=["Consider using a different evaluation model"]
             )
     
-    def compare_responses(self, user_question: str, 
-                         responses: Dict[str, str]) -> ModelComparison:
-        """Compare multiple model responses and rank them.
+    def _failed_evaluation(self, error: Exception) -> Evaluation:
+        return Evaluation(
+            is_acceptable=False,
+            score=1,
+            feedback=f"Evaluation failed: {str(error)}",
+            strengths=[],
+            weaknesses=["Evaluation system error"],
+            suggestions=["Try again with different parameters"]
+        )
+    
+    def evaluate_response(self, user_question: str, response: str, 
+                         context: Optional[str] = None) -> Evaluation:
+        """Evaluate a single response for quality and appropriateness.
         
         Args:
             user_question: The original user question
-            responses: Dict mapping model names to their responses
+            response: The response to evaluate
+            context: Optional context about what makes a good response
             
         Returns:
-            ModelComparison with ranking and reasoning
+            Evaluation object with detailed feedback
         """
+        messages = [{"role": "user", "content": self._build_evaluation_prompt(user_question, response, context)}]
         
+        try:
+            eval_response = model_manager.generate_response(
+                self.evaluator_model, messages,
+                temperature=self.temperature, response_format=JSON_RESPONSE_FORMAT,
+                caller='evaluator'
+            )
+            return self._parse_evaluation(eval_response)
+        except Exception as e:
+            return self._failed_evaluation(e)
+    
+    async def aevaluate_response(self, user_question: str, response: str,
+                                 context: Optional[str] = None) -> Evaluation:
+        """Async version of evaluate_response"""
+        messages = [{"role": "user", "content": self._build_evaluation_prompt(user_question, response, context)}]
+        
+        try:
+            eval_response = await model_manager.agenerate_response(
+                self.evaluator_model, messages,
+                temperature=self.temperature, response_format=JSON_RESPONSE_FORMAT,
+                caller='evaluator'
+            )
+            return self._parse_evaluation(eval_response)
+        except Exception as e:
+            return self._failed_evaluation(e)
+    
+    async def aevaluate_batch(self, pairs: List[Tuple[str, str]], context: Optional[str] = None,
+                              max_concurrency: Optional[int] = None) -> List[Evaluation]:
+        """Judge many (question, response) pairs concurrently.
+        
+        Args:
+            pairs: List of (user_question, response) tuples
+            context: Optional context applied to every evaluation
+            max_concurrency: Maximum in-flight judge calls (default: self.max_concurrency)
+            
+        Returns:
+            Evaluations in the same order as pairs
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async def _judge(question: str, response: str) -> Evaluation:
+            async with semaphore:
+                return await self.aevaluate_response(question, response, context)
+        
+        return await asyncio.gather(*[_judge(question, response) for question, response in pairs])
+    
+    def evaluate_batch(self, pairs: List[Tuple[str, str]], context: Optional[str] = None,
+                       max_concurrency: Optional[int] = None) -> List[Evaluation]:
+        """Judge many (question, response) pairs concurrently (sync entry point)"""
+        return model_manager.run_sync(self.aevaluate_batch(pairs, context, max_concurrency))
+    
+    def _build_comparison_prompt(self, user_question: str, responses: Dict[str, str]) -> str:
         comparison_prompt = f"""You are an expert evaluator comparing AI model responses.
 
 User Question: {user_question}
@@ -140,35 +189,65 @@ Please compare these responses and provide:
 
 Consider accuracy, helpfulness, clarity, and overall quality.
 Respond with valid JSON only."""
-
-        messages = [{"role": "user", "content": comparison_prompt}]
+        return comparison_prompt
+    
+    def _parse_comparison(self, comparison_response: Dict[str, Any],
+                          responses: Dict[str, str]) -> ModelComparison:
+        if 'error' in comparison_response:
+            # Fallback to simple comparison
+            return self._fallback_comparison(responses, f"Comparison error: {comparison_response['error']}")
+        
+        try:
+            return ModelComparison.model_validate_json(comparison_response['content'] or "")
+        except ValidationError as e:
+            return self._fallback_comparison(responses, f"Could not parse comparison response: {e}")
+    
+    def _fallback_comparison(self, responses: Dict[str, str], reasoning: str) -> ModelComparison:
+        model_names = list(responses.keys())
+        return ModelComparison(
+            best_model=model_names[0] if model_names else "unknown",
+            ranking=model_names,
+            reasoning=reasoning,
+            scores={name: 5 for name in model_names}
+        )
+    
+    def compare_responses(self, user_question: str, 
+                         responses: Dict[str, str]) -> ModelComparison:
+        """Compare multiple model responses and rank them.
+        
+        Args:
+            user_question: The original user question
+            responses: Dict mapping model names to their responses
+            
+        Returns:
+            ModelComparison with ranking and reasoning
+        """
+        messages = [{"role": "user", "content": self._build_comparison_prompt(user_question, responses)}]
         
         try:
             comparison_response = model_manager.generate_response(
-                self.evaluator_model, messages
+                self.evaluator_model, messages,
+                temperature=self.temperature, response_format=JSON_RESPONSE_FORMAT,
+                caller='evaluator'
             )
-            
-            if 'error' in comparison_response:
-                # Fallback to simple comparison
-                model_names = list(responses.keys())
-                return ModelComparison(
-                    best_model=model_names[0] if model_names else "unknown",
-                    ranking=model_names,
-                    reasoning=f"Comparison error: {comparison_response['error']}",
-                    scores={name: 5 for name in model_names}
-                )
-            
-            comparison_data = json.loads(comparison_response['content'])
-            return ModelComparison(**comparison_data)
-            
+            return self._parse_comparison(comparison_response, responses)
         except Exception as e:
-            model_names = list(responses.keys())
-            return ModelComparison(
-                best_model=model_names[0] if model_names else "unknown",
-                ranking=model_names,
-                reasoning=f"Comparison failed: {str(e)}",
-                scores={name: 5 for name in model_names}
+            return self._fallback_comparison(responses, f"Comparison failed: {str(e)}")
+    
+    async def acompare_responses(self, user_question: str,
+                                 responses: Dict[str, str]) -> ModelComparison:
+        """Async version of compare_responses"""
+        messages = [{"role": "user", "content": self._build_comparison_prompt(user_question, responses)}]
+        
+        try:
+            comparison_response = await model_manager.agenerate_response(
+                self.evaluator_model, messages,
+                temperature=self.temperature, response_format=JSON_RESPONSE_FORMAT,
+                caller='evaluator'
             )
+            return self._parse_comparison(comparison_response, responses)
+        except Exception as e:
+            return self._fallback_comparison(responses, f"Comparison failed: {str(e)}")
 
 def run_agent_with_evaluation(user_input: str, model_name: str = "gpt-4o-mini", 
                              max_retries: int = 2) -> Dict[str, Any]:
@@ -213,9 +292,12 @@ def run_agent_with_evaluation(user_input: str, model_name: str = "gpt-4o-mini",
         'final_attempt': True
     }
 
-def run_comparative_analysis(user_input: str, model_names: List[str] = None) -> Dict[str, Any]:
+async def arun_comparative_analysis(user_input: str, model_names: List[str] = None) -> Dict[str, Any]:
     """Run comparative analysis across multiple models with evaluation.
     
+    Generation and judging each run concurrently, so the cost is three
+    serialized stages (generate, judge, compare) instead of 2N+1 calls.
+    
     Args:
         user_input: The user's question
         model_names: List of models to compare (default: all available)
@@ -229,20 +311,23 @@ def run_comparative_analysis(user_input: str, model_names: List[str] = None) ->
     evaluator = ResponseEvaluator()
     
     # Generate responses from all models
-    responses = {}
-    evaluations = {}
+    print(f"Generating responses with {len(model_names)} models...")
+    generated, _ = await gather_with_deadline(
+        {model_name: arun_agent(user_input, model_name, caller='comparison') for model_name in model_names}
+    )
+    responses = {
+        model_name: (f"Agent error: {result}" if isinstance(result, Exception) else result)
+        for model_name, result in generated.items()
+    }
     
-    for model_name in model_names:
-        print(f"Generating response with {model_name}...")
-        response = run_agent(user_input, model_name)
-        evaluation = evaluator.evaluate_response(user_input, response)
-        
-        responses[model_name] = response
-        evaluations[model_name] = evaluation
+    # Evaluate all responses
+    print("Evaluating responses...")
+    batch = await evaluator.aevaluate_batch([(user_input, response) for response in responses.values()])
+    evaluations = dict(zip(responses.keys(), batch))
     
     # Compare all responses
     print("Comparing all responses...")
-    comparison = evaluator.compare_responses(user_input, responses)
+    comparison = await evaluator.acompare_responses(user_input, responses)
     
     return {
         'user_input': user_input,
@@ -252,5 +337,70 @@ def run_comparative_analysis(user_input: str, model_names: List[str] = None) ->
         'model_count': len(model_names)
     }
 
+def run_comparative_analysis(user_input: str, model_names: List[str] = None) -> Dict[str, Any]:
+    """Run comparative analysis across multiple models with evaluation.
+    
+    Args:
+        user_input: The user's question
+        model_names: List of models to compare (default: all available)
+        
+    Returns:
+        Dict with responses, evaluations, and comparison
+    """
+    return model_manager.run_sync(arun_comparative_analysis(user_input, model_names))
+
+async def aevaluate_dataset(input_path: str, model_name: str = "gpt-4o-mini",
+                            output_path: Optional[str] = None,
+                            max_concurrency: int = DEFAULT_EVAL_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Evaluate a JSONL dataset of questions offline.
+    
+    Each line is a JSON object with a "question" and optionally a "response"
+    and "context". Lines without a response are answered with model_name first.
+    
+    Args:
+        input_path: Path to the JSONL dataset
+        model_name: Model used to answer questions that have no response
+        output_path: Optional JSONL path to write one result per line
+        max_concurrency: Maximum concurrent generation and judge calls
+        
+    Returns:
+        List of result dicts (question, response, context, evaluation)
+    """
+    with open(input_path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    
+    evaluator = ResponseEvaluator(max_concurrency=max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def _process(record: Dict[str, Any]) -> Dict[str, Any]:
+        question = record['question']
+        response = record.get('response')
+        if response is None:
+            async with semaphore:
+                response = await arun_agent(question, record.get('model', model_name))
+        async with semaphore:
+            evaluation = await evaluator.aevaluate_response(question, response, record.get('context'))
+        return {
+            'question': question,
+            'response': response,
+            'context': record.get('context'),
+            'evaluation': evaluation.model_dump()
+        }
+    
+    results = await asyncio.gather(*[_process(record) for record in records])
+    
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    
+    return results
+
+def evaluate_dataset(input_path: str, model_name: str = "gpt-4o-mini",
+                     output_path: Optional[str] = None,
+                     max_concurrency: int = DEFAULT_EVAL_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Evaluate a JSONL dataset of questions offline (sync entry point)"""
+    return model_manager.run_sync(aevaluate_dataset(input_path, model_name, output_path, max_concurrency))
+
 # Global evaluator instance
 evaluator = ResponseEvaluator() 
\ No newline at end of file
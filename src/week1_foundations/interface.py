@@ -2,8 +2,8 @@
 Gradio Web Interface for AI Agents System
 """
 import gradio as gr
-from typing import List, Tuple, Dict, Any
-from week1_foundations.agent import run_agent, run_agent_with_multiple_models
+from typing import List, Tuple, Dict, Any, Iterator
+from week1_foundations.agent import run_agent, stream_agent, run_agent_with_multiple_models
 from week1_foundations.evaluation import run_agent_with_evaluation, run_comparative_analysis
 from week1_foundations.models import model_manager
 import os
@@ -25,6 +25,20 @@ class AgentInterface:
         except Exception as e:
             return f"Error: {str(e)}"
     
+    def simple_chat_stream(self, message: str, model: str) -> Iterator[str]:
+        """Simple chat interface that renders tokens as they arrive"""
+        if not message.strip():
+            yield "Please enter a message"
+            return
+        
+        response = ""
+        try:
+            for delta in stream_agent(message, model):
+                response += delta
+                yield response
+        except Exception as e:
+            yield f"Error: {str(e)}"
+    
     def chat_with_evaluation(self, message: str, model: str) -> Tuple[str, str]:
         """Chat with automatic evaluation"""
         if not message.strip():
@@ -137,6 +151,47 @@ class AgentInterface:
             else:
                 status_md += f"- **{name}**: Not configured (optional)\n"
         
+        status_md += "\n## Response Cache\n\n"
+        
+        if model_manager.cache is not None:
+            cache_stats = model_manager.cache.stats()
+            status_md += f"- **Hits / Misses**: {cache_stats['hits']} / {cache_stats['misses']}\n"
+            status_md += f"- **Hit Rate**: {cache_stats['hit_rate']:.0%}\n"
+            status_md += f"- **Entries**: {cache_stats['memory_entries']} in memory"
+            if 'disk_entries' in cache_stats:
+                status_md += f", {cache_stats['disk_entries']} on disk"
+            status_md += "\n"
+        else:
+            status_md += "- **Status**: Disabled\n"
+        
+        status_md += "\n## Live Metrics\n\n"
+        
+        by_model = model_manager.metrics.summary('model')
+        if by_model:
+            status_md += "| Model | Requests | Errors | Tokens (in/out) | Cost | p50 | p95 | Req/min |\n"
+            status_md += "|---|---|---|---|---|---|---|---|\n"
+            for model_name, row in by_model.items():
+                status_md += (
+                    f"| {model_name} | {row['requests']} | {row['errors']} "
+                    f"| {row['prompt_tokens']} / {row['completion_tokens']} | ${row['cost_usd']:.4f} "
+                    f"| {row['latency_p50']:.2f}s | {row['latency_p95']:.2f}s "
+                    f"| {row['requests_per_minute']:.1f} |\n"
+                )
+        
+            status_md += "\n**Cost by caller:**\n\n"
+            for caller, row in model_manager.metrics.summary('caller').items():
+                status_md += f"- **{caller}**: ${row['cost_usd']:.4f} ({row['requests']} requests)\n"
+        else:
+            status_md += "- No model calls recorded yet\n"
+        
+        status_md += "\n## Provider Health\n\n"
+        
+        if model_manager.breakers:
+            for provider, breaker in model_manager.breakers.items():
+                status_md += f"- **{provider}**: circuit {breaker.state.replace('_', '-')}\n"
+        else:
+            status_md += "- No provider calls yet\n"
+        
         status_md += "\n## System Health\n\n"
         
         if available_models:
@@ -210,7 +265,7 @@ def create_interface() -> gr.Blocks:
             )
             
             chat_button.click(
-                interface.simple_chat,
+                interface.simple_chat_stream,
                 inputs=[chat_input, chat_model],
                 outputs=[chat_output]
             )
@@ -0,0 +1,193 @@
+"""
+Usage Metrics - Token, cost and latency accounting for model calls
+"""
+import json
+import time
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+# USD per 1M tokens: (input, cached input, output), keyed on provider model_id
+PRICING = {
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'gpt-4o': (2.50, 1.25, 10.00),
+    'gpt-4-turbo': (10.00, 10.00, 30.00),
+    'claude-3-sonnet-20240229': (3.00, 0.30, 15.00),
+    'claude-3-haiku-20240307': (0.25, 0.03, 1.25),
+    'gemini-2.0-flash': (0.10, 0.025, 0.40),
+    'deepseek-chat': (0.27, 0.07, 1.10),
+}
+
+# Number of recent latency samples kept per series for percentiles
+LATENCY_WINDOW = 1000
+
+# Window in seconds used for the live throughput figure
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+def calculate_cost(model_id: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Return the USD cost of a call (0 for models missing from the pricing table)"""
+    if model_id not in PRICING:
+        return 0.0
+    input_price, cached_price, output_price = PRICING[model_id]
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * input_price + cached_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+class UsageSeries:
+    """Aggregated usage for one (model, provider, caller) combination"""
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost_usd = 0.0
+        self.latency_sum = 0.0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.timestamps: deque = deque()
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        recent = sum(1 for ts in self.timestamps if ts >= now - THROUGHPUT_WINDOW_SECONDS)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'cache_hits': self.cache_hits,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cached_tokens': self.cached_tokens,
+            'cost_usd': self.cost_usd,
+            'latency_sum': self.latency_sum,
+            'latency_p50': _percentile(latencies, 0.50),
+            'latency_p95': _percentile(latencies, 0.95),
+            'requests_per_minute': recent * 60.0 / THROUGHPUT_WINDOW_SECONDS,
+        }
+
+class MetricsRegistry:
+    """In-process registry of per-call usage, aggregated per model, provider and caller"""
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str, str], UsageSeries] = {}
+        self._lock = threading.Lock()
+
+    def _get_series(self, model: str, provider: str, caller: str) -> UsageSeries:
+        key = (model, provider, caller)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = UsageSeries()
+        return series
+
+    def record(self, model: str, provider: str, caller: str, latency: float,
+               prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0,
+               model_id: Optional[str] = None, error: bool = False) -> float:
+        """Record one provider call and return its cost in USD"""
+        cost = calculate_cost(model_id or model, prompt_tokens, completion_tokens, cached_tokens)
+        now = time.time()
+        with self._lock:
+            series = self._get_series(model, provider, caller)
+            series.requests += 1
+            series.errors += int(error)
+            series.prompt_tokens += prompt_tokens
+            series.completion_tokens += completion_tokens
+            series.cached_tokens += cached_tokens
+            series.cost_usd += cost
+            series.latency_sum += latency
+            series.latencies.append(latency)
+            series.timestamps.append(now)
+            while series.timestamps and series.timestamps[0] < now - THROUGHPUT_WINDOW_SECONDS:
+                series.timestamps.popleft()
+        return cost
+
+    def record_cache_hit(self, model: str, provider: str, caller: str) -> None:
+        """Record a response served from the cache (no tokens spent)"""
+        with self._lock:
+            self._get_series(model, provider, caller).cache_hits += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return one dict per (model, provider, caller) series"""
+        now = time.time()
+        with self._lock:
+            return [
+                {'model': model, 'provider': provider, 'caller': caller, **series.snapshot(now)}
+                for (model, provider, caller), series in sorted(self._series.items())
+            ]
+
+    def summary(self, group_by: str = 'model') -> Dict[str, Dict[str, Any]]:
+        """Aggregate the series by 'model', 'provider' or 'caller'"""
+        now = time.time()
+        groups: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            by_group: Dict[str, List[UsageSeries]] = {}
+            for (model, provider, caller), series in self._series.items():
+                name = {'model': model, 'provider': provider, 'caller': caller}[group_by]
+                by_group.setdefault(name, []).append(series)
+
+            for name, members in sorted(by_group.items()):
+                latencies = [latency for series in members for latency in series.latencies]
+                recent = sum(1 for series in members for ts in series.timestamps
+                             if ts >= now - THROUGHPUT_WINDOW_SECONDS)
+                groups[name] = {
+                    'requests': sum(series.requests for series in members),
+                    'errors': sum(series.errors for series in members),
+                    'cache_hits': sum(series.cache_hits for series in members),
+                    'prompt_tokens': sum(series.prompt_tokens for series in members),
+                    'completion_tokens': sum(series.completion_tokens for series in members),
+                    'cached_tokens': sum(series.cached_tokens for series in members),
+                    'cost_usd': sum(series.cost_usd for series in members),
+                    'latency_p50': _percentile(latencies, 0.50),
+                    'latency_p95': _percentile(latencies, 0.95),
+                    'requests_per_minute': recent * 60.0 / THROUGHPUT_WINDOW_SECONDS,
+                }
+        return groups
+
+    def to_json(self) -> str:
+        """Export every series as JSON"""
+        return json.dumps({'series': self.snapshot(), 'by_caller': self.summary('caller')}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Export every series in the Prometheus text exposition format"""
+        counters = [
+            ('llm_requests_total', 'requests', 'Total provider requests'),
+            ('llm_errors_total', 'errors', 'Total failed provider requests'),
+            ('llm_cache_hits_total', 'cache_hits', 'Total responses served from the response cache'),
+            ('llm_prompt_tokens_total', 'prompt_tokens', 'Total prompt tokens'),
+            ('llm_completion_tokens_total', 'completion_tokens', 'Total completion tokens'),
+            ('llm_cached_tokens_total', 'cached_tokens', 'Total cached prompt tokens'),
+            ('llm_cost_usd_total', 'cost_usd', 'Total estimated cost in USD'),
+        ]
+        snapshot = self.snapshot()
+        lines = []
+
+        def labels(row: Dict[str, Any], extra: str = "") -> str:
+            return f'{{model="{row["model"]}",provider="{row["provider"]}",caller="{row["caller"]}"{extra}}}'
+
+        for metric, field, help_text in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for row in snapshot:
+                lines.append(f"{metric}{labels(row)} {row[field]}")
+
+        lines.append("# HELP llm_request_latency_seconds Provider request latency")
+        lines.append("# TYPE llm_request_latency_seconds summary")
+        p50_label, p95_label = ',quantile="0.5"', ',quantile="0.95"'
+        for row in snapshot:
+            lines.append(f"llm_request_latency_seconds{labels(row, p50_label)} {row['latency_p50']}")
+            lines.append(f"llm_request_latency_seconds{labels(row, p95_label)} {row['latency_p95']}")
+            lines.append(f"llm_request_latency_seconds_sum{labels(row)} {row['latency_sum']}")
+            lines.append(f"llm_request_latency_seconds_count{labels(row)} {row['requests']}")
+
+        return "\n".join(lines) + "\n"
+
+# Global registry
+metrics = MetricsRegistry()
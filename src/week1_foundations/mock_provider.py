@@ -0,0 +1,222 @@
+"""
+Deterministic Mock Provider - OpenAI-compatible client for offline tests and benchmarks
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional
+
+# Default JSON answer in JSON mode. It carries the fields of both Evaluation
+# and ModelComparison so either model validates it (extra fields are ignored).
+DEFAULT_JSON_RESPONSE = {
+    "is_acceptable": True,
+    "score": 8,
+    "feedback": "Mock evaluation",
+    "strengths": ["Deterministic"],
+    "weaknesses": [],
+    "suggestions": [],
+    "best_model": "mock-model",
+    "ranking": ["mock-model"],
+    "reasoning": "Mock comparison",
+    "scores": {"mock-model": 8}
+}
+
+class MockProviderError(Exception):
+    """Injected provider failure; status_code mimics the HTTP status of a real API error"""
+    def __init__(self, message: str, status_code: int = 500, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class MockConfig:
+    """Behaviour of the mock provider.
+
+    Args:
+        latency_ms: Simulated latency per request
+        jitter_ms: Random extra latency added on top (seeded)
+        prompt_tokens: Reported prompt tokens (default: estimated from the messages)
+        completion_tokens: Reported completion tokens (default: estimated from the content)
+        response_text: Content returned for plain completions
+        json_response: Object returned when JSON mode is requested
+        tool_call_script: One list of {"name", "arguments"} tool calls per agent turn;
+            turn N is used when the conversation already holds N tool-call messages
+        failure_rate: Fraction of requests that raise MockProviderError
+        failure_status: HTTP status carried by injected failures
+        seed: Seed for jitter and failure injection
+    """
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                 response_text: str = "This is a mock response.",
+                 json_response: Optional[Dict[str, Any]] = None,
+                 tool_call_script: Optional[List[List[Dict[str, Any]]]] = None,
+                 failure_rate: float = 0.0, failure_status: int = 500, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.response_text = response_text
+        self.json_response = json_response if json_response is not None else DEFAULT_JSON_RESPONSE
+        self.tool_call_script = tool_call_script or []
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls) -> 'MockConfig':
+        """Build a config from MOCK_* environment variables"""
+        script = os.getenv('MOCK_TOOL_CALL_SCRIPT')
+        return cls(
+            latency_ms=float(os.getenv('MOCK_LATENCY_MS', '0')),
+            jitter_ms=float(os.getenv('MOCK_JITTER_MS', '0')),
+            completion_tokens=int(os.getenv('MOCK_COMPLETION_TOKENS')) if os.getenv('MOCK_COMPLETION_TOKENS') else None,
+            response_text=os.getenv('MOCK_RESPONSE_TEXT', "This is a mock response."),
+            tool_call_script=json.loads(script) if script else None,
+            failure_rate=float(os.getenv('MOCK_FAILURE_RATE', '0')),
+            failure_status=int(os.getenv('MOCK_FAILURE_STATUS', '500')),
+            seed=int(os.getenv('MOCK_SEED', '0'))
+        )
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class _MockEngine:
+    """Shared request logic for the sync and async clients"""
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._request_count = 0
+
+    def plan(self, params: Dict[str, Any]) -> float:
+        """Count the request, inject failures and return the latency in seconds"""
+        with self._lock:
+            self._request_count += 1
+            jitter = self._random.uniform(0, self.config.jitter_ms) if self.config.jitter_ms else 0.0
+            fail = self.config.failure_rate and self._random.random() < self.config.failure_rate
+        if fail:
+            raise MockProviderError(f"Injected mock failure (status {self.config.failure_status})",
+                                    self.config.failure_status)
+        return (self.config.latency_ms + jitter) / 1000
+
+    def _scripted_tool_calls(self, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        if not params.get('tools'):
+            return None
+        turn = sum(1 for message in params['messages']
+                   if isinstance(message, dict) and message.get('tool_calls'))
+        if turn >= len(self.config.tool_call_script):
+            return None
+        return [
+            {
+                'id': f"call_mock_{turn}_{index}",
+                'type': 'function',
+                'function': {'name': call['name'], 'arguments': json.dumps(call.get('arguments', {}))}
+            }
+            for index, call in enumerate(self.config.tool_call_script[turn])
+        ]
+
+    def message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        tool_calls = self._scripted_tool_calls(params)
+        if tool_calls:
+            return {'role': 'assistant', 'content': None, 'tool_calls': tool_calls}
+        if (params.get('response_format') or {}).get('type') == 'json_object':
+            return {'role': 'assistant', 'content': json.dumps(self.config.json_response)}
+        return {'role': 'assistant', 'content': self.config.response_text}
+
+    def usage(self, params: Dict[str, Any], message: Dict[str, Any]) -> Dict[str, int]:
+        prompt_tokens = self.config.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = sum(_estimate_tokens(str(m.get('content') or '')) for m in params['messages']
+                                if isinstance(m, dict))
+        completion_tokens = self.config.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = _estimate_tokens(message.get('content') or json.dumps(message.get('tool_calls')))
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+
+    def completion(self, params: Dict[str, Any]):
+        from openai.types.chat import ChatCompletion
+        message = self.message(params)
+        return ChatCompletion.model_validate({
+            'id': f"chatcmpl-mock-{self._request_count}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': params['model'],
+            'choices': [{
+                'index': 0,
+                'message': message,
+                'finish_reason': 'tool_calls' if message.get('tool_calls') else 'stop'
+            }],
+            'usage': self.usage(params, message)
+        })
+
+    def chunks(self, params: Dict[str, Any]) -> List[Any]:
+        """Split the completion into streaming chunks (one per word, tool calls in one chunk)"""
+        from openai.types.chat import ChatCompletionChunk
+        message = self.message(params)
+        base = {
+            'id': f"chatcmpl-mock-{self._request_count}",
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': params['model'],
+        }
+        deltas = []
+        if message.get('tool_calls'):
+            deltas.append({'tool_calls': [dict(call, index=index) for index, call in enumerate(message['tool_calls'])]})
+        else:
+            words = message['content'].split(' ')
+            deltas.extend({'content': word if i == 0 else ' ' + word} for i, word in enumerate(words))
+
+        finish_reason = 'tool_calls' if message.get('tool_calls') else 'stop'
+        chunks = [
+            ChatCompletionChunk.model_validate({**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})
+            for delta in deltas
+        ]
+        chunks.append(ChatCompletionChunk.model_validate(
+            {**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish_reason}],
+             'usage': self.usage(params, message)}
+        ))
+        return chunks
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class MockClient:
+    """Sync client exposing client.chat.completions.create like OpenAI"""
+    def __init__(self, config: Optional[MockConfig] = None, engine: Optional[_MockEngine] = None):
+        self.engine = engine or _MockEngine(config or MockConfig())
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+
+    def _create(self, **params):
+        latency = self.engine.plan(params)
+        if params.get('stream'):
+            chunks = self.engine.chunks(params)
+            def stream():
+                for chunk in chunks:
+                    time.sleep(latency / len(chunks))
+                    yield chunk
+            return stream()
+        time.sleep(latency)
+        return self.engine.completion(params)
+
+class AsyncMockClient:
+    """Async client exposing await client.chat.completions.create like AsyncOpenAI"""
+    def __init__(self, config: Optional[MockConfig] = None, engine: Optional[_MockEngine] = None):
+        self.engine = engine or _MockEngine(config or MockConfig())
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+
+    async def _create(self, **params):
+        latency = self.engine.plan(params)
+        await asyncio.sleep(latency)
+        return self.engine.completion(params)
+
+def create_mock_clients(config: Optional[MockConfig] = None):
+    """Create a (sync, async) client pair sharing one engine, so counters and seeds are shared"""
+    engine = _MockEngine(config or MockConfig())
+    return MockClient(engine=engine), AsyncMockClient(engine=engine)
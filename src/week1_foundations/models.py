@@ -2,13 +2,119 @@
 AI Models Manager - Unified interface for multiple AI providers
 """
 import os
-from typing import List, Dict, Any, Optional
+import time
+import asyncio
+import threading
+import importlib.util
+from collections.abc import Mapping
+from typing import List, Dict, Any, Optional, Awaitable, Tuple, Iterator
 from dotenv import load_dotenv
-from openai import OpenAI
+from week1_foundations.cache import ResponseCache, make_cache_key
+from week1_foundations.metrics import MetricsRegistry, metrics as usage_metrics
+from week1_foundations.resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, classify_error
 
 # Load environment variables
 load_dotenv()
 
+# Providers served through the OpenAI chat.completions API
+OPENAI_COMPATIBLE_PROVIDERS = ['openai', 'google', 'deepseek', 'mock']
+SUPPORTED_PROVIDERS = OPENAI_COMPATIBLE_PROVIDERS + ['anthropic']
+
+# Start of the assistant turn that forces Anthropic models to answer with a JSON object
+ANTHROPIC_JSON_PREFILL = '{'
+
+# Fan-out defaults for multi-model comparisons
+DEFAULT_PROVIDER_CONCURRENCY = 4
+DEFAULT_COMPARE_TIMEOUT = 60.0
+
+def _wants_json(response_format: Optional[Dict[str, Any]]) -> bool:
+    return bool(response_format) and response_format.get('type') in ('json_object', 'json_schema')
+
+async def gather_with_deadline(tasks: Dict[str, Awaitable],
+                               timeout: Optional[float] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """Run awaitables concurrently and collect whatever finishes before the deadline.
+    
+    Args:
+        tasks: Dict mapping a key (usually a model name) to an awaitable
+        timeout: Global deadline in seconds (None waits for everything)
+        
+    Returns:
+        Tuple of (results by key, keys that timed out and were cancelled)
+    """
+    if not tasks:
+        return {}, []
+    
+    running = {asyncio.ensure_future(aw): key for key, aw in tasks.items()}
+    done, pending = await asyncio.wait(running.keys(), timeout=timeout)
+    
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    results = {}
+    for task in done:
+        key = running[task]
+        results[key] = task.exception() or task.result()
+    
+    # Preserve the caller's ordering
+    ordered = {key: results[key] for key in tasks if key in results}
+    timed_out = [key for key in tasks if key not in results]
+    return ordered, timed_out
+
+def _openai_factory(api_key: str, base_url: Optional[str] = None, async_client: bool = False):
+    """Return a callable that builds an OpenAI-compatible client on demand"""
+    def factory():
+        from openai import OpenAI, AsyncOpenAI
+        client_class = AsyncOpenAI if async_client else OpenAI
+        return client_class(api_key=api_key, base_url=base_url)
+    return factory
+
+def _anthropic_factory(api_key: str, async_client: bool = False):
+    """Return a callable that builds an Anthropic client on demand"""
+    def factory():
+        from anthropic import Anthropic, AsyncAnthropic
+        client_class = AsyncAnthropic if async_client else Anthropic
+        return client_class(api_key=api_key)
+    return factory
+
+class LazyClientMap(Mapping):
+    """Provider -> client mapping that builds each client on first access.
+    
+    Membership and iteration only look at configured providers, so checks
+    like `'openai' in clients` never construct a client.
+    """
+    def __init__(self):
+        self._factories: Dict[str, Any] = {}
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, provider: str, factory) -> None:
+        self._factories[provider] = factory
+        self._clients.pop(provider, None)
+    
+    def is_initialized(self, provider: str) -> bool:
+        return provider in self._clients
+    
+    def __getitem__(self, provider: str) -> Any:
+        client = self._clients.get(provider)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(provider)
+                if client is None:
+                    client = self._factories[provider]()
+                    self._clients[provider] = client
+        return client
+    
+    def __contains__(self, provider: object) -> bool:
+        return provider in self._factories
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self) -> int:
+        return len(self._factories)
+
 class ModelConfig:
     """Configuration for AI models"""
     def __init__(self, name: str, provider: str, model_id: str, max_tokens: int = 1000, 
@@ -23,31 +129,45 @@ class ModelConfig:
 class ModelManager:
     """Manages multiple AI model providers"""
     
-    def __init__(self):
-        self.clients = {}
+    def __init__(self, cache: Optional[ResponseCache] = None, metrics: Optional[MetricsRegistry] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        self.clients = LazyClientMap()
+        self.async_clients = LazyClientMap()
         self.models = {}
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else usage_metrics
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
         self._initialize_clients()
         self._initialize_models()
     
     def _initialize_clients(self):
-        """Initialize API clients for different providers"""
+        """Register API client factories for different providers.
+        
+        Clients (and the provider SDK imports) are created lazily on first use,
+        so importing this module stays cheap for short-lived processes.
+        """
         
         # OpenAI Client
         openai_key = os.getenv('OPENAI_API_KEY')
         if openai_key:
-            self.clients['openai'] = OpenAI(api_key=openai_key)
-            print("OpenAI client initialized")
+            self.clients.register('openai', _openai_factory(openai_key))
+            self.async_clients.register('openai', _openai_factory(openai_key, async_client=True))
+            print("OpenAI client configured")
         else:
             print("OpenAI API key not found")
         
         # Anthropic Client (prepared for future)
         anthropic_key = os.getenv('ANTHROPIC_API_KEY')
         if anthropic_key:
-            try:
-                from anthropic import Anthropic
-                self.clients['anthropic'] = Anthropic(api_key=anthropic_key)
-                print("Anthropic client initialized")
-            except ImportError:
+            if importlib.util.find_spec('anthropic') is not None:
+                self.clients.register('anthropic', _anthropic_factory(anthropic_key))
+                self.async_clients.register('anthropic', _anthropic_factory(anthropic_key, async_client=True))
+                print("Anthropic client configured")
+            else:
                 print("Anthropic library not installed")
         else:
             print("Anthropic API key not found")
@@ -55,30 +175,28 @@ class ModelManager:
         # Google Gemini Client (prepared for future)
         google_key = os.getenv('GOOGLE_API_KEY')
         if google_key:
-            try:
-                self.clients['google'] = OpenAI(
-                    api_key=google_key,
-                    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-                )
-                print("Google Gemini client initialized")
-            except Exception as e:
-                print(f"Google Gemini client failed: {e}")
+            google_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
+            self.clients.register('google', _openai_factory(google_key, google_url))
+            self.async_clients.register('google', _openai_factory(google_key, google_url, async_client=True))
+            print("Google Gemini client configured")
         else:
             print("Google API key not found")
         
         # DeepSeek Client (prepared for future)
         deepseek_key = os.getenv('DEEPSEEK_API_KEY')
         if deepseek_key:
-            try:
-                self.clients['deepseek'] = OpenAI(
-                    api_key=deepseek_key,
-                    base_url="https://api.deepseek.com/v1"
-                )
-                print("DeepSeek client initialized")
-            except Exception as e:
-                print(f"DeepSeek client failed: {e}")
+            deepseek_url = "https://api.deepseek.com/v1"
+            self.clients.register('deepseek', _openai_factory(deepseek_key, deepseek_url))
+            self.async_clients.register('deepseek', _openai_factory(deepseek_key, deepseek_url, async_client=True))
+            print("DeepSeek client configured")
         else:
             print("DeepSeek API key not found")
+        
+        # Mock Client (offline tests and benchmarks)
+        if os.getenv('MOCK_PROVIDER_ENABLED', 'false').strip().lower() == 'true':
+            from week1_foundations.mock_provider import MockConfig
+            self._register_mock_clients(MockConfig.from_env())
+            print("Mock client configured")
     
     def _initialize_models(self):
         """Initialize available models configuration"""
@@ -109,6 +227,35 @@ class ModelManager:
             self.models.update({
                 'deepseek-chat': ModelConfig('DeepSeek Chat', 'deepseek', 'deepseek-chat', 4000, 0.7, True),
             })
+        
+        # Mock Models (offline tests and benchmarks)
+        if 'mock' in self.clients:
+            self.models.update({
+                'mock-model': ModelConfig('Mock Model', 'mock', 'mock-model', 4000, 0.7, True),
+            })
+    
+    def _register_mock_clients(self, config) -> None:
+        from week1_foundations.mock_provider import create_mock_clients
+        sync_client, async_client = create_mock_clients(config)
+        self.clients.register('mock', lambda: sync_client)
+        self.async_clients.register('mock', lambda: async_client)
+    
+    def register_mock_provider(self, config=None, model_names: List[str] = None) -> List[str]:
+        """Register the deterministic mock provider at runtime.
+        
+        Args:
+            config: MockConfig controlling latency, tokens, tool-call scripts and failures
+            model_names: Names of the mock models to expose (default: ['mock-model'])
+            
+        Returns:
+            The registered model names
+        """
+        from week1_foundations.mock_provider import MockConfig
+        self._register_mock_clients(config or MockConfig())
+        model_names = model_names or ['mock-model']
+        for model_name in model_names:
+            self.models[model_name] = ModelConfig(f'Mock ({model_name})', 'mock', model_name, 4000, 0.7, True)
+        return model_names
     
     def get_available_models(self) -> List[str]:
         """Get list of available model names"""
@@ -118,84 +265,550 @@ class ModelManager:
         """Get configuration for a specific model"""
         return self.models.get(model_name)
     
+    def _resolve_sampling(self, config: ModelConfig, temperature: Optional[float],
+                          max_tokens: Optional[int]) -> Tuple[float, int]:
+        """Apply per-call overrides on top of the model configuration"""
+        return (
+            config.temperature if temperature is None else temperature,
+            config.max_tokens if max_tokens is None else max_tokens
+        )
+    
+    def _build_openai_params(self, config: ModelConfig, messages: List[Dict[str, str]],
+                             tools: Optional[List[Dict]] = None, temperature: Optional[float] = None,
+                             max_tokens: Optional[int] = None,
+                             response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build chat.completions parameters for OpenAI-compatible providers"""
+        temperature, max_tokens = self._resolve_sampling(config, temperature, max_tokens)
+        params = {
+            'model': config.model_id,
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': temperature
+        }
+        
+        if tools:
+            params['tools'] = tools
+            params['tool_choice'] = 'auto'
+        
+        if response_format:
+            params['response_format'] = response_format
+        
+        return params
+    
+    def _build_anthropic_params(self, config: ModelConfig, messages: List[Dict[str, str]],
+                                temperature: Optional[float] = None,
+                                max_tokens: Optional[int] = None,
+                                response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build messages.create parameters for Anthropic.
+        
+        Anthropic has no JSON mode, so a JSON response_format is enforced by
+        prefilling the reply with ANTHROPIC_JSON_PREFILL; the model can then
+        only continue a JSON object.
+        """
+        temperature, max_tokens = self._resolve_sampling(config, temperature, max_tokens)
+        if _wants_json(response_format):
+            messages = list(messages) + [{'role': 'assistant', 'content': ANTHROPIC_JSON_PREFILL}]
+        return {
+            'model': config.model_id,
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': temperature
+        }
+    
+    def _format_openai_response(self, model_name: str, config: ModelConfig, response) -> Dict[str, Any]:
+        """Normalize an OpenAI-compatible completion into the response dict"""
+        return {
+            'model': model_name,
+            'provider': config.provider,
+            'content': response.choices[0].message.content,
+            'finish_reason': response.choices[0].finish_reason,
+            'tool_calls': response.choices[0].message.tool_calls,
+            'message': response.choices[0].message
+        }
+    
+    def _format_anthropic_response(self, model_name: str, config: ModelConfig, response,
+                                   response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Normalize an Anthropic message into the response dict"""
+        content = response.content[0].text
+        if _wants_json(response_format):
+            # Restore the prefilled opening brace and drop any prose after the object
+            content = ANTHROPIC_JSON_PREFILL + content
+            content = content[:content.rfind('}') + 1] or content
+        return {
+            'model': model_name,
+            'provider': config.provider,
+            'content': content,
+            'finish_reason': 'stop',
+            'tool_calls': None,
+            'message': response
+        }
+    
+    def _format_error(self, model_name: str, config: ModelConfig, error: Exception) -> Dict[str, Any]:
+        """Normalize an exception into the error response dict"""
+        return {
+            'model': model_name,
+            'provider': config.provider,
+            'error': str(error),
+            'error_type': classify_error(error),
+            'content': f"Error with {model_name}: {str(error)}"
+        }
+    
+    def breaker(self, provider: str) -> CircuitBreaker:
+        """Return the circuit breaker guarding a provider"""
+        breaker = self.breakers.get(provider)
+        if breaker is None:
+            with self._breakers_lock:
+                breaker = self.breakers.setdefault(provider, CircuitBreaker.from_env())
+        return breaker
+    
+    def _fallback_model(self, model_name: str) -> Optional[str]:
+        """Next available model, in configuration order, on a provider whose circuit is not open"""
+        provider = self.models[model_name].provider
+        names = self.get_available_models()
+        start = names.index(model_name) + 1 if model_name in names else 0
+        for name in names[start:] + names[:start]:
+            candidate = self.models[name].provider
+            if candidate != provider and not self.breaker(candidate).is_open:
+                return name
+        return None
+    
+    def _call_with_retries(self, config: ModelConfig, call) -> Any:
+        """Call a provider, backing off on transient errors, behind the provider's circuit breaker"""
+        breaker = self.breaker(config.provider)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(config.provider, breaker.retry_in())
+            try:
+                response = call()
+            except Exception as e:
+                kind = classify_error(e)
+                breaker.record_failure(kind)
+                if not self.retry_policy.should_retry(kind, attempt):
+                    raise
+                delay = self.retry_policy.delay(attempt, e)
+                print(f"{config.provider} {kind}, retrying in {delay:.1f}s "
+                      f"({attempt + 1}/{self.retry_policy.max_retries})")
+                time.sleep(delay)
+                attempt += 1
+            except BaseException:
+                # Cancelled or interrupted: no outcome, so don't hold the half-open probe
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return response
+    
+    async def _acall_with_retries(self, config: ModelConfig, call) -> Any:
+        """Async version of _call_with_retries; call returns a fresh awaitable per attempt"""
+        breaker = self.breaker(config.provider)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(config.provider, breaker.retry_in())
+            try:
+                response = await call()
+            except Exception as e:
+                kind = classify_error(e)
+                breaker.record_failure(kind)
+                if not self.retry_policy.should_retry(kind, attempt):
+                    raise
+                delay = self.retry_policy.delay(attempt, e)
+                print(f"{config.provider} {kind}, retrying in {delay:.1f}s "
+                      f"({attempt + 1}/{self.retry_policy.max_retries})")
+                await asyncio.sleep(delay)
+                attempt += 1
+            except BaseException:
+                # Cancelled or interrupted: no outcome, so don't hold the half-open probe
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return response
+    
+    def _extract_usage(self, config: ModelConfig, usage) -> Dict[str, int]:
+        """Normalize a provider usage object into prompt/completion/cached token counts"""
+        if usage is None:
+            return {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0}
+        
+        if config.provider == 'anthropic':
+            return {
+                'prompt_tokens': usage.input_tokens or 0,
+                'completion_tokens': usage.output_tokens or 0,
+                'cached_tokens': getattr(usage, 'cache_read_input_tokens', None) or 0
+            }
+        
+        details = getattr(usage, 'prompt_tokens_details', None)
+        return {
+            'prompt_tokens': usage.prompt_tokens or 0,
+            'completion_tokens': usage.completion_tokens or 0,
+            'cached_tokens': getattr(details, 'cached_tokens', None) or 0
+        }
+    
+    def _record_usage(self, model_name: str, config: ModelConfig, caller: str, started: float,
+                      result: Dict[str, Any], usage: Optional[Dict[str, int]] = None) -> None:
+        """Record latency, tokens and cost of a provider call and attach them to the result"""
+        latency = time.perf_counter() - started
+        usage = usage or {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0}
+        cost = self.metrics.record(
+            model_name, config.provider, caller, latency,
+            prompt_tokens=usage['prompt_tokens'],
+            completion_tokens=usage['completion_tokens'],
+            cached_tokens=usage['cached_tokens'],
+            model_id=config.model_id,
+            error='error' in result
+        )
+        result['latency'] = latency
+        result['usage'] = {**usage, 'cost_usd': cost}
+    
+    def _cache_key(self, config: ModelConfig, messages: List[Dict[str, str]], tools: Optional[List[Dict]],
+                   temperature: Optional[float], max_tokens: Optional[int],
+                   use_cache: Optional[bool], response_format: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Return the cache key for a call, or None if the call should bypass the cache"""
+        if self.cache is None or use_cache is False:
+            return None
+        temperature, max_tokens = self._resolve_sampling(config, temperature, max_tokens)
+        if use_cache is None and not self.cache.should_cache(temperature):
+            return None
+        return make_cache_key(config.model_id, messages, tools, temperature, max_tokens, response_format)
+    
+    def _cache_store(self, key: Optional[str], result: Dict[str, Any]) -> None:
+        """Store a successful response in the cache (SDK objects are dumped to JSON)"""
+        if key is None or 'error' in result:
+            return
+        # Latency and cost belong to the original call, not to later cache hits
+        data = {k: v for k, v in result.items() if k not in ('latency', 'usage', 'cached')}
+        if hasattr(data.get('message'), 'model_dump'):
+            data['message'] = data['message'].model_dump()
+        data['tool_calls'] = [call.model_dump() for call in data['tool_calls']] if data.get('tool_calls') else None
+        self.cache.set(key, data)
+    
+    def _cache_lookup(self, key: Optional[str], config: ModelConfig,
+                      caller: str = 'direct') -> Optional[Dict[str, Any]]:
+        """Return a cached response with its SDK message object rebuilt, or None on a miss.
+        
+        A hit reports its own lookup latency and zero tokens and cost.
+        """
+        if key is None:
+            return None
+        started = time.perf_counter()
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        
+        if config.provider == 'anthropic':
+            from anthropic.types import Message
+            data['message'] = Message.model_validate(data['message'])
+        else:
+            from openai.types.chat import ChatCompletionMessage
+            data['message'] = ChatCompletionMessage.model_validate(data['message'])
+            data['tool_calls'] = data['message'].tool_calls
+        
+        data['cached'] = True
+        data['latency'] = time.perf_counter() - started
+        data['usage'] = {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0, 'cost_usd': 0.0}
+        self.metrics.record_cache_hit(data['model'], config.provider, caller)
+        return data
+    
     def generate_response(self, model_name: str, messages: List[Dict[str, str]], 
-                         tools: Optional[List[Dict]] = None) -> Dict[str, Any]:
-        """Generate response using specified model"""
+                         tools: Optional[List[Dict]] = None, temperature: Optional[float] = None,
+                         max_tokens: Optional[int] = None, use_cache: Optional[bool] = None,
+                         response_format: Optional[Dict[str, Any]] = None,
+                         caller: str = 'direct', fallback: bool = True) -> Dict[str, Any]:
+        """Generate response using specified model.
+        
+        Args:
+            model_name: Model to use for generation
+            messages: Conversation messages
+            tools: Optional tool schemas
+            temperature: Override the model's configured temperature
+            max_tokens: Override the model's configured max_tokens
+            use_cache: Force (True) or skip (False) the response cache; by default
+                only deterministic (temperature 0) calls are cached
+            response_format: Structured output mode, e.g. {"type": "json_object"}
+                (OpenAI-compatible providers only)
+            caller: Label used to aggregate usage metrics (e.g. 'agent', 'evaluator')
+            fallback: When the provider's circuit is open, answer with the next
+                configured model on a healthy provider ('fallback_from' is set)
+        
+        Transient errors (rate limits, timeouts, 5xx) are retried with jittered
+        exponential backoff that honors Retry-After before an error dict is returned.
+        """
         
         if model_name not in self.models:
             raise ValueError(f"Model {model_name} not available")
         
         config = self.models[model_name]
-        client = self.clients[config.provider]
+        if config.provider not in SUPPORTED_PROVIDERS:
+            raise ValueError(f"Provider {config.provider} of model {model_name} is not supported")
+        
+        cache_key = self._cache_key(config, messages, tools, temperature, max_tokens, use_cache, response_format)
+        cached = self._cache_lookup(cache_key, config, caller)
+        if cached is not None:
+            return cached
         
+        started = time.perf_counter()
         try:
+            client = self.clients[config.provider]
+            
             # Handle different providers
-            if config.provider == 'openai' or config.provider in ['google', 'deepseek']:
-                params = {
-                    'model': config.model_id,
-                    'messages': messages,
-                    'max_tokens': config.max_tokens,
-                    'temperature': config.temperature
-                }
+            if config.provider in OPENAI_COMPATIBLE_PROVIDERS:
+                params = self._build_openai_params(config, messages, tools, temperature, max_tokens, response_format)
+                response = self._call_with_retries(config, lambda: client.chat.completions.create(**params))
+                result = self._format_openai_response(model_name, config, response)
+                usage = self._extract_usage(config, response.usage)
+            
+            elif config.provider == 'anthropic':
+                # Anthropic has different API structure
+                params = self._build_anthropic_params(config, messages, temperature, max_tokens, response_format)
+                response = self._call_with_retries(config, lambda: client.messages.create(**params))
+                result = self._format_anthropic_response(model_name, config, response, response_format)
+                usage = self._extract_usage(config, response.usage)
+            
+        except Exception as e:
+            result = self._format_error(model_name, config, e)
+            self._record_usage(model_name, config, caller, started, result)
+            fallback_model = None
+            if fallback and self.breaker(config.provider).is_open:
+                fallback_model = self._fallback_model(model_name)
+            if fallback_model:
+                print(f"Circuit open for {config.provider}, falling back from {model_name} to {fallback_model}")
+                result = self.generate_response(fallback_model, messages, tools, temperature, max_tokens,
+                                                use_cache, response_format, caller, fallback=False)
+                result['fallback_from'] = model_name
+            return result
+        
+        self._record_usage(model_name, config, caller, started, result, usage)
+        self._cache_store(cache_key, result)
+        return result
+    
+    async def agenerate_response(self, model_name: str, messages: List[Dict[str, str]],
+                                 tools: Optional[List[Dict]] = None, temperature: Optional[float] = None,
+                                 max_tokens: Optional[int] = None, use_cache: Optional[bool] = None,
+                                 response_format: Optional[Dict[str, Any]] = None,
+                                 caller: str = 'direct', fallback: bool = True) -> Dict[str, Any]:
+        """Async version of generate_response using the AsyncOpenAI/AsyncAnthropic clients"""
+        
+        if model_name not in self.models:
+            raise ValueError(f"Model {model_name} not available")
+        
+        config = self.models[model_name]
+        if config.provider not in SUPPORTED_PROVIDERS:
+            raise ValueError(f"Provider {config.provider} of model {model_name} is not supported")
+        
+        cache_key = self._cache_key(config, messages, tools, temperature, max_tokens, use_cache, response_format)
+        cached = self._cache_lookup(cache_key, config, caller)
+        if cached is not None:
+            return cached
+        
+        started = time.perf_counter()
+        try:
+            client = self.async_clients[config.provider]
+            
+            if config.provider in OPENAI_COMPATIBLE_PROVIDERS:
+                params = self._build_openai_params(config, messages, tools, temperature, max_tokens, response_format)
+                response = await self._acall_with_retries(config, lambda: client.chat.completions.create(**params))
+                result = self._format_openai_response(model_name, config, response)
+                usage = self._extract_usage(config, response.usage)
+            
+            elif config.provider == 'anthropic':
+                params = self._build_anthropic_params(config, messages, temperature, max_tokens, response_format)
+                response = await self._acall_with_retries(config, lambda: client.messages.create(**params))
+                result = self._format_anthropic_response(model_name, config, response, response_format)
+                usage = self._extract_usage(config, response.usage)
+            
+        except Exception as e:
+            result = self._format_error(model_name, config, e)
+            self._record_usage(model_name, config, caller, started, result)
+            fallback_model = None
+            if fallback and self.breaker(config.provider).is_open:
+                fallback_model = self._fallback_model(model_name)
+            if fallback_model:
+                print(f"Circuit open for {config.provider}, falling back from {model_name} to {fallback_model}")
+                result = await self.agenerate_response(fallback_model, messages, tools, temperature, max_tokens,
+                                                       use_cache, response_format, caller, fallback=False)
+                result['fallback_from'] = model_name
+            return result
+        
+        self._record_usage(model_name, config, caller, started, result, usage)
+        self._cache_store(cache_key, result)
+        return result
+    
+    def stream_response(self, model_name: str, messages: List[Dict[str, str]],
+                        tools: Optional[List[Dict]] = None, temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None, caller: str = 'direct') -> Iterator[Dict[str, Any]]:
+        """Stream a response, yielding events as they arrive.
+        
+        Yields dicts with a 'type' key:
+        - 'content': a text delta in 'delta'
+        - 'done': the final response dict (same shape as generate_response),
+          with tool calls assembled from the streamed deltas
+        - 'error': the error response dict
+        
+        Streaming responses bypass the response cache. Only opening the stream is
+        retried; errors after the first chunk are reported as an 'error' event.
+        """
+        
+        if model_name not in self.models:
+            raise ValueError(f"Model {model_name} not available")
+        
+        config = self.models[model_name]
+        if config.provider not in SUPPORTED_PROVIDERS:
+            raise ValueError(f"Provider {config.provider} of model {model_name} is not supported")
+        
+        started = time.perf_counter()
+        try:
+            client = self.clients[config.provider]
+            
+            if config.provider in OPENAI_COMPATIBLE_PROVIDERS:
+                params = self._build_openai_params(config, messages, tools, temperature, max_tokens)
+                params['stream'] = True
+                params['stream_options'] = {'include_usage': True}
                 
-                if tools:
-                    params['tools'] = tools
-                    params['tool_choice'] = 'auto'
+                content_parts = []
+                tool_call_parts: Dict[int, Dict[str, Any]] = {}
+                finish_reason = None
+                usage = None
                 
-                response = client.chat.completions.create(**params)
+                stream = self._call_with_retries(config, lambda: client.chat.completions.create(**params))
+                for chunk in stream:
+                    # With include_usage the final chunk carries the token counts
+                    if getattr(chunk, 'usage', None):
+                        usage = self._extract_usage(config, chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    delta = choice.delta
+                    
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield {'type': 'content', 'delta': delta.content}
+                    
+                    # Tool call arguments arrive in fragments keyed by index
+                    for tool_delta in delta.tool_calls or []:
+                        part = tool_call_parts.setdefault(
+                            tool_delta.index,
+                            {'id': None, 'type': 'function', 'function': {'name': '', 'arguments': ''}}
+                        )
+                        if tool_delta.id:
+                            part['id'] = tool_delta.id
+                        if tool_delta.function:
+                            if tool_delta.function.name:
+                                part['function']['name'] += tool_delta.function.name
+                            if tool_delta.function.arguments:
+                                part['function']['arguments'] += tool_delta.function.arguments
+                    
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
                 
-                return {
+                from openai.types.chat import ChatCompletionMessage
+                message = ChatCompletionMessage.model_validate({
+                    'role': 'assistant',
+                    'content': ''.join(content_parts) or None,
+                    'tool_calls': [tool_call_parts[i] for i in sorted(tool_call_parts)] or None
+                })
+                
+                result = {
                     'model': model_name,
                     'provider': config.provider,
-                    'content': response.choices[0].message.content,
-                    'finish_reason': response.choices[0].finish_reason,
-                    'tool_calls': response.choices[0].message.tool_calls,
-                    'message': response.choices[0].message
+                    'content': message.content,
+                    'finish_reason': finish_reason,
+                    'tool_calls': message.tool_calls,
+                    'message': message
                 }
+                self._record_usage(model_name, config, caller, started, result, usage)
+                yield {'type': 'done', **result}
             
             elif config.provider == 'anthropic':
-                # Anthropic has different API structure
-                response = client.messages.create(
-                    model=config.model_id,
-                    messages=messages,
-                    max_tokens=config.max_tokens,
-                    temperature=config.temperature
-                )
+                params = self._build_anthropic_params(config, messages, temperature, max_tokens)
+                # Entering the stream manager sends the request, so that is the step retried
+                stream = self._call_with_retries(config, lambda: client.messages.stream(**params).__enter__())
+                with stream:
+                    for text in stream.text_stream:
+                        yield {'type': 'content', 'delta': text}
+                    response = stream.get_final_message()
                 
-                return {
-                    'model': model_name,
-                    'provider': config.provider,
-                    'content': response.content[0].text,
-                    'finish_reason': 'stop',
-                    'tool_calls': None,
-                    'message': response
-                }
-            
+                result = self._format_anthropic_response(model_name, config, response)
+                self._record_usage(model_name, config, caller, started, result,
+                                   self._extract_usage(config, response.usage))
+                yield {'type': 'done', **result}
+        
         except Exception as e:
-            return {
-                'model': model_name,
-                'provider': config.provider,
-                'error': str(e),
-                'content': f"Error with {model_name}: {str(e)}"
-            }
+            result = self._format_error(model_name, config, e)
+            self._record_usage(model_name, config, caller, started, result)
+            yield {'type': 'error', **result}
     
-    def compare_models(self, prompt: str, model_names: List[str] = None) -> List[Dict[str, Any]]:
-        """Compare responses from multiple models"""
+    def provider_semaphores(self, max_concurrency_per_provider: int = DEFAULT_PROVIDER_CONCURRENCY) -> Dict[str, asyncio.Semaphore]:
+        """Create one semaphore per configured provider to cap concurrent requests"""
+        return {provider: asyncio.Semaphore(max_concurrency_per_provider)
+                for provider in self.async_clients}
+    
+    def run_sync(self, coro) -> Any:
+        """Run a coroutine to completion from synchronous code.
+        
+        All sync entry points share one background event loop so the async
+        clients keep their connection pools, and this also works when called
+        from inside a running loop (e.g. Jupyter).
+        """
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True,
+                                 name="model-manager-loop").start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    async def acompare_models(self, prompt: str, model_names: List[str] = None,
+                              timeout: Optional[float] = DEFAULT_COMPARE_TIMEOUT,
+                              max_concurrency_per_provider: int = DEFAULT_PROVIDER_CONCURRENCY) -> List[Dict[str, Any]]:
+        """Compare responses from multiple models concurrently.
         
+        Args:
+            prompt: Prompt sent to every model
+            model_names: Models to compare (default: all available)
+            timeout: Global deadline in seconds; slower models are reported as timed out
+            max_concurrency_per_provider: Maximum in-flight requests per provider
+            
+        Returns:
+            List of response dicts, one per model, in the requested order
+        """
         if model_names is None:
             model_names = self.get_available_models()
         
         messages = [{"role": "user", "content": prompt}]
-        results = []
+        semaphores = self.provider_semaphores(max_concurrency_per_provider)
+        
+        async def _generate(model_name: str) -> Dict[str, Any]:
+            config = self.models[model_name]
+            async with semaphores[config.provider]:
+                return await self.agenerate_response(model_name, messages, caller='comparison', fallback=False)
+        
+        model_names = [name for name in model_names if name in self.models]
+        for model_name in model_names:
+            print(f"Testing with {model_name}...")
         
+        completed, timed_out = await gather_with_deadline(
+            {name: _generate(name) for name in model_names}, timeout
+        )
+        
+        results = []
         for model_name in model_names:
-            if model_name in self.models:
-                print(f"Testing with {model_name}...")
-                result = self.generate_response(model_name, messages)
-                result['model_display'] = self.models[model_name].name
-                results.append(result)
+            config = self.models[model_name]
+            if model_name in timed_out:
+                result = self._format_error(model_name, config, TimeoutError(f"timed out after {timeout}s"))
+                result['timed_out'] = True
+            elif isinstance(completed[model_name], Exception):
+                result = self._format_error(model_name, config, completed[model_name])
+            else:
+                result = completed[model_name]
+            result['model_display'] = config.name
+            results.append(result)
         
         return results
+    
+    def compare_models(self, prompt: str, model_names: List[str] = None,
+                       timeout: Optional[float] = DEFAULT_COMPARE_TIMEOUT) -> List[Dict[str, Any]]:
+        """Compare responses from multiple models"""
+        return self.run_sync(self.acompare_models(prompt, model_names, timeout=timeout))
 
 # Global instance
-model_manager = ModelManager() 
\ No newline at end of file
+model_manager = ModelManager(cache=ResponseCache.from_env()) 
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Provider Resilience - Error classification, retry backoff and per-provider circuit breakers
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Error kinds returned by classify_error
+RATE_LIMIT = 'rate_limit'
+TIMEOUT = 'timeout'
+SERVER_ERROR = 'server_error'
+CONNECTION_ERROR = 'connection_error'
+INVALID_REQUEST = 'invalid_request'
+CIRCUIT_OPEN = 'circuit_open'
+UNKNOWN = 'unknown'
+
+# Transient errors worth retrying; they also count against the circuit breaker
+RETRYABLE_ERRORS = {RATE_LIMIT, TIMEOUT, SERVER_ERROR, CONNECTION_ERROR}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"Circuit open for provider {provider}, retry in {retry_in:.1f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+def classify_error(error: Exception) -> str:
+    """Map a provider SDK exception to one of the error kinds above"""
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OPEN
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return TIMEOUT
+
+    status = _status_code(error)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMIT
+        if status == 408:
+            return TIMEOUT
+        if status >= 500:
+            return SERVER_ERROR
+        if 400 <= status < 500:
+            return INVALID_REQUEST
+
+    # openai/anthropic raise APITimeoutError / APIConnectionError without a status code
+    name = type(error).__name__
+    if 'Timeout' in name:
+        return TIMEOUT
+    if 'Connection' in name or isinstance(error, ConnectionError):
+        return CONNECTION_ERROR
+    return UNKNOWN
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Return the server-requested delay in seconds (Retry-After / retry-after-ms headers)"""
+    explicit = getattr(error, 'retry_after', None)
+    if explicit is not None:
+        return float(explicit)
+
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+
+    retry_ms = headers.get('retry-after-ms')
+    if retry_ms:
+        try:
+            return float(retry_ms) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+class RetryPolicy:
+    """Jittered exponential backoff for transient provider errors.
+
+    Args:
+        max_retries: Retries after the first attempt
+        base_delay: Delay before the first retry, doubled on every attempt
+        max_delay: Upper bound for a single wait, including Retry-After
+    """
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 20.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls) -> 'RetryPolicy':
+        """Build a policy from PROVIDER_RETRY_* environment variables"""
+        return cls(
+            max_retries=int(os.getenv('PROVIDER_RETRY_MAX_RETRIES', '3')),
+            base_delay=float(os.getenv('PROVIDER_RETRY_BASE_DELAY', '0.5')),
+            max_delay=float(os.getenv('PROVIDER_RETRY_MAX_DELAY', '20'))
+        )
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        return kind in RETRYABLE_ERRORS and attempt < self.max_retries
+
+    def delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Seconds to wait before retry number attempt + 1 (full jitter unless the server says otherwise)"""
+        requested = retry_after(error) if error is not None else None
+        if requested is not None:
+            return min(requested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    """Per-provider circuit breaker.
+
+    After ``failure_threshold`` consecutive transient failures the circuit
+    opens and calls fail fast for ``reset_timeout`` seconds. Then a single
+    probe request is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'CircuitBreaker':
+        """Build a breaker from CIRCUIT_BREAKER_* environment variables"""
+        return cls(
+            failure_threshold=int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5')),
+            reset_timeout=float(os.getenv('CIRCUIT_BREAKER_RESET_SECONDS', '30'))
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected (does not consume the half-open probe)"""
+        return self.state == self.OPEN
+
+    def retry_in(self) -> float:
+        with self._lock:
+            return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def release(self) -> None:
+        """Give back a probe that ended without an outcome (cancelled or interrupted)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, kind: str) -> None:
+        """Count a failure; only transient provider errors move the breaker"""
+        with self._lock:
+            if kind not in RETRYABLE_ERRORS:
+                # The provider answered, it just rejected this request
+                if self._state == self.HALF_OPEN:
+                    self._state = self.CLOSED
+                    self._failures = 0
+                self._probe_in_flight = False
+                return
+
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
@@ -0,0 +1,87 @@
+"""
+Offline benchmark suite for week1_foundations
+
+Runs the agent loop, batch evaluation and multi-model comparison against
+the deterministic mock provider at 1/10/100 concurrent requests, so every
+change gets regression numbers without network access or API keys.
+
+Requires pytest-benchmark:
+    uv pip install pytest-benchmark
+    PYTHONPATH=src python -m pytest src/week1_foundations/test_benchmarks.py --benchmark-group-by=func
+"""
+import asyncio
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from week1_foundations.models import model_manager
+from week1_foundations.mock_provider import MockConfig
+from week1_foundations.agent import arun_agent
+from week1_foundations.evaluation import ResponseEvaluator
+
+CONCURRENCY_LEVELS = [1, 10, 100]
+
+# Simulated provider latency for the throughput benchmarks
+MOCK_LATENCY_MS = 10.0
+
+COMPARISON_MODELS = ['mock-a', 'mock-b', 'mock-c']
+
+@pytest.fixture(scope="module", autouse=True)
+def mock_provider():
+    """Point the global model manager at the mock provider, without the response cache"""
+    saved_cache = model_manager.cache
+    model_manager.cache = None
+    model_manager.register_mock_provider(
+        MockConfig(
+            latency_ms=MOCK_LATENCY_MS,
+            tool_call_script=[[{"name": "get_weather", "arguments": {"city": "Paris"}}]]
+        ),
+        model_names=['mock-model'] + COMPARISON_MODELS
+    )
+    yield
+    model_manager.cache = saved_cache
+
+def _run(benchmark, make_coroutine, rounds: int = 5):
+    """Benchmark a coroutine factory on the model manager's event loop"""
+    return benchmark.pedantic(
+        lambda: model_manager.run_sync(make_coroutine()),
+        rounds=rounds, warmup_rounds=1
+    )
+
+@pytest.mark.parametrize("concurrency", CONCURRENCY_LEVELS)
+def test_agent_loop_overhead(benchmark, concurrency):
+    """Full tool-calling agent turn (tool call + follow-up) per request"""
+    async def batch():
+        return await asyncio.gather(*[
+            arun_agent("What's the weather in Paris?", "mock-model") for _ in range(concurrency)
+        ])
+
+    results = _run(benchmark, batch)
+
+    assert results == ["This is a mock response."] * concurrency
+    benchmark.extra_info["requests"] = concurrency
+
+@pytest.mark.parametrize("concurrency", CONCURRENCY_LEVELS)
+def test_evaluation_throughput(benchmark, concurrency):
+    """Concurrent judging of (question, response) pairs"""
+    evaluator = ResponseEvaluator(evaluator_model="mock-model", max_concurrency=concurrency)
+    pairs = [(f"Question {i}", f"Answer {i}") for i in range(concurrency)]
+
+    evaluations = _run(benchmark, lambda: evaluator.aevaluate_batch(pairs))
+
+    assert [evaluation.score for evaluation in evaluations] == [8] * concurrency
+    benchmark.extra_info["requests"] = concurrency
+
+@pytest.mark.parametrize("concurrency", CONCURRENCY_LEVELS)
+def test_comparison_fan_out(benchmark, concurrency):
+    """Concurrent multi-model comparisons across the mock models"""
+    async def batch():
+        return await asyncio.gather(*[
+            model_manager.acompare_models(f"Prompt {i}", COMPARISON_MODELS) for i in range(concurrency)
+        ])
+
+    comparisons = _run(benchmark, batch)
+
+    assert all(len(results) == len(COMPARISON_MODELS) for results in comparisons)
+    assert not any('error' in result for results in comparisons for result in results)
+    benchmark.extra_info["requests"] = concurrency * len(COMPARISON_MODELS)
@@ -0,0 +1,127 @@
+"""
+Unit tests for the response cache
+
+Run with `PYTHONPATH=src python -m pytest src/week1_foundations/test_cache.py`
+"""
+import pytest
+
+from week1_foundations import cache as cache_module
+from week1_foundations.cache import ResponseCache, make_cache_key
+
+class FakeClock:
+    """Stands in for time.time() so TTL expiry is tested without sleeping"""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, 'time', clock)
+    return clock
+
+def test_cache_key_ignores_dict_order():
+    a = make_cache_key('gpt', [{'role': 'user', 'content': 'hi'}], temperature=0)
+    b = make_cache_key('gpt', [{'content': 'hi', 'role': 'user'}], temperature=0)
+    assert a == b
+    assert a != make_cache_key('gpt', [{'role': 'user', 'content': 'hi'}], temperature=0.5)
+
+def test_returns_a_fresh_copy():
+    cache = ResponseCache()
+    cache.set('k', {'content': 'hello'})
+    cache.get('k')['content'] = 'changed'
+    assert cache.get('k') == {'content': 'hello'}
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', {'v': 1})
+    cache.set('b', {'v': 2})
+    cache.get('a')
+    cache.set('c', {'v': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'v': 1}
+    assert cache.get('c') == {'v': 3}
+    assert cache.stats()['evictions'] == 1
+
+def test_ttl_expires_entries(clock):
+    cache = ResponseCache(ttl_seconds=10)
+    cache.set('k', {'v': 1})
+
+    clock.now += 9
+    assert cache.get('k') == {'v': 1}
+    clock.now += 2
+    assert cache.get('k') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_no_ttl_never_expires(clock):
+    cache = ResponseCache(ttl_seconds=None)
+    cache.set('k', {'v': 1})
+    clock.now += 10 ** 9
+    assert cache.get('k') == {'v': 1}
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / 'responses.db')
+    ResponseCache(db_path=db_path).set('k', {'v': 1})
+
+    restarted = ResponseCache(db_path=db_path)
+    assert restarted.get('k') == {'v': 1}
+    stats = restarted.stats()
+    assert stats['disk_hits'] == 1
+    # The disk hit is promoted to the memory tier
+    assert restarted.get('k') == {'v': 1}
+    assert restarted.stats()['memory_hits'] == 1
+
+def test_sqlite_tier_drops_expired_rows(tmp_path, clock):
+    db_path = str(tmp_path / 'responses.db')
+    ResponseCache(db_path=db_path, ttl_seconds=10).set('k', {'v': 1})
+
+    clock.now += 11
+    restarted = ResponseCache(db_path=db_path, ttl_seconds=10)
+    assert restarted.get('k') is None
+    assert restarted.stats()['disk_entries'] == 0
+
+def test_sqlite_tier_evicts_least_recently_used(tmp_path, clock):
+    cache = ResponseCache(max_entries=1, db_path=str(tmp_path / 'responses.db'), max_db_entries=2)
+    cache.set('a', {'v': 1})
+    clock.now += 1
+    cache.set('b', {'v': 2})
+    clock.now += 1
+    cache.get('a')  # served from disk, refreshes last_access
+    clock.now += 1
+    cache.set('c', {'v': 3})
+
+    assert cache.stats()['disk_entries'] == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == {'v': 1}
+    cache.clear()
+    assert cache.get('a') is None
+
+def test_only_deterministic_calls_are_cached_by_default():
+    assert ResponseCache().should_cache(0)
+    assert not ResponseCache().should_cache(0.7)
+    assert ResponseCache(cache_nondeterministic=True).should_cache(0.7)
+
+def test_cache_hit_reports_no_cost():
+    pytest.importorskip('openai')
+    pytest.importorskip('dotenv')
+    from week1_foundations.models import ModelManager
+    from week1_foundations.metrics import MetricsRegistry
+    from week1_foundations.mock_provider import MockConfig
+
+    metrics = MetricsRegistry()
+    manager = ModelManager(cache=ResponseCache(), metrics=metrics)
+    manager.register_mock_provider(MockConfig(), model_names=['mock-model'])
+    messages = [{'role': 'user', 'content': 'hello'}]
+
+    first = manager.generate_response('mock-model', messages, temperature=0)
+    second = manager.generate_response('mock-model', messages, temperature=0)
+
+    assert first['usage']['cost_usd'] >= 0 and not first.get('cached')
+    assert second['cached'] is True
+    assert second['usage'] == {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0, 'cost_usd': 0.0}
+    assert second['content'] == first['content']
+    series = metrics.snapshot()[0]
+    assert series['requests'] == 1 and series['cache_hits'] == 1
@@ -0,0 +1,62 @@
+"""
+Import-time budget test for week1_foundations
+
+Short-lived batch workers import week1_foundations.app thousands of times a
+day, so the import must not construct provider clients or pull in heavy SDKs.
+
+Run with `python -m pytest src/week1_foundations/test_import_time.py`
+or directly with `python src/week1_foundations/test_import_time.py`.
+"""
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+# Wall-clock budget for `import week1_foundations.app` in a fresh interpreter
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+
+# Modules that must only be imported when actually used
+DEFERRED_MODULES = ["openai", "anthropic", "gradio"]
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = f"""
+import sys, time, json
+start = time.perf_counter()
+import week1_foundations.app
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": [name for name in {DEFERRED_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+def _measure_import() -> dict:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True, text=True, env=env, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_defers_provider_sdks():
+    measurement = _measure_import()
+    assert measurement["loaded"] == [], f"Imported eagerly: {measurement['loaded']}"
+
+def test_import_time_budget():
+    # Best of three to smooth out cold filesystem caches
+    elapsed = min(_measure_import()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET_SECONDS, (
+        f"import week1_foundations.app took {elapsed:.3f}s "
+        f"(budget {IMPORT_BUDGET_SECONDS:.3f}s)"
+    )
+
+if __name__ == "__main__":
+    measurement = _measure_import()
+    print(f"Import time: {measurement['elapsed']:.3f}s (budget {IMPORT_BUDGET_SECONDS:.3f}s)")
+    print(f"Deferred modules loaded: {measurement['loaded'] or 'none'}")
+    ok = measurement["elapsed"] < IMPORT_BUDGET_SECONDS and not measurement["loaded"]
+    print(f"Test {'succeeded' if ok else 'failed'}")
+    sys.exit(0 if ok else 1)
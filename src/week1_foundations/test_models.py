@@ -0,0 +1,62 @@
+"""
+Unit tests for ModelManager request building and response normalization
+
+Run with `PYTHONPATH=src python -m pytest src/week1_foundations/test_models.py`
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("dotenv")
+
+from week1_foundations.models import ModelManager, ModelConfig, ANTHROPIC_JSON_PREFILL
+from week1_foundations.resilience import CircuitBreaker, RetryPolicy
+
+JSON_MODE = {"type": "json_object"}
+
+CLAUDE = ModelConfig('Claude', 'anthropic', 'claude-test', 4000, 0.7, True)
+
+@pytest.fixture(scope="module")
+def manager():
+    return ModelManager()
+
+def _anthropic_message(text: str):
+    return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+def test_anthropic_json_mode_prefills_the_reply(manager):
+    messages = [{'role': 'user', 'content': 'Rate this'}]
+    params = manager._build_anthropic_params(CLAUDE, messages, 0.0, 100, JSON_MODE)
+    assert params['messages'][-1] == {'role': 'assistant', 'content': ANTHROPIC_JSON_PREFILL}
+    assert messages == [{'role': 'user', 'content': 'Rate this'}]
+
+    plain = manager._build_anthropic_params(CLAUDE, messages, 0.0, 100)
+    assert plain['messages'] == messages
+
+def test_anthropic_json_mode_restores_the_prefill(manager):
+    response = _anthropic_message('"score": 8}\nHope this helps!')
+    result = manager._format_anthropic_response('claude', CLAUDE, response, JSON_MODE)
+    assert result['content'] == '{"score": 8}'
+
+    plain = manager._format_anthropic_response('claude', CLAUDE, _anthropic_message('Hello'))
+    assert plain['content'] == 'Hello'
+
+def test_cancelled_probe_does_not_wedge_the_breaker():
+    manager = ModelManager()
+    manager.retry_policy = RetryPolicy(max_retries=0)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure('server_error')
+    manager.breaker = lambda provider: breaker
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return 'ok'
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(manager._acall_with_retries(CLAUDE, hang), 0.01)
+        return await manager._acall_with_retries(CLAUDE, ok)
+
+    assert asyncio.run(run()) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
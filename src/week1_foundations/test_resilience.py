@@ -0,0 +1,132 @@
+"""
+Unit tests for provider error classification, retry backoff and circuit breakers
+
+Run with `PYTHONPATH=src python -m pytest src/week1_foundations/test_resilience.py`
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+from week1_foundations import resilience
+from week1_foundations.resilience import (
+    RetryPolicy, CircuitBreaker, CircuitOpenError, classify_error, retry_after,
+    RATE_LIMIT, TIMEOUT, SERVER_ERROR, CONNECTION_ERROR, INVALID_REQUEST, CIRCUIT_OPEN, UNKNOWN
+)
+
+class StatusError(Exception):
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+class APITimeoutError(Exception):
+    pass
+
+class FakeClock:
+    """Stands in for time.monotonic() so breaker timeouts are tested without sleeping"""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock)
+    return clock
+
+@pytest.mark.parametrize("error, kind", [
+    (StatusError(429), RATE_LIMIT),
+    (StatusError(408), TIMEOUT),
+    (StatusError(503), SERVER_ERROR),
+    (StatusError(400), INVALID_REQUEST),
+    (asyncio.TimeoutError(), TIMEOUT),
+    (APITimeoutError(), TIMEOUT),
+    (ConnectionResetError(), CONNECTION_ERROR),
+    (CircuitOpenError('openai', 1.0), CIRCUIT_OPEN),
+    (ValueError("bad"), UNKNOWN),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+def test_retry_after_headers():
+    assert retry_after(StatusError(429, {'retry-after-ms': '1500'})) == 1.5
+    assert retry_after(StatusError(429, {'retry-after': '3'})) == 3.0
+    assert retry_after(StatusError(429)) is None
+
+def test_retry_policy_only_retries_transient_errors():
+    policy = RetryPolicy(max_retries=2)
+    assert policy.should_retry(RATE_LIMIT, 0)
+    assert policy.should_retry(SERVER_ERROR, 1)
+    assert not policy.should_retry(SERVER_ERROR, 2)
+    assert not policy.should_retry(INVALID_REQUEST, 0)
+    assert not policy.should_retry(UNKNOWN, 0)
+
+def test_retry_policy_backoff_is_bounded():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for attempt in range(10):
+        assert 0 <= policy.delay(attempt) <= min(4.0, 0.5 * 2 ** attempt)
+    # The server's Retry-After wins, capped at max_delay
+    assert policy.delay(0, StatusError(429, {'retry-after': '2'})) == 2.0
+    assert policy.delay(0, StatusError(429, {'retry-after': '60'})) == 4.0
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    for _ in range(2):
+        breaker.record_failure(SERVER_ERROR)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(SERVER_ERROR)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open
+    assert not breaker.allow()
+    assert breaker.retry_in() == 10
+
+def test_breaker_ignores_non_transient_errors(clock):
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure(INVALID_REQUEST)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure(TIMEOUT)
+    breaker.record_success()
+    breaker.record_failure(TIMEOUT)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure(SERVER_ERROR)
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_probe_success_closes_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure(SERVER_ERROR)
+    clock.now += 10
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+def test_probe_failure_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=10)
+    for _ in range(5):
+        breaker.record_failure(SERVER_ERROR)
+    clock.now += 10
+    breaker.allow()
+    breaker.record_failure(SERVER_ERROR)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_released_probe_lets_the_next_call_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure(SERVER_ERROR)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
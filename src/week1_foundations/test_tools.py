@@ -0,0 +1,148 @@
+"""
+Unit tests for tool execution
+
+Run with `PYTHONPATH=src python -m pytest src/week1_foundations/test_tools.py`
+"""
+import time
+import asyncio
+import threading
+import pytest
+from typing import List, Literal, Optional
+
+from week1_foundations import tools
+from week1_foundations.tools import ToolRegistry, execute_tools, aexecute_tools
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A fresh registry behind execute_tool, so test tools don't leak into the agent's schemas"""
+    registry = ToolRegistry()
+    monkeypatch.setattr(tools, 'registry', registry)
+    release = threading.Event()
+
+    @registry.register
+    def echo(text: str) -> str:
+        """Echo the text"""
+        return text
+
+    @registry.register
+    def hang() -> str:
+        """Block until the test releases it"""
+        release.wait(5)
+        return "released"
+
+    @registry.register
+    async def slow(seconds: float) -> str:
+        """Sleep asynchronously"""
+        await asyncio.sleep(seconds)
+        return "slept"
+
+    @registry.register
+    def boom() -> str:
+        """Always fail"""
+        raise RuntimeError("kaboom")
+
+    yield registry
+    release.set()
+
+def test_execute_tools_keeps_order_and_reports_errors(registry):
+    results = execute_tools([("echo", {"text": "a"}), ("boom", {}), ("echo", {"text": "b"}), ("nope", {})])
+    assert results[0] == "a"
+    assert results[1] == "Error: Tool 'boom' failed: kaboom"
+    assert results[2] == "b"
+    assert results[3] == "Error: Unknown tool 'nope'"
+
+def test_execute_tools_times_out_a_single_call(registry):
+    started = time.perf_counter()
+    assert execute_tools([("hang", {})], timeout=0.1) == ["Error: Tool 'hang' timed out after 0.1s"]
+    assert time.perf_counter() - started < 1
+
+def test_hung_tools_do_not_starve_later_calls(registry):
+    for _ in range(20):
+        execute_tools([("hang", {})], timeout=0.01)
+    assert execute_tools([("echo", {"text": "still running"})], timeout=1) == ["still running"]
+
+def test_execute_tools_runs_async_tools(registry):
+    assert execute_tools([("slow", {"seconds": 0.01})]) == ["slept"]
+
+def test_aexecute_tools_bounds_each_call(registry):
+    async def run():
+        return await aexecute_tools(
+            [("slow", {"seconds": 5}), ("hang", {}), ("echo", {"text": "fast"}), ("slow", {})],
+            timeout=0.1
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    assert time.perf_counter() - started < 1
+    assert results == [
+        "Error: Tool 'slow' timed out after 0.1s",
+        "Error: Tool 'hang' timed out after 0.1s",
+        "fast",
+        "Error: Missing required argument 'seconds' for tool 'slow'",
+    ]
+
+def _registry_with_lookup() -> ToolRegistry:
+    registry = ToolRegistry()
+
+    @registry.register
+    def lookup(city: str, units: Literal["metric", "imperial"] = "metric", days: int = 1,
+               tags: Optional[List[str]] = None) -> str:
+        """Look up a forecast
+
+        Args:
+            city: City name
+            days: Number of days
+        """
+        return f"{city} {units} {days}"
+
+    return registry
+
+def test_schema_is_generated_from_signature_and_docstring():
+    schema = _registry_with_lookup().schemas()[0]["function"]
+    assert schema["name"] == "lookup"
+    assert schema["description"] == "Look up a forecast"
+    properties = schema["parameters"]["properties"]
+    assert properties["city"] == {"type": "string", "description": "City name"}
+    assert properties["units"] == {"type": "string", "enum": ["metric", "imperial"]}
+    assert properties["days"]["type"] == "integer"
+    assert properties["tags"]["type"] == "array"
+    assert schema["parameters"]["required"] == ["city"]
+
+def test_schemas_are_cached_until_a_tool_registers():
+    registry = _registry_with_lookup()
+    assert registry.schemas() is registry.schemas()
+    first = registry.schemas()
+
+    @registry.register
+    def other() -> str:
+        """Another tool"""
+        return ""
+
+    assert registry.schemas() is not first
+    assert len(registry.schemas()) == 2
+
+@pytest.mark.parametrize("arguments, error", [
+    ({"city": "Paris"}, None),
+    ({"city": "Paris", "units": "imperial", "days": 3, "tags": ["a"]}, None),
+    ({"city": "Paris", "tags": None}, None),
+    ({}, "Missing required argument 'city'"),
+    ({"city": ""}, "Missing required argument 'city'"),
+    ({"city": "Paris", "country": "FR"}, "Unexpected argument 'country'"),
+    ({"city": "Paris", "days": "3"}, "'days' for tool 'lookup' must be of type integer"),
+    ({"city": "Paris", "days": True}, "'days' for tool 'lookup' must be of type integer"),
+    ({"city": "Paris", "units": "kelvin"}, "'units' for tool 'lookup' must be one of"),
+])
+def test_validate(arguments, error):
+    registry = _registry_with_lookup()
+    message = registry.validate(registry.get("lookup"), arguments)
+    if error is None:
+        assert message is None
+    else:
+        assert error in message
+
+def test_execute_validates_before_calling_and_records_stats():
+    registry = _registry_with_lookup()
+    assert registry.execute("lookup", {"city": "Paris", "days": 2}) == "Paris metric 2"
+    assert registry.execute("lookup", {"days": 2}).startswith("Error: Missing required argument")
+    stats = registry.stats()["lookup"]
+    assert stats["calls"] == 1 and stats["errors"] == 0
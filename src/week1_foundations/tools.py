@@ -1,15 +1,258 @@
 """
 Tool Functions for AI Agents
 """
+import re
+import time
+import asyncio
+import inspect
+import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from concurrent.futures import Future, wait
+from typing import Dict, List, Any, Tuple, Callable, Optional, Union, Literal, get_type_hints, get_origin, get_args
 
+# Per-tool timeout in seconds
+TOOL_TIMEOUT = 30.0
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, float('inf'))
+
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+}
+
+def _json_schema_for(annotation: Any) -> Dict[str, Any]:
+    """Translate a Python type hint into a JSON schema fragment"""
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    
+    if origin is Union:
+        non_null = [arg for arg in args if arg is not type(None)]
+        return _json_schema_for(non_null[0]) if len(non_null) == 1 else {}
+    if origin is Literal:
+        return {"type": _JSON_TYPES.get(type(args[0]), "string"), "enum": list(args)}
+    if origin in (list, List):
+        return {"type": "array", "items": _json_schema_for(args[0]) if args else {}}
+    if origin in (dict, Dict):
+        return {"type": "object"}
+    if annotation in _JSON_TYPES:
+        return {"type": _JSON_TYPES[annotation]}
+    return {}
+
+def _parse_docstring(doc: str) -> Tuple[str, Dict[str, str]]:
+    """Split a Google-style docstring into its summary and per-argument descriptions"""
+    doc = inspect.cleandoc(doc or "")
+    summary = doc.split("\n\n")[0].replace("\n", " ").strip()
+    descriptions = {}
+    match = re.search(r"^Args:\s*\n((?:[ \t]+.*\n?)+)", doc, re.MULTILINE)
+    if match:
+        for line in match.group(1).splitlines():
+            arg_match = re.match(r"\s*(\w+)(?:\s*\([^)]*\))?:\s*(.+)", line)
+            if arg_match:
+                descriptions[arg_match.group(1)] = arg_match.group(2).strip()
+    return summary, descriptions
+
+class ToolSpec:
+    """A registered tool: the callable, its JSON schema and its call statistics"""
+    def __init__(self, func: Callable, name: str, description: str, parameters: Dict[str, Any],
+                 python_types: Dict[str, Any]):
+        self.func = func
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.python_types = python_types
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+    
+    def schema(self) -> Dict[str, Any]:
+        """OpenAI function-calling schema for this tool"""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters
+            }
+        }
+
+class ToolRegistry:
+    """Decorator-based tool registry with cached schemas and O(1) dispatch"""
+    
+    def __init__(self):
+        self._tools: Dict[str, ToolSpec] = {}
+        self._schemas: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+    
+    def register(self, func: Optional[Callable] = None, *, name: Optional[str] = None,
+                 description: Optional[str] = None) -> Callable:
+        """Register a function as a tool; usable as @tool or @tool(name=..., description=...).
+        
+        The schema is built once from the signature, type hints and the
+        docstring's Args section.
+        """
+        def decorator(fn: Callable) -> Callable:
+            hints = get_type_hints(fn)
+            summary, arg_descriptions = _parse_docstring(fn.__doc__)
+            properties = {}
+            required = []
+            python_types = {}
+            
+            for param in inspect.signature(fn).parameters.values():
+                annotation = hints.get(param.name, str)
+                prop = _json_schema_for(annotation)
+                if param.name in arg_descriptions:
+                    prop["description"] = arg_descriptions[param.name]
+                properties[param.name] = prop
+                python_types[param.name] = annotation
+                if param.default is inspect.Parameter.empty:
+                    required.append(param.name)
+            
+            spec = ToolSpec(
+                fn,
+                name or fn.__name__,
+                description or summary,
+                {"type": "object", "properties": properties, "required": required},
+                python_types
+            )
+            with self._lock:
+                self._tools[spec.name] = spec
+                self._schemas = None
+            return fn
+        
+        return decorator(func) if func is not None else decorator
+    
+    def get(self, tool_name: str) -> Optional[ToolSpec]:
+        return self._tools.get(tool_name)
+    
+    def schemas(self) -> List[Dict[str, Any]]:
+        """Return the tool schema list, built once and reused until a new tool registers"""
+        schemas = self._schemas
+        if schemas is None:
+            with self._lock:
+                if self._schemas is None:
+                    self._schemas = [spec.schema() for spec in self._tools.values()]
+                schemas = self._schemas
+        return schemas
+    
+    def validate(self, spec: ToolSpec, arguments: Dict[str, Any]) -> Optional[str]:
+        """Return an error message if arguments don't match the tool schema, else None"""
+        properties = spec.parameters["properties"]
+        
+        for arg_name in spec.parameters["required"]:
+            if arguments.get(arg_name) in (None, ""):
+                return f"Error: Missing required argument '{arg_name}' for tool '{spec.name}'"
+        
+        for arg_name, value in arguments.items():
+            if arg_name not in properties:
+                return f"Error: Unexpected argument '{arg_name}' for tool '{spec.name}'"
+            if value is None and arg_name not in spec.parameters["required"]:
+                continue
+            expected = properties[arg_name].get("type")
+            if expected and not _matches_json_type(value, expected):
+                return f"Error: Argument '{arg_name}' for tool '{spec.name}' must be of type {expected}"
+            if "enum" in properties[arg_name] and value not in properties[arg_name]["enum"]:
+                return f"Error: Argument '{arg_name}' for tool '{spec.name}' must be one of {properties[arg_name]['enum']}"
+        
+        return None
+    
+    def _record(self, spec: ToolSpec, started: float, failed: bool) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        bucket = next(i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound)
+        with self._lock:
+            spec.calls += 1
+            spec.errors += int(failed)
+            spec.total_ms += elapsed_ms
+            spec.histogram[bucket] += 1
+    
+    async def _invoke_async(self, spec: ToolSpec, arguments: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await spec.func(**arguments)
+        except Exception:
+            self._record(spec, started, failed=True)
+            raise
+        self._record(spec, started, failed=False)
+        return result
+    
+    def execute(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Validate arguments and dispatch to the tool.
+        
+        Async tools return an awaitable that records its latency when awaited.
+        """
+        spec = self._tools.get(tool_name)
+        if spec is None:
+            return f"Error: Unknown tool '{tool_name}'"
+        
+        error = self.validate(spec, arguments)
+        if error:
+            return error
+        
+        if spec.is_async:
+            return self._invoke_async(spec, arguments)
+        
+        started = time.perf_counter()
+        try:
+            result = spec.func(**arguments)
+        except Exception:
+            self._record(spec, started, failed=True)
+            raise
+        self._record(spec, started, failed=False)
+        return result
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool call counts, error counts and latency histograms"""
+        with self._lock:
+            return {
+                name: {
+                    'calls': spec.calls,
+                    'errors': spec.errors,
+                    'avg_ms': spec.total_ms / spec.calls if spec.calls else 0.0,
+                    'histogram_ms': {
+                        ('+Inf' if bound == float('inf') else bound): count
+                        for bound, count in zip(LATENCY_BUCKETS_MS, spec.histogram)
+                    }
+                }
+                for name, spec in self._tools.items()
+            }
+
+def _matches_json_type(value: Any, expected: str) -> bool:
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected == "string":
+        return isinstance(value, str)
+    if expected == "boolean":
+        return isinstance(value, bool)
+    if expected == "array":
+        return isinstance(value, list)
+    if expected == "object":
+        return isinstance(value, dict)
+    return True
+
+# Global registry and decorator
+registry = ToolRegistry()
+tool = registry.register
+
+@tool
 def get_current_time() -> str:
     """Get the current system time"""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+@tool(description="Get weather information for a given city")
 def get_weather(city: str) -> str:
-    """Get weather information for a city (mocked data)"""
+    """Get weather information for a city (mocked data)
+    
+    Args:
+        city: City name
+    """
     # Mocked function - replace with real API call if needed
     weather_data = {
         "Barcelona": "22°C, sunny",
@@ -23,46 +266,93 @@ def get_weather(city: str) -> str:
 
 def get_available_tools() -> List[Dict[str, Any]]:
     """Get list of available tools for the AI agent"""
-    return [
-        {
-            "type": "function",
-            "function": {
-                "name": "get_current_time",
-                "description": "Get the current system time",
-                "parameters": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            }
-        },
-        {
-            "type": "function", 
-            "function": {
-                "name": "get_weather",
-                "description": "Get weather information for a given city",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "city": {
-                            "type": "string",
-                            "description": "City name"
-                        }
-                    },
-                    "required": ["city"]
-                }
-            }
-        }
-    ]
+    return registry.schemas()
 
-def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> str:
+def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
     """Execute a tool function with given arguments"""
-    if tool_name == "get_current_time":
-        return get_current_time()
-    elif tool_name == "get_weather":
-        city = arguments.get("city", "")
-        if not city:
-            return "Error: City parameter is required for weather information"
-        return get_weather(city)
-    else:
-        return f"Error: Unknown tool '{tool_name}'"
+    return registry.execute(tool_name, arguments)
+
+def get_tool_stats() -> Dict[str, Dict[str, Any]]:
+    """Get per-tool call counts and latency histograms"""
+    return registry.stats()
+
+def _run_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
+    """Execute a tool in a worker thread, driving it to completion if it is async"""
+    result = execute_tool(tool_name, arguments)
+    if inspect.isawaitable(result):
+        return asyncio.run(result)
+    return result
+
+def _start_tool(tool_name: str, arguments: Dict[str, Any]) -> Future:
+    """Run a tool on its own daemon thread and return a future for its result.
+    
+    A running thread cannot be cancelled, so a tool that outlives its timeout
+    is abandoned rather than stopped. Giving each call its own thread keeps
+    such a tool from permanently holding a worker of a shared pool.
+    """
+    future = Future()
+    
+    def _target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(_run_tool(tool_name, arguments))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=_target, name=f"tool-{tool_name}", daemon=True).start()
+    return future
+
+def execute_tools(tool_calls: List[Tuple[str, Dict[str, Any]]], 
+                  timeout: float = TOOL_TIMEOUT) -> List[Any]:
+    """Execute independent tool calls concurrently, each on its own thread.
+    
+    All calls start together, so waiting once for ``timeout`` gives every
+    tool the same per-tool timeout. A tool that times out is abandoned: its
+    thread is left to finish in the background and its result is discarded.
+    
+    Args:
+        tool_calls: List of (tool_name, arguments) pairs
+        timeout: Per-tool timeout in seconds
+        
+    Returns:
+        List of results in the same order as tool_calls; failures and
+        timeouts are returned as error strings
+    """
+    futures = [_start_tool(name, args) for name, args in tool_calls]
+    wait(futures, timeout=timeout)
+    
+    results = []
+    for (tool_name, _), future in zip(tool_calls, futures):
+        if not future.done():
+            results.append(f"Error: Tool '{tool_name}' timed out after {timeout}s")
+        elif future.exception() is not None:
+            results.append(f"Error: Tool '{tool_name}' failed: {future.exception()}")
+        else:
+            results.append(future.result())
+    return results
+
+async def aexecute_tools(tool_calls: List[Tuple[str, Dict[str, Any]]], 
+                         timeout: float = TOOL_TIMEOUT) -> List[Any]:
+    """Async version of execute_tools.
+    
+    Async tools are awaited directly on the running loop and are cancelled
+    when they time out; sync tools run on their own threads and are
+    abandoned when they time out. Each call is bounded by its own timeout.
+    """
+    async def _call(tool_name: str, arguments: Dict[str, Any]) -> Any:
+        spec = registry.get(tool_name)
+        try:
+            if spec is None or spec.is_async:
+                # Validation is cheap and an async tool only returns its coroutine here
+                result = execute_tool(tool_name, arguments)
+                if inspect.isawaitable(result):
+                    result = await asyncio.wait_for(result, timeout)
+                return result
+            return await asyncio.wait_for(asyncio.wrap_future(_start_tool(tool_name, arguments)), timeout)
+        except asyncio.TimeoutError:
+            return f"Error: Tool '{tool_name}' timed out after {timeout}s"
+        except Exception as e:
+            return f"Error: Tool '{tool_name}' failed: {e}"
+    
+    return await asyncio.gather(*[_call(name, args) for name, args in tool_calls])